@@ -0,0 +1,341 @@
+import atexit
+import sys
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from cli import get_flag_value
+from flow_control import IDEMPOTENT_METHODS, AdaptiveLimiter, RetryPolicy, is_overload
+
+# --- Configuration ---
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "User-Agent": "wisdom-pool-harness/1.0",
+}
+
+_settings = {
+    "pool_size": DEFAULT_POOL_SIZE,
+    "timeout": DEFAULT_TIMEOUT,
+    "headers": dict(DEFAULT_HEADERS),
+    "retry_policy": None,  # RetryPolicy, or None to fail on the first error
+    "limiter": None,  # AdaptiveLimiter, or None for no in-flight limit
+}
+_session = None
+_session_lock = threading.Lock()
+
+# Callables run after every request as
+# hook(method, url, response, elapsed, streamed_bytes=None).
+# `response` is None when the request raised before a response arrived;
+# hooks can still identify the call through current_request_id(). For a
+# stream=True request the hooks run once its reader calls finish_streamed()
+# (streaming.StreamedPage does so when closed or read to the end):
+# elapsed then covers the whole body, streamed_bytes is its decoded size,
+# and the body must not be read again.
+_request_hooks = []
+_request_context = threading.local()
+# Callables run on each prepared request just before it goes out, as
+# hook(prepared). They may rewrite its body and headers (e.g. to encode it).
+_send_hooks = []
+
+# Connection reuse accounting, updated from every pooled connection
+_stats_lock = threading.Lock()
+_connection_stats = {
+    "requests": 0,
+    "new_connections": 0,
+    "connect_seconds": 0.0,
+    "retries": 0,
+}
+
+
+def _record_connect(seconds):
+    with _stats_lock:
+        _connection_stats["new_connections"] += 1
+        _connection_stats["connect_seconds"] += seconds
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        _record_connect(time.perf_counter() - started)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()  # Includes the TLS handshake
+        _record_connect(time.perf_counter() - started)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools time every new TCP/TLS connection.
+
+    It also runs the send hooks on every prepared request.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        for hook in _send_hooks:
+            hook(request)
+        return super().send(request, *args, **kwargs)
+
+
+def configure(pool_size=None, timeout=None, headers=None, retry_policy=None,
+              limiter=None):
+    """Updates client settings. The pooled session is rebuilt on next use."""
+    global _session
+    with _session_lock:
+        if pool_size is not None:
+            _settings["pool_size"] = pool_size
+        if timeout is not None:
+            _settings["timeout"] = timeout
+        if headers is not None:
+            _settings["headers"].update(headers)
+        if retry_policy is not None:
+            _settings["retry_policy"] = retry_policy
+        if limiter is not None:
+            _settings["limiter"] = limiter
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def configure_from_argv():
+    """Applies --pool-size, --timeout and --conn-stats from the command line.
+
+    --retry enables retries with jittered backoff (--max-attempts N) and
+    --adaptive an AIMD in-flight limit of at most the pool size.
+    """
+    pool_size = get_flag_value("--pool-size", None, int)
+    timeout = get_flag_value("--timeout", None, float)
+    configure(pool_size=pool_size, timeout=timeout)
+    if "--retry" in sys.argv or "--max-attempts" in sys.argv:
+        enable_retries(get_flag_value("--max-attempts", None, int))
+    if "--adaptive" in sys.argv:
+        enable_adaptive_concurrency()
+    if "--conn-stats" in sys.argv:
+        atexit.register(print_connection_stats)
+
+
+def enable_retries(max_attempts=None):
+    """Retries transient failures with jittered exponential backoff."""
+    policy = RetryPolicy() if max_attempts is None else RetryPolicy(max_attempts)
+    configure(retry_policy=policy)
+    return policy
+
+
+def enable_adaptive_concurrency(maximum=None):
+    """Limits in-flight requests with AIMD, up to maximum (the pool size)."""
+    limiter = AdaptiveLimiter(maximum=maximum or _settings["pool_size"])
+    configure(limiter=limiter)
+    return limiter
+
+
+def limiter_stats():
+    """Returns the adaptive limiter's current state, or None if disabled."""
+    limiter = _settings["limiter"]
+    return limiter.stats() if limiter else None
+
+
+def add_request_hook(hook):
+    """Registers a callable that observes every request sent by the client."""
+    _request_hooks.append(hook)
+
+
+def remove_request_hook(hook):
+    """Unregisters a request hook added with add_request_hook."""
+    global _request_hooks
+    # A new list, so requests completing meanwhile still run every old hook
+    _request_hooks = [h for h in _request_hooks if h != hook]
+
+
+def add_send_hook(hook):
+    """Registers a callable that may rewrite every prepared request."""
+    _send_hooks.append(hook)
+
+
+def get_session():
+    """Returns the shared keep-alive session, creating it if needed."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = _TimedAdapter(
+                pool_connections=_settings["pool_size"],
+                pool_maxsize=_settings["pool_size"],
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(_settings["headers"])
+            _session = session
+        return _session
+
+
+def current_request_id():
+    """Returns the X-Request-Id of the request this thread is sending.
+
+    Valid while the request is in flight, including inside request hooks.
+    """
+    return getattr(_request_context, "request_id", None)
+
+
+def _complete(method, url, response, error, started, limiter, sent_at,
+              streamed_bytes=None):
+    """Releases the in-flight slot and runs the request hooks."""
+    elapsed = time.perf_counter() - started
+    if limiter:
+        limiter.release(sent_at, is_overload(response, error))
+    for hook in _request_hooks:
+        hook(method, url, response, elapsed, streamed_bytes=streamed_bytes)
+
+
+def _send(method, url, kwargs):
+    """Sends one attempt, returning (response, error).
+
+    A successful stream=True response stays in flight until its reader
+    calls finish_streamed(); error bodies are small and read at once.
+    """
+    with _stats_lock:
+        _connection_stats["requests"] += 1
+    limiter = _settings["limiter"]
+    sent_at = limiter.acquire() if limiter else None
+    response = None
+    error = None
+    deferred = False
+    started = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+        if kwargs.get("stream"):
+            if response.ok:
+                response.harness_pending = (
+                    method, url, started, limiter, sent_at, current_request_id()
+                )
+                deferred = True
+            else:
+                response.content
+    except requests.exceptions.RequestException as e:
+        error = e
+    finally:
+        if not deferred:
+            _complete(method, url, response, error, started, limiter, sent_at)
+    return response, error
+
+
+def finish_streamed(response, body_bytes):
+    """Completes a stream=True request once its body has been read or abandoned.
+
+    Runs the request hooks with the time to the end of the body and the
+    decoded body size. Safe to call more than once.
+    """
+    pending = response.__dict__.pop("harness_pending", None)
+    if pending is None:
+        return
+    method, url, started, limiter, sent_at, request_id = pending
+    previous = current_request_id()
+    _request_context.request_id = request_id
+    try:
+        _complete(method, url, response, None, started, limiter, sent_at,
+                  streamed_bytes=body_bytes)
+    finally:
+        _request_context.request_id = previous
+
+
+def request(method, url, idempotent=None, **kwargs):
+    """Sends a request through the shared session with default timeouts.
+
+    Every request carries a unique X-Request-Id (unless the caller set one)
+    so server log lines can be matched to it; retries reuse it. With a
+    retry policy, transient failures are retried. `idempotent` defaults to
+    True for GET/PUT/DELETE; pass it for POSTs that are safe to repeat.
+    """
+    kwargs.setdefault("timeout", _settings["timeout"])
+    headers = dict(kwargs.get("headers") or {})
+    headers.setdefault("X-Request-Id", uuid.uuid4().hex)
+    kwargs["headers"] = headers
+    _request_context.request_id = headers["X-Request-Id"]
+    if idempotent is None:
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+    policy = _settings["retry_policy"]
+    attempt = 0
+    while True:
+        response, error = _send(method, url, kwargs)
+        if policy is None or not policy.should_retry(
+            attempt, response, error, idempotent
+        ):
+            break
+        with _stats_lock:
+            _connection_stats["retries"] += 1
+        delay = policy.delay(attempt, response)
+        if response is not None:
+            response.close()  # Return its connection to the pool while waiting
+        time.sleep(delay)
+        attempt += 1
+    if error is not None:
+        raise error
+    return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
+
+
+def connection_stats():
+    """Returns request/connection counts and the estimated handshake time saved."""
+    with _stats_lock:
+        stats = dict(_connection_stats)
+    new_connections = stats["new_connections"]
+    reused = max(stats["requests"] - new_connections, 0)
+    avg_connect = (
+        stats["connect_seconds"] / new_connections if new_connections else 0.0
+    )
+    stats.update({
+        "reused_requests": reused,
+        "avg_connect_seconds": avg_connect,
+        "handshake_seconds_saved": reused * avg_connect,
+    })
+    return stats
+
+
+def print_connection_stats():
+    """Prints connection reuse counts and the handshake time they saved."""
+    stats = connection_stats()
+    print("\n--- Connection reuse ---")
+    print(f"Requests sent: {stats['requests']}")
+    print(f"New connections: {stats['new_connections']}")
+    print(f"Reused connections: {stats['reused_requests']}")
+    print(f"Average connect/handshake: {stats['avg_connect_seconds'] * 1000:.1f} ms")
+    print(f"Handshake time saved: {stats['handshake_seconds_saved']:.2f}s")
+    print(f"Retried attempts: {stats['retries']}")
+    limiter = limiter_stats()
+    if limiter:
+        print(f"Adaptive concurrency: limit {limiter['limit']} "
+              f"(peak {limiter['peak_limit']}, {limiter['decreases']} decreases)")
@@ -0,0 +1,240 @@
+import itertools
+import sys
+import threading
+import time
+
+import requests
+
+import api_client
+import environment
+import streaming
+import test_10_FE_prep as fe_prep
+from cli import get_flag_value, positive_int_list
+from metrics import LatencyHistogram
+
+# --- Configuration ---
+DEFAULT_WRITERS = [1, 2, 4, 8, 16, 32]
+DEFAULT_BATCHES_PER_WRITER = 50
+DEFAULT_BATCH_SIZE = 1  # small batches interleave writers the most
+DEFAULT_PAGE_LIMIT = 500
+MAX_ISSUES_PRINTED = 20
+
+
+def get_stream(stream_id):
+    response = api_client.get(f"{environment.API_V1_URL}/streams/{stream_id}")
+    response.raise_for_status()
+    return response.json()
+
+
+def verify_placement_list(stream_id, acknowledged, limit=DEFAULT_PAGE_LIMIT):
+    """Walks a stream's placement list end to end and checks its integrity.
+
+    acknowledged maps each placement_id a writer got back from the server
+    to (writer, sequence). Checks that the list starts and ends at the
+    stream's first/last_drop_placement_id, every next link is matched by
+    the following placement's prev_placement_id, no placement is visited
+    twice (a cycle), every acknowledged placement is reachable (no
+    orphans or lost appends), nothing unacknowledged appears, each
+    writer's drops keep the order they were sent in, and total_count
+    matches the walk. Returns (walked, issues).
+    """
+    issues = []
+    stream = get_stream(stream_id)
+    first = stream.get("first_drop_placement_id")
+    last = stream.get("last_drop_placement_id")
+    seen = set()
+    last_sequence = {}
+    total_count = None
+    prev_placement_id = None
+    cursor = first
+    while cursor:
+        try:
+            page = streaming.get_page(
+                f"{environment.API_V1_URL}/streams/{stream_id}/drops",
+                params={"from_placement_id": cursor, "limit": limit},
+            )
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code != 404:
+                raise
+            issues.append(f"{prev_placement_id} links to missing placement {cursor}")
+            break
+        with page:
+            drops = iter(page)
+            first_drop = next(drops, None)
+            if first_drop is None or first_drop["placement_id"] != cursor:
+                issues.append(f"page from {cursor} does not start at its cursor")
+                break
+            # Follow next links rather than page order: that is what exposes
+            # cycles and placements the list skips over
+            for drop in itertools.chain([first_drop], drops):
+                placement_id = drop["placement_id"]
+                if placement_id != cursor:
+                    issues.append(
+                        f"{prev_placement_id} links to {cursor} but the page "
+                        f"continues with {placement_id}"
+                    )
+                    break  # Re-read from the linked placement
+                seen.add(placement_id)
+                if drop.get("prev_placement_id") != prev_placement_id:
+                    issues.append(
+                        f"placement {placement_id}: prev_placement_id "
+                        f"{drop.get('prev_placement_id')} != {prev_placement_id}"
+                    )
+                owner = acknowledged.get(placement_id)
+                if owner is None:
+                    issues.append(f"placement {placement_id} was never acknowledged")
+                else:
+                    writer, sequence = owner
+                    if sequence <= last_sequence.get(writer, -1):
+                        issues.append(
+                            f"writer {writer}: drop {sequence} placed after drop "
+                            f"{last_sequence[writer]}"
+                        )
+                    last_sequence[writer] = max(sequence, last_sequence.get(writer, -1))
+                prev_placement_id = placement_id
+                cursor = drop.get("next_placement_id")
+                if cursor in seen:
+                    issues.append(f"cycle: {placement_id} links back to {cursor}")
+                    cursor = None
+                if cursor is None:
+                    break
+            for _ in drops:
+                pass  # Read the rest of the page for its total_count
+            if total_count is None:
+                total_count = page.fields.get("total_count")
+
+    if prev_placement_id != last:
+        issues.append(
+            f"walk ended at {prev_placement_id}, stream last_drop_placement_id "
+            f"is {last}"
+        )
+    orphans = set(acknowledged) - seen
+    if orphans:
+        issues.append(f"{len(orphans)} acknowledged placements are unreachable "
+                      f"(e.g. {next(iter(orphans))})")
+    walked = len(seen)
+    if total_count is not None and total_count != walked:
+        issues.append(f"total_count is {total_count}, walked {walked}")
+    if walked != len(acknowledged):
+        issues.append(f"walked {walked} placements, writers were acknowledged "
+                      f"{len(acknowledged)}")
+    return walked, issues
+
+
+def run_writers(stream_id, writers, batches, batch_size):
+    """Has `writers` threads append to one stream at once.
+
+    Each writer sends its batches back to back. Returns the acknowledged
+    placements, the request latency histogram, the failed appends and the
+    elapsed time from the common start.
+    """
+    acknowledged = {}
+    histogram = LatencyHistogram()
+    lock = threading.Lock()
+    errors = []
+    start = threading.Barrier(writers + 1)
+
+    def write(writer):
+        start.wait()
+        for batch in range(batches):
+            drops = [
+                {"title": f"Writer {writer} drop {batch * batch_size + i}",
+                 "text": "Concurrent append"}
+                for i in range(batch_size)
+            ]
+            started = time.perf_counter()
+            try:
+                _, placement_ids = fe_prep.add_drops_to_stream(
+                    stream_id, drops, verbose=False, chunk_size=batch_size
+                )
+            except requests.exceptions.RequestException as e:
+                with lock:
+                    errors.append(e)
+                continue
+            latency = time.perf_counter() - started
+            with lock:
+                histogram.record(latency)
+                for i, placement_id in enumerate(placement_ids):
+                    acknowledged[placement_id] = (writer, batch * batch_size + i)
+
+    threads = [
+        threading.Thread(target=write, args=(w,)) for w in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return acknowledged, histogram, errors, elapsed
+
+
+def run_contention_test(writer_counts, batches, batch_size, limit):
+    print(f"--- Concurrent appends: {batches} batches of {batch_size} per "
+          f"writer, writers {', '.join(map(str, writer_counts))} ---")
+    pool_id = fe_prep.create_pool(
+        "APPEND_CONTENTION", "Concurrent append stress test", verbose=False
+    )
+    print(f"\n{'writers':>8}{'drops':>8}{'secs':>8}{'drops/s':>10}"
+          f"{'scaling':>9}{'req p50 ms':>12}{'req p99 ms':>12}{'errors':>8}"
+          f"{'issues':>8}")
+    results = []
+    all_issues = []
+    for writers in writer_counts:
+        stream_id = fe_prep.create_stream(
+            pool_id, f"Hot stream, {writers} writers", "Concurrent appends",
+            verbose=False
+        )
+        acknowledged, histogram, errors, elapsed = run_writers(
+            stream_id, writers, batches, batch_size
+        )
+        walked, issues = verify_placement_list(stream_id, acknowledged, limit)
+        drops_per_second = len(acknowledged) / elapsed if elapsed else 0.0
+        baseline = results[0]["drops_per_second"] if results else drops_per_second
+        results.append({
+            "writers": writers,
+            "drops": len(acknowledged),
+            "walked": walked,
+            "drops_per_second": drops_per_second,
+            "errors": len(errors),
+            "issues": len(issues),
+        })
+        print(f"{writers:>8}{len(acknowledged):>8}{elapsed:>8.2f}"
+              f"{drops_per_second:>10.0f}"
+              f"{drops_per_second / baseline if baseline else 0:>8.2f}x"
+              f"{histogram.percentile(50) * 1000:>12.2f}"
+              f"{histogram.percentile(99) * 1000:>12.2f}"
+              f"{len(errors):>8}{len(issues):>8}")
+        all_issues.extend(f"{writers} writers: {issue}" for issue in issues)
+        all_issues.extend(f"{writers} writers: append failed: {e}" for e in errors[:5])
+
+    if all_issues:
+        print(f"\n!!! {len(all_issues)} placement list problems !!!")
+        for issue in all_issues[:MAX_ISSUES_PRINTED]:
+            print(f"  {issue}")
+        return False
+    print("\nPlacement lists intact: no orphans, cycles or broken back-pointers, "
+          "and total_count matches every walk.")
+    return True
+
+
+def main():
+    fe_prep.configure_from_argv()
+    writer_counts = get_flag_value("--writers", DEFAULT_WRITERS, positive_int_list)
+    api_client.configure(pool_size=max(writer_counts))
+    try:
+        ok = run_contention_test(
+            writer_counts,
+            get_flag_value("--batches", DEFAULT_BATCHES_PER_WRITER, int),
+            get_flag_value("--batch-size", DEFAULT_BATCH_SIZE, int),
+            get_flag_value("--limit", DEFAULT_PAGE_LIMIT, int),
+        )
+    except requests.exceptions.RequestException as e:
+        print(f"\n!!! Error occurred: {e}")
+        sys.exit(1)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
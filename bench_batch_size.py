@@ -0,0 +1,126 @@
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+import requests
+
+import api_client
+import environment
+import test_10_FE_prep as fe_prep
+from cli import get_flag_value, positive_int_list
+from metrics import LatencyHistogram
+
+# --- Configuration ---
+DEFAULT_BATCH_SIZES = [1, 5, 10, 25, 50, 100, 250, 500, 1000]
+DEFAULT_TOTAL_DROPS = 2000
+DEFAULT_REPEAT = 3  # streams filled per batch size
+
+
+def payload_bytes(body):
+    """Size of a JSON body as requests serialises it."""
+    return len(json.dumps(body, allow_nan=False).encode("utf-8"))
+
+
+def sweep_batch_size(pool_id, batch_size, total_drops, repeat):
+    """Appends total_drops to fresh streams in batches of batch_size.
+
+    Batches go out back to back on one connection, so drops/sec reflects
+    what a single ordered writer (like the seeder) can achieve per stream.
+    """
+    histogram = LatencyHistogram()
+    sent_bytes = 0
+    requests_sent = 0
+    elapsed = 0.0
+    for run in range(repeat):
+        title = f"Batch {batch_size} run {run + 1}"
+        stream_id = fe_prep.create_stream(
+            pool_id, title, "Batch size sweep", verbose=False
+        )
+        started = time.perf_counter()
+        for start in range(0, total_drops, batch_size):
+            body = {
+                "drops": fe_prep.synthetic_drops(
+                    title, start, min(start + batch_size, total_drops)
+                ),
+                "creator_id": fe_prep.CREATOR_ID,
+            }
+            sent_bytes += payload_bytes(body)
+            request_started = time.perf_counter()
+            response = api_client.post(
+                f"{environment.API_V1_URL}/streams/{stream_id}/drops", json=body
+            )
+            histogram.record(time.perf_counter() - request_started)
+            response.raise_for_status()
+            requests_sent += 1
+        elapsed += time.perf_counter() - started
+        count = fe_prep.get_stream_drop_count(stream_id)
+        if count != total_drops:
+            raise RuntimeError(
+                f"Stream {stream_id} holds {count} drops, expected {total_drops}"
+            )
+    drops = total_drops * repeat
+    return {
+        "batch_size": batch_size,
+        "requests": requests_sent,
+        "drops_per_second": drops / elapsed if elapsed else 0.0,
+        "request_p50_ms": histogram.percentile(50) * 1000,
+        "request_p95_ms": histogram.percentile(95) * 1000,
+        "per_drop_ms": elapsed / drops * 1000,
+        "bytes_per_request": sent_bytes / requests_sent,
+        "bytes_per_drop": sent_bytes / drops,
+    }
+
+
+def run_sweep(batch_sizes, total_drops, repeat):
+    print(f"--- Batch size sweep: {total_drops} drops x {repeat} streams "
+          f"per size ---")
+    pool_id = fe_prep.create_pool(
+        "BATCH_SIZE_BENCH", "Add-drops batch size sweep", verbose=False
+    )
+    print(f"\n{'batch':>6}{'requests':>10}{'drops/s':>10}{'req p50 ms':>12}"
+          f"{'req p95 ms':>12}{'ms/drop':>9}{'bytes/req':>11}{'bytes/drop':>11}")
+    results = []
+    for batch_size in batch_sizes:
+        row = sweep_batch_size(pool_id, batch_size, total_drops, repeat)
+        results.append(row)
+        print(f"{row['batch_size']:>6}{row['requests']:>10}"
+              f"{row['drops_per_second']:>10.0f}{row['request_p50_ms']:>12.2f}"
+              f"{row['request_p95_ms']:>12.2f}{row['per_drop_ms']:>9.3f}"
+              f"{row['bytes_per_request']:>11.0f}{row['bytes_per_drop']:>11.1f}")
+    return results
+
+
+def save_best_batch_size(results, path=fe_prep.BATCH_SIZE_FILE):
+    """Stores the fastest batch size for the seeder to chunk with."""
+    best = max(results, key=lambda row: row["drops_per_second"])
+    with open(path, "w") as f:
+        json.dump({
+            "best_batch_size": best["batch_size"],
+            "measured_at": datetime.now(timezone.utc).isoformat(),
+            "base_url": environment.BASE_URL,
+            "results": results,
+        }, f, indent=4)
+    print(f"\nBest batch size: {best['batch_size']} "
+          f"({best['drops_per_second']:.0f} drops/s), saved to {path}")
+    return best["batch_size"]
+
+
+def main():
+    fe_prep.configure_from_argv()
+    batch_sizes = get_flag_value("--sizes", DEFAULT_BATCH_SIZES, positive_int_list)
+    try:
+        results = run_sweep(
+            batch_sizes,
+            get_flag_value("--drops", DEFAULT_TOTAL_DROPS, int),
+            get_flag_value("--repeat", DEFAULT_REPEAT, int),
+        )
+    except (requests.exceptions.RequestException, RuntimeError) as e:
+        print(f"\n!!! Batch size sweep failed: {e}")
+        sys.exit(1)
+    if "--no-save" not in sys.argv:
+        save_best_batch_size(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import heapq
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import api_client
+import environment
+import test_10_FE_prep as fe_prep
+from cli import get_flag_value
+from metrics import LatencyHistogram
+from stream_cache import StreamCache
+
+# --- Configuration ---
+DEFAULT_READERS = 200
+DEFAULT_RATE = 1.0  # heartbeats per reader per second
+DEFAULT_DURATION = 30.0  # seconds
+DEFAULT_WORKERS = 32
+DEFAULT_STREAMS = 20
+DEFAULT_DROPS_PER_STREAM = 50
+REPORT_INTERVAL = 5.0  # seconds between progress lines
+
+
+def seed_reading_streams(stream_count, drops_per_stream):
+    """Seeds streams to read and returns (pool_id, streams).
+
+    Each stream is a (stream_id, [(drop_id, placement_id), ...]) tuple in
+    reading order, so readers only ever report real placements.
+    """
+    print(f"--- Seeding {stream_count} streams x {drops_per_stream} drops ---")
+    pool_id = fe_prep.create_pool(
+        "HEARTBEAT_BENCH", "Progress heartbeat benchmark", verbose=False
+    )
+    streams = []
+    for s in range(stream_count):
+        stream_id = fe_prep.create_stream(
+            pool_id, f"Heartbeat Stream {s + 1}", "Synthetic stream",
+            verbose=False
+        )
+        drop_ids, placement_ids = fe_prep.add_drops_to_stream(
+            stream_id,
+            fe_prep.synthetic_drops(f"Heartbeat Stream {s + 1}", 0, drops_per_stream),
+            verbose=False,
+        )
+        streams.append((stream_id, list(zip(drop_ids, placement_ids))))
+    print(f"Seeded pool {pool_id}\n")
+    return pool_id, streams
+
+
+def load_reading_streams(stream_ids):
+    """Pages existing streams into memory and returns them for readers."""
+    print(f"--- Loading {len(stream_ids)} existing streams ---")
+    cache = StreamCache(environment.API_V1_URL)
+    streams = []
+    for stream_id in stream_ids:
+        records = cache.get_stream(stream_id).records()
+        if records:
+            streams.append((stream_id, records))
+    print(f"Loaded {sum(len(r) for _, r in streams)} placements in "
+          f"{cache.pages_fetched} pages\n")
+    return streams
+
+
+class VirtualReader:
+    """A reader moving drop by drop through randomly chosen streams."""
+
+    def __init__(self, user_id, streams, rng):
+        self.user_id = user_id
+        self.streams = streams
+        self.rng = rng
+        self.last_sent = float("-inf")
+        self.pending = None
+        self.flush_seq = None  # seq of the flush event still to come, if any
+        self.open_random_stream()
+
+    def open_random_stream(self):
+        self.stream_id, self.drops = self.rng.choice(self.streams)
+        self.position = 0
+
+    def advance(self):
+        """Moves to the next drop and returns the heartbeat describing it."""
+        if self.position >= len(self.drops):
+            self.open_random_stream()
+        drop_id, placement_id = self.drops[self.position]
+        self.position += 1
+        return self.stream_id, drop_id, placement_id
+
+
+class HeartbeatSimulator:
+    """Schedules heartbeats for many readers onto a bounded worker pool.
+
+    With a coalescing window, a reader sends at most one heartbeat per
+    window; positions that are superseded before the window closes are
+    dropped client-side and only the latest one is sent.
+    """
+
+    def __init__(self, pool_id, streams, readers, rate, duration, workers,
+                 coalesce_window=0.0, seed=0):
+        self.pool_id = pool_id
+        self.rate = rate
+        self.duration = duration
+        self.workers = workers
+        self.coalesce_window = coalesce_window
+        rng = random.Random(seed)
+        run_id = uuid.uuid4().hex[:8]
+        self.readers = [
+            VirtualReader(f"hb_reader_{run_id}_{i}", streams, rng)
+            for i in range(readers)
+        ]
+        self.lock = threading.Lock()
+        self.histogram = LatencyHistogram()
+        self.interval_histogram = LatencyHistogram()
+        self.ticks = 0
+        self.sent = 0
+        self.ok = 0
+        self.errors = 0
+        self.superseded = 0
+        self.backlog_drops = 0
+        self.in_flight = 0
+
+    def send(self, reader, heartbeat):
+        stream_id, drop_id, placement_id = heartbeat
+        started = time.perf_counter()
+        try:
+            fe_prep.update_user_progress(
+                self.pool_id, stream_id, drop_id, placement_id,
+                user_id=reader.user_id,
+            )
+            failed = False
+        except requests.exceptions.RequestException:
+            failed = True
+        latency = time.perf_counter() - started
+        with self.lock:
+            self.in_flight -= 1
+            if failed:
+                self.errors += 1
+            else:
+                self.ok += 1
+                self.histogram.record(latency)
+                self.interval_histogram.record(latency)
+
+    def dispatch(self, executor, reader, heartbeat, now):
+        """Hands a heartbeat to the pool unless the client is saturated."""
+        reader.last_sent = now
+        with self.lock:
+            if self.in_flight >= self.workers * 4:
+                self.backlog_drops += 1
+                return
+            self.in_flight += 1
+            self.sent += 1
+        executor.submit(self.send, reader, heartbeat)
+
+    def run(self):
+        mode = (
+            f"coalescing window {self.coalesce_window * 1000:.0f}ms"
+            if self.coalesce_window else "no coalescing"
+        )
+        print(f"--- {len(self.readers)} readers at {self.rate}/s for "
+              f"{self.duration:.0f}s, {self.workers} workers, {mode} ---")
+        period = 1.0 / self.rate
+        start = time.perf_counter()
+        end = start + self.duration
+        # (due_time, seq, kind, reader_index); readers are phase-shifted so
+        # ticks spread evenly across each period instead of arriving in bursts
+        events = [
+            (start + period * i / len(self.readers), i, "tick", i)
+            for i in range(len(self.readers))
+        ]
+        heapq.heapify(events)
+        seq = len(events)
+        next_report = start + REPORT_INTERVAL
+        last_ok = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while events:
+                due, event_seq, kind, index = heapq.heappop(events)
+                if due >= end:
+                    break
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                now = time.perf_counter()
+                reader = self.readers[index]
+
+                if kind == "tick":
+                    self.ticks += 1
+                    heartbeat = reader.advance()
+                    heapq.heappush(events, (due + period, seq, "tick", index))
+                    seq += 1
+                    if reader.pending is not None:
+                        self.superseded += 1  # Only the newest position counts
+                        reader.pending = None
+                    if now - reader.last_sent >= self.coalesce_window:
+                        reader.flush_seq = None  # Its queued flush is stale
+                        self.dispatch(executor, reader, heartbeat, now)
+                    else:
+                        reader.pending = heartbeat
+                        if reader.flush_seq is None:
+                            reader.flush_seq = seq
+                            flush_at = reader.last_sent + self.coalesce_window
+                            heapq.heappush(events, (flush_at, seq, "flush", index))
+                            seq += 1
+                elif event_seq == reader.flush_seq:
+                    reader.flush_seq = None
+                    if reader.pending is not None:
+                        heartbeat, reader.pending = reader.pending, None
+                        self.dispatch(executor, reader, heartbeat, now)
+
+                if now >= next_report:
+                    with self.lock:
+                        ok, interval = self.ok, self.interval_histogram
+                        self.interval_histogram = LatencyHistogram()
+                    print(f"  [{now - start:6.1f}s] {(ok - last_ok) / REPORT_INTERVAL:8.0f} "
+                          f"writes/s, p95 {interval.percentile(95) * 1000:.1f}ms, "
+                          f"errors {self.errors}")
+                    last_ok = ok
+                    next_report += REPORT_INTERVAL
+        elapsed = time.perf_counter() - start
+        return self.summary(elapsed)
+
+    def summary(self, elapsed):
+        attempted = self.ok + self.errors
+        return {
+            "elapsed_seconds": elapsed,
+            "ticks": self.ticks,
+            "sent": self.sent,
+            "ok": self.ok,
+            "errors": self.errors,
+            "error_rate": self.errors / attempted if attempted else 0.0,
+            "superseded": self.superseded,
+            "backlog_drops": self.backlog_drops,
+            "writes_per_second": self.ok / elapsed if elapsed else 0.0,
+            "p50_ms": self.histogram.percentile(50) * 1000,
+            "p95_ms": self.histogram.percentile(95) * 1000,
+            "p99_ms": self.histogram.percentile(99) * 1000,
+        }
+
+
+def print_summary(result):
+    print("\n--- Heartbeat results ---")
+    print(f"Reader ticks: {result['ticks']}")
+    print(f"Heartbeats sent: {result['sent']} "
+          f"(superseded by coalescing: {result['superseded']}, "
+          f"dropped by saturated client: {result['backlog_drops']})")
+    print(f"Sustained writes/sec: {result['writes_per_second']:.1f}")
+    print(f"Errors: {result['errors']} ({result['error_rate'] * 100:.2f}%)")
+    print(f"Latency p50/p95/p99: {result['p50_ms']:.1f} / "
+          f"{result['p95_ms']:.1f} / {result['p99_ms']:.1f} ms")
+
+
+def main():
+    workers = get_flag_value("--workers", DEFAULT_WORKERS, int)
+    settings = {
+        "readers": get_flag_value("--readers", DEFAULT_READERS, int),
+        "rate": get_flag_value("--rate", DEFAULT_RATE, float),
+        "duration": get_flag_value("--duration", DEFAULT_DURATION, float),
+        "workers": workers,
+        "coalesce_window": get_flag_value("--coalesce-ms", 0.0, float) / 1000,
+        "seed": get_flag_value("--seed", 0, int),
+    }
+    # A zero rate has no heartbeat period and a negative one runs forever
+    for flag in ("rate", "duration"):
+        if not 0 < settings[flag] < float("inf"):
+            print(f"Invalid value for --{flag}: {settings[flag]:g} "
+                  f"(expected a positive number)")
+            sys.exit(2)
+    if min(workers, settings["readers"]) < 1:
+        print("--workers and --readers must be at least 1")
+        sys.exit(2)
+    fe_prep.configure_from_argv()
+    api_client.configure(pool_size=workers)
+    try:
+        stream_ids = get_flag_value("--stream-ids")
+        if stream_ids:
+            pool_id = get_flag_value("--pool-id")
+            if not pool_id:
+                print("--stream-ids also needs --pool-id")
+                sys.exit(2)
+            streams = load_reading_streams(stream_ids.split(","))
+        else:
+            pool_id, streams = seed_reading_streams(
+                get_flag_value("--streams", DEFAULT_STREAMS, int),
+                get_flag_value("--drops-per-stream", DEFAULT_DROPS_PER_STREAM, int),
+            )
+    except requests.exceptions.RequestException as e:
+        print(f"\n!!! Error occurred while seeding: {e}")
+        sys.exit(1)
+    # Readers pick streams at random and step through their drops
+    streams = [(stream_id, drops) for stream_id, drops in streams if drops]
+    if not streams:
+        print("No streams with drops to read; check --stream-ids, "
+              "--streams and --drops-per-stream")
+        sys.exit(2)
+    simulator = HeartbeatSimulator(pool_id, streams, **settings)
+    result = simulator.run()
+    print_summary(result)
+    sys.exit(1 if result["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import csv
+import sys
+import time
+
+import requests
+
+import environment
+import streaming
+import test_10_FE_prep as fe_prep
+from cli import get_flag_value, positive_int_list
+from metrics import LatencyHistogram
+
+# --- Configuration ---
+DEFAULT_DROPS = 100_000
+DEFAULT_LIMITS = [10, 50, 100]
+DEFAULT_DEPTH_BANDS = 20
+CHART_WIDTH = 40
+
+
+def build_stream(drop_count):
+    """Creates a pool and one stream holding drop_count drops, in order."""
+    print(f"--- Building a {drop_count}-drop stream ---")
+    pool_id = fe_prep.create_pool(
+        "PAGINATION_BENCH", "Deep pagination benchmark", verbose=False
+    )
+    progress = fe_prep.SeedProgress(1, drop_count)
+    stream_id = fe_prep.seed_stream(
+        pool_id, "Pagination Bench", drop_count, fe_prep.tuned_batch_size(),
+        progress
+    )
+    progress.report()
+    print(f"Stream ready: {stream_id}\n")
+    return stream_id
+
+
+def walk_stream(stream_id, limit):
+    """Pages through a whole stream with next_placement_id cursors.
+
+    Pages are parsed as they arrive, so client memory stays flat for any
+    limit. Returns (pages, walked, issues): pages is a list of (depth,
+    latency) where depth is the position of the page's first drop and
+    latency runs to its last byte, walked is the number of drops seen,
+    and issues lists every has_more/total_count/linkage inconsistency
+    found on the way.
+    """
+    pages = []
+    issues = []
+    seen_drop_ids = set()
+    total_count = None
+    cursor = None
+    prev_placement_id = None
+    depth = 0
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["from_placement_id"] = cursor
+        started = time.perf_counter()
+        page = streaming.get_page(
+            f"{environment.API_V1_URL}/streams/{stream_id}/drops", params=params
+        )
+        page_depth = depth
+        last = None
+        with page:
+            for drop in page:
+                if last is None and cursor and drop["placement_id"] != cursor:
+                    issues.append(
+                        f"depth {depth}: page does not start at cursor {cursor}"
+                    )
+                if drop["drop_id"] in seen_drop_ids:
+                    issues.append(f"depth {depth}: drop {drop['drop_id']} repeated")
+                seen_drop_ids.add(drop["drop_id"])
+                if drop.get("prev_placement_id") != prev_placement_id:
+                    issues.append(
+                        f"placement {drop['placement_id']}: prev_placement_id "
+                        f"{drop.get('prev_placement_id')} != {prev_placement_id}"
+                    )
+                prev_placement_id = drop["placement_id"]
+                depth += 1
+                last = drop
+        # Until the last byte: drops are checked as they arrive
+        latency = time.perf_counter() - started
+        pages.append((page_depth, latency))
+        payload = page.fields
+        count = depth - page_depth
+        if cursor and last is None:
+            issues.append(f"depth {depth}: page does not start at cursor {cursor}")
+
+        if total_count is None:
+            total_count = payload.get("total_count")
+        elif payload.get("total_count") != total_count:
+            issues.append(
+                f"depth {page_depth}: total_count changed "
+                f"{total_count} -> {payload.get('total_count')}"
+            )
+        next_cursor = last.get("next_placement_id") if last else None
+        has_more = payload.get("has_more")
+        if has_more and not next_cursor:
+            issues.append(f"depth {depth}: has_more is true but no next cursor")
+        if not has_more and next_cursor:
+            issues.append(f"depth {depth}: has_more is false before the end")
+        if has_more and count < limit:
+            issues.append(f"depth {depth}: short page of {count} with has_more")
+        if not has_more or not next_cursor:
+            break
+        cursor = next_cursor
+
+    if total_count is not None and depth != total_count:
+        issues.append(f"walked {depth} drops but total_count is {total_count}")
+    return pages, depth, issues
+
+
+def band_histograms(pages, total, bands):
+    """Groups page latencies into equal-width cursor depth bands."""
+    band_width = max(-(-total // bands), 1)
+    histograms = {}
+    for depth, latency in pages:
+        band = depth // band_width
+        histograms.setdefault(band, LatencyHistogram()).record(latency)
+    return band_width, histograms
+
+
+def print_depth_chart(limit, pages, total, bands):
+    """Prints p50/p99 page latency against cursor depth as a text chart."""
+    band_width, histograms = band_histograms(pages, total, bands)
+    worst = max((h.percentile(50) for h in histograms.values()), default=0)
+    print(f"\nlimit={limit}: {len(pages)} pages")
+    print(f"{'depth':>17}{'pages':>7}{'p50 ms':>9}{'p99 ms':>9}  p50")
+    for band in sorted(histograms):
+        histogram = histograms[band]
+        p50 = histogram.percentile(50)
+        bar = "#" * (round(p50 / worst * CHART_WIDTH) if worst else 0)
+        start = band * band_width
+        print(f"{start:>8}-{start + band_width - 1:<8}{histogram.total:>7}"
+              f"{p50 * 1000:>9.2f}{histogram.percentile(99) * 1000:>9.2f}  {bar}")
+
+
+def run_pagination_benchmark(stream_id, limits, bands, csv_path=None):
+    """Walks the stream once per limit and reports latency vs. depth."""
+    rows = []
+    all_issues = []
+    for limit in limits:
+        print(f"--- Walking stream {stream_id} with limit={limit} ---")
+        started = time.perf_counter()
+        pages, walked, issues = walk_stream(stream_id, limit)
+        elapsed = time.perf_counter() - started
+        print(f"Walked {walked} drops in {len(pages)} pages in {elapsed:.2f}s "
+              f"({len(pages) / elapsed if elapsed else 0:.0f} pages/s)")
+        print_depth_chart(limit, pages, max(walked, 1), bands)
+        rows.extend(
+            (limit, page, depth, latency)
+            for page, (depth, latency) in enumerate(pages)
+        )
+        all_issues.extend(f"limit={limit}: {issue}" for issue in issues)
+        print()
+
+    if csv_path:
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["limit", "page", "depth", "latency_ms"])
+            for limit, page, depth, latency in rows:
+                writer.writerow([limit, page, depth, f"{latency * 1000:.3f}"])
+        print(f"Page latencies written to {csv_path}")
+
+    if all_issues:
+        print(f"!!! {len(all_issues)} pagination consistency issues !!!")
+        for issue in all_issues[:50]:
+            print(f"  {issue}")
+        return False
+    print("has_more/total_count and placement links consistent on every page.")
+    return True
+
+
+def main():
+    fe_prep.configure_from_argv()
+    limits = get_flag_value("--limits", DEFAULT_LIMITS, positive_int_list)
+    bands = get_flag_value("--bands", DEFAULT_DEPTH_BANDS, int)
+    try:
+        stream_id = get_flag_value("--stream-id")
+        if not stream_id:
+            stream_id = build_stream(
+                get_flag_value("--drops", DEFAULT_DROPS, int)
+            )
+        ok = run_pagination_benchmark(
+            stream_id, limits, bands, get_flag_value("--csv")
+        )
+    except requests.exceptions.RequestException as e:
+        print(f"\n!!! Error occurred: {e}")
+        sys.exit(1)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
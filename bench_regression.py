@@ -0,0 +1,371 @@
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+import api_client
+import environment
+import metrics
+import test_10_FE_prep as fe_prep
+from bench_pagination import walk_stream
+from cli import get_flag_value
+
+# --- Configuration ---
+BASELINE_DIR = "perf_baselines"
+DEFAULT_SEED = 1234
+DEFAULT_WORKERS = 4
+DEFAULT_REPEAT = 3  # runs per invocation; the median of each metric is kept
+DEFAULT_P95_THRESHOLD = 25.0  # % p95 increase allowed per endpoint
+DEFAULT_THROUGHPUT_THRESHOLD = 20.0  # % throughput drop allowed per scenario
+MIN_P95_DELTA_MS = 2.0  # smaller p95 increases are treated as noise
+# Bump when what the recorded metrics measure changes; older baselines are
+# then refused. 2: streamed GETs are timed to the end of the body.
+METRICS_VERSION = 2
+
+# Fixed scenario sizes; changing them invalidates stored baselines
+SCENARIO_SIZES = {
+    "pools": 10,
+    "streams_per_pool": 2,
+    "drops_per_stream": 400,
+    "drop_batch_size": 50,
+    "page_limit": 20,
+    "users": 50,
+    "progress_updates": 2000,
+    "river_reads": 1000,
+}
+SCENARIOS = ["create", "bulk_add_drops", "paginate", "progress", "river"]
+
+
+def server_key():
+    """The server a baseline belongs to: its base URL, or "local" for the
+    --local stand-in, which listens on a new port every run."""
+    return "local" if "--local" in sys.argv else environment.BASE_URL
+
+
+def get_commit_hash():
+    response = api_client.get(f"{environment.BASE_URL}/health")
+    response.raise_for_status()
+    return response.json().get("commit_hash") or "unknown"
+
+
+class RegressionSuite:
+    """Runs the fixed scenario set and collects per-endpoint latency.
+
+    Every scenario performs the same requests in the same order for a given
+    seed, so runs against different server builds are comparable.
+    """
+
+    def __init__(self, seed=DEFAULT_SEED, workers=DEFAULT_WORKERS):
+        self.seed = seed
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.recorder = metrics.MetricsRecorder()
+        self.scenarios = {}
+        self.pool_ids = []
+        self.stream_ids = []
+        self.placements = []  # (stream_id, drop_id, placement_id)
+        run_id = uuid.uuid4().hex[:8]
+        self.users = [
+            f"regression_user_{run_id}_{i}"
+            for i in range(SCENARIO_SIZES["users"])
+        ]
+
+    def record_request(self, method, url, response, elapsed, streamed_bytes=None):
+        """api_client request hook, registered only while this suite runs."""
+        self.recorder.record_request(
+            method, url, response, elapsed, streamed_bytes
+        )
+
+    def timed_scenario(self, name, tasks):
+        """Runs (func, *args) tasks on the worker pool and records throughput."""
+        print(f"--- Scenario: {name} ({len(tasks)} operations) ---")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(lambda task: task[0](*task[1:]), tasks))
+        elapsed = time.perf_counter() - started
+        self.scenarios[name] = {
+            "operations": len(tasks),
+            "elapsed_seconds": elapsed,
+            "throughput": len(tasks) / elapsed if elapsed else 0.0,
+        }
+        return results
+
+    def create_pool_with_streams(self, index):
+        pool_id = fe_prep.create_pool(
+            f"REGRESSION_{index}", "Regression suite pool", verbose=False
+        )
+        stream_ids = [
+            fe_prep.create_stream(
+                pool_id, f"Regression Stream {index}.{s}", "Regression suite",
+                verbose=False
+            )
+            for s in range(SCENARIO_SIZES["streams_per_pool"])
+        ]
+        return pool_id, stream_ids
+
+    def add_drop_batch(self, stream_id, start, end):
+        drop_ids, placement_ids = fe_prep.add_drops_to_stream(
+            stream_id, fe_prep.synthetic_drops(stream_id, start, end),
+            verbose=False, chunk_size=SCENARIO_SIZES["drop_batch_size"],
+        )
+        return [(stream_id, d, p) for d, p in zip(drop_ids, placement_ids)]
+
+    def add_stream_drops(self, stream_id):
+        """Appends a stream's drops batch by batch, keeping their order."""
+        size = SCENARIO_SIZES["drops_per_stream"]
+        batch = SCENARIO_SIZES["drop_batch_size"]
+        placements = []
+        for start in range(0, size, batch):
+            placements.extend(
+                self.add_drop_batch(stream_id, start, min(start + batch, size))
+            )
+        return placements
+
+    def paginate(self, stream_id):
+        _, walked, issues = walk_stream(stream_id, SCENARIO_SIZES["page_limit"])
+        if walked != SCENARIO_SIZES["drops_per_stream"] or issues:
+            raise RuntimeError(
+                f"Stream {stream_id}: walked {walked} drops, issues: {issues[:3]}"
+            )
+
+    def update_progress(self, pool_id, user_id, stream_id, drop_id, placement_id):
+        fe_prep.update_user_progress(
+            pool_id, stream_id, drop_id, placement_id, user_id=user_id
+        )
+
+    def get_river(self, user_id):
+        response = api_client.get(
+            f"{environment.API_V1_URL}/user/river",
+            params={"limit": 30},
+            headers={"X-User-Id": user_id}
+        )
+        response.raise_for_status()
+
+    def run(self):
+        api_client.add_request_hook(self.record_request)
+        try:
+            self.run_scenarios()
+        finally:
+            api_client.remove_request_hook(self.record_request)
+
+    def run_scenarios(self):
+        created = self.timed_scenario("create", [
+            (self.create_pool_with_streams, i)
+            for i in range(SCENARIO_SIZES["pools"])
+        ])
+        pool_by_stream = {}
+        for pool_id, stream_ids in created:
+            self.pool_ids.append(pool_id)
+            self.stream_ids.extend(stream_ids)
+            pool_by_stream.update({s: pool_id for s in stream_ids})
+
+        for placements in self.timed_scenario("bulk_add_drops", [
+            (self.add_stream_drops, stream_id) for stream_id in self.stream_ids
+        ]):
+            self.placements.extend(placements)
+
+        self.timed_scenario("paginate", [
+            (self.paginate, stream_id) for stream_id in self.stream_ids
+        ])
+
+        progress_tasks = []
+        for _ in range(SCENARIO_SIZES["progress_updates"]):
+            stream_id, drop_id, placement_id = self.rng.choice(self.placements)
+            progress_tasks.append((
+                self.update_progress, pool_by_stream[stream_id],
+                self.rng.choice(self.users), stream_id, drop_id, placement_id,
+            ))
+        self.timed_scenario("progress", progress_tasks)
+
+        self.timed_scenario("river", [
+            (self.get_river, self.rng.choice(self.users))
+            for _ in range(SCENARIO_SIZES["river_reads"])
+        ])
+
+
+def combine_runs(suites, commit_hash, seed, workers):
+    """Takes the median of every metric across repeated suite runs.
+
+    Errors are summed, so a failure in any run still shows up.
+    """
+    reports = [suite.recorder.report()["endpoints"] for suite in suites]
+    endpoints = {}
+    for key in sorted(set().union(*reports)):
+        rows = [report[key] for report in reports if key in report]
+        endpoints[key] = {
+            field: statistics.median(row[field] for row in rows)
+            for field in rows[0] if field not in ("statuses", "errors")
+        }
+        endpoints[key]["errors"] = sum(row["errors"] for row in rows)
+    scenarios = {
+        name: {
+            field: statistics.median(suite.scenarios[name][field] for suite in suites)
+            for field in suites[0].scenarios[name]
+        }
+        for name in SCENARIOS
+    }
+    return {
+        "commit_hash": commit_hash,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "server": server_key(),
+        "base_url": environment.BASE_URL,
+        "metrics_version": METRICS_VERSION,
+        "seed": seed,
+        "workers": workers,
+        "repeat": len(suites),
+        "sizes": SCENARIO_SIZES,
+        "scenarios": scenarios,
+        "endpoints": endpoints,
+    }
+
+
+# --- Baselines ---
+def safe_name(text):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in text)
+
+
+def baseline_dir(server):
+    """Baselines are kept per server, so two servers never mix."""
+    return os.path.join(BASELINE_DIR, safe_name(server))
+
+
+def baseline_path(commit_hash, server):
+    return os.path.join(baseline_dir(server), f"{safe_name(commit_hash)}.json")
+
+
+def save_baseline(results):
+    os.makedirs(baseline_dir(results["server"]), exist_ok=True)
+    path = baseline_path(results["commit_hash"], results["server"])
+    with open(path, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"\nBaseline for commit {results['commit_hash']} written to {path}")
+
+
+def load_baseline(server, commit_hash=None):
+    """Loads a server's baseline for a commit, or its most recent one."""
+    directory = baseline_dir(server)
+    if commit_hash:
+        names = [os.path.basename(baseline_path(commit_hash, server))]
+    elif os.path.isdir(directory):
+        names = [name for name in os.listdir(directory) if name.endswith(".json")]
+    else:
+        names = []
+    baselines = []
+    for name in names:
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            with open(path) as f:
+                baseline = json.load(f)
+            if baseline.get("server") == server:
+                baselines.append(baseline)
+    return max(baselines, key=lambda b: b["recorded_at"], default=None)
+
+
+def find_regressions(baseline, current, p95_threshold, throughput_threshold):
+    """Prints the per-endpoint and per-scenario diff; returns regressions."""
+    regressions = []
+    print(f"\n--- Commit {current['commit_hash']} vs baseline "
+          f"{baseline['commit_hash']} ({baseline['recorded_at']}) ---")
+    print(f"{'endpoint':<42}{'p95 ms':>18}{'change':>9}")
+    old_endpoints, new_endpoints = baseline["endpoints"], current["endpoints"]
+    for key in sorted(set(old_endpoints) | set(new_endpoints)):
+        if key not in old_endpoints or key not in new_endpoints:
+            side = "baseline" if key not in old_endpoints else "current run"
+            print(f"{key:<42}  (missing from {side})")
+            continue
+        old, new = old_endpoints[key]["p95_ms"], new_endpoints[key]["p95_ms"]
+        change = (new - old) / old * 100 if old else 0.0
+        regressed = change > p95_threshold and new - old >= MIN_P95_DELTA_MS
+        print(f"{key:<42}{old:>8.2f} -> {new:<8.2f}{change:>+8.1f}%"
+              + ("  REGRESSED" if regressed else ""))
+        if regressed:
+            regressions.append(f"{key}: p95 {old:.2f}ms -> {new:.2f}ms ({change:+.1f}%)")
+        if new_endpoints[key]["errors"]:
+            regressions.append(f"{key}: {new_endpoints[key]['errors']} errors")
+
+    print(f"\n{'scenario':<42}{'ops/s':>18}{'change':>9}")
+    for name in SCENARIOS:
+        old = baseline["scenarios"].get(name, {}).get("throughput")
+        new = current["scenarios"].get(name, {}).get("throughput")
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        regressed = -change > throughput_threshold
+        print(f"{name:<42}{old:>8.1f} -> {new:<8.1f}{change:>+8.1f}%"
+              + ("  REGRESSED" if regressed else ""))
+        if regressed:
+            regressions.append(
+                f"{name}: throughput {old:.1f} -> {new:.1f} ops/s ({change:+.1f}%)"
+            )
+    return regressions
+
+
+def main():
+    fe_prep.configure_from_argv()
+    workers = get_flag_value("--workers", DEFAULT_WORKERS, int)
+    seed = get_flag_value("--seed", DEFAULT_SEED, int)
+    repeat = get_flag_value("--repeat", DEFAULT_REPEAT, int)
+    api_client.configure(pool_size=workers)
+    try:
+        commit_hash = get_commit_hash()
+        print(f"Server commit: {commit_hash}\n")
+        saving = "--save" in sys.argv
+        existing = baseline_path(commit_hash, server_key())
+        if saving and os.path.exists(existing) and "--force" not in sys.argv:
+            print(f"A baseline for this commit already exists at {existing}; "
+                  f"pass --force to overwrite it.")
+            sys.exit(2)
+        suites = []
+        for run in range(repeat):
+            print(f"=== Run {run + 1}/{repeat} ===")
+            suite = RegressionSuite(seed=seed, workers=workers)
+            suite.run()
+            suites.append(suite)
+    except (requests.exceptions.RequestException, RuntimeError) as e:
+        print(f"\n!!! Regression suite failed: {e}")
+        sys.exit(1)
+    current = combine_runs(suites, commit_hash, seed, workers)
+
+    # A saved run is the new reference, so it is not compared against anything
+    if saving:
+        save_baseline(current)
+        sys.exit(0)
+    baseline = load_baseline(server_key(), get_flag_value("--baseline"))
+    if baseline is None:
+        print(f"\nNo stored baseline for {server_key()} to compare against.")
+        save_baseline(current)
+        sys.exit(0)
+    if (baseline["sizes"], baseline["seed"], baseline["workers"]) != (
+        SCENARIO_SIZES, seed, workers
+    ):
+        print("\nBaseline was recorded with different scenario sizes, seed or "
+              "workers; record a new one with --save.")
+        sys.exit(2)
+    if baseline.get("metrics_version", 1) != METRICS_VERSION:
+        print("\nBaseline was recorded by an older harness that timed "
+              "requests differently; record a new one with --save.")
+        sys.exit(2)
+
+    regressions = find_regressions(
+        baseline,
+        current,
+        get_flag_value("--p95-threshold", DEFAULT_P95_THRESHOLD, float),
+        get_flag_value("--throughput-threshold", DEFAULT_THROUGHPUT_THRESHOLD, float),
+    )
+    if regressions:
+        print(f"\n!!! {len(regressions)} regression(s):")
+        for regression in regressions:
+            print(f"  - {regression}")
+        sys.exit(1)
+    print("\nNo regressions beyond thresholds.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+import requests
+
+import api_client
+import environment
+import test_10_FE_prep as fe_prep
+from bench_heartbeat import seed_reading_streams
+from cli import get_flag_value
+from metrics import LatencyHistogram
+
+# --- Configuration ---
+DEFAULT_USERS = 20
+DEFAULT_READERS = 8
+DEFAULT_WRITERS = 8
+DEFAULT_DURATION = 10.0  # seconds per phase
+DEFAULT_STREAMS = 40  # more than the 30-record river cap
+DEFAULT_DROPS_PER_STREAM = 10
+RIVER_LIMIT = 30
+RECENT_WRITES_KEPT = 64  # per user, for deciding what a read may see
+
+
+def parse_timestamp(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def get_river(user_id):
+    """Fetches a user's river records."""
+    response = api_client.get(
+        f"{environment.API_V1_URL}/user/river",
+        params={"limit": RIVER_LIMIT},
+        headers={"X-User-Id": user_id}
+    )
+    response.raise_for_status()
+    return response.json().get("records", [])
+
+
+class RiverContention:
+    """Readers poll /user/river while writers post progress for the same users.
+
+    Each user is owned by exactly one writer thread, so every user's writes
+    are sequential and numbered. A read that starts after a write completed
+    must contain that stream, and its newest record must be that stream or
+    one whose write overlapped the read.
+    """
+
+    def __init__(self, pool_id, streams, users, readers, writers, seed=0):
+        self.pool_id = pool_id
+        self.streams = streams
+        run_id = uuid.uuid4().hex[:8]
+        self.users = [f"river_user_{run_id}_{i}" for i in range(users)]
+        self.readers = readers
+        # Each writer owns a disjoint slice of the users, so no more than
+        # one writer per user
+        self.writers = min(writers, users)
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.last_written = {}  # user_id -> stream_id of last completed write
+        self.write_seq = {}  # user_id -> number of writes started
+        self.recent_writes = {}  # user_id -> deque of (seq, stream_id)
+        self.in_flight = set()  # user_ids with a write in progress
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.read_histogram = LatencyHistogram()
+        self.write_histogram = LatencyHistogram()
+        self.read_errors = 0
+        self.write_errors = 0
+        self.violations = []
+
+    def check_read(self, user_id, records, expected_stream, allowed_newest):
+        problems = []
+        if len(records) > RIVER_LIMIT:
+            problems.append(f"{len(records)} records exceeds cap {RIVER_LIMIT}")
+        timestamps = [parse_timestamp(r["updated_at"]) for r in records]
+        if any(a < b for a, b in zip(timestamps, timestamps[1:])):
+            problems.append("records are not ordered newest updated_at first")
+        if expected_stream:
+            stream_ids = [r["stream_id"] for r in records]
+            if expected_stream not in stream_ids:
+                problems.append(f"just-touched stream {expected_stream} missing")
+            elif stream_ids[0] not in allowed_newest:
+                problems.append(
+                    f"newest record is {stream_ids[0]}, expected {expected_stream}"
+                )
+        return [f"{user_id}: {problem}" for problem in problems]
+
+    def reader_loop(self, rng, stop):
+        while not stop.is_set():
+            user_id = rng.choice(self.users)
+            with self.lock:
+                expected = self.last_written.get(user_id)
+                # Any write overlapping the read may legitimately be newest
+                first_seq = self.write_seq.get(user_id, 0)
+                if user_id in self.in_flight:
+                    first_seq -= 1
+            started = time.perf_counter()
+            try:
+                records = get_river(user_id)
+            except requests.exceptions.RequestException:
+                with self.lock:
+                    self.read_errors += 1
+                continue
+            latency = time.perf_counter() - started
+            with self.lock:
+                allowed_newest = {expected} | {
+                    stream_id
+                    for seq, stream_id in self.recent_writes.get(user_id, ())
+                    if seq >= first_seq
+                }
+                self.read_histogram.record(latency)
+            problems = self.check_read(
+                user_id, records, expected, allowed_newest
+            )
+            if problems:
+                with self.lock:
+                    self.violations.extend(problems)
+
+    def writer_loop(self, rng, users, stop):
+        if not users:
+            return
+        while not stop.is_set():
+            for user_id in users:
+                if stop.is_set():
+                    return
+                stream_id, drops = rng.choice(self.streams)
+                drop_id, placement_id = rng.choice(drops)
+                with self.lock:
+                    seq = self.write_seq.get(user_id, 0)
+                    self.write_seq[user_id] = seq + 1
+                    self.recent_writes.setdefault(
+                        user_id, deque(maxlen=RECENT_WRITES_KEPT)
+                    ).append((seq, stream_id))
+                    self.in_flight.add(user_id)
+                started = time.perf_counter()
+                try:
+                    fe_prep.update_user_progress(
+                        self.pool_id, stream_id, drop_id, placement_id,
+                        user_id=user_id,
+                    )
+                    failed = False
+                except requests.exceptions.RequestException:
+                    failed = True
+                latency = time.perf_counter() - started
+                with self.lock:
+                    self.in_flight.discard(user_id)
+                    if failed:
+                        self.write_errors += 1
+                    else:
+                        self.last_written[user_id] = stream_id
+                        self.write_histogram.record(latency)
+
+    def run_phase(self, name, duration, with_writers):
+        print(f"--- {name}: {self.readers} readers"
+              f"{f', {self.writers} writers' if with_writers else ''} "
+              f"for {duration:.0f}s ---")
+        self.reset_counters()
+        stop = threading.Event()
+        threads = [
+            threading.Thread(
+                target=self.reader_loop,
+                args=(random.Random(self.seed + i), stop),
+            )
+            for i in range(self.readers)
+        ]
+        if with_writers:
+            threads += [
+                threading.Thread(
+                    target=self.writer_loop,
+                    args=(
+                        random.Random(self.seed + 1000 + i),
+                        self.users[i::self.writers],
+                        stop,
+                    ),
+                )
+                for i in range(self.writers)
+            ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            "reads": self.read_histogram.total,
+            "reads_per_second": self.read_histogram.total / elapsed,
+            "read_errors": self.read_errors,
+            "read_p50_ms": self.read_histogram.percentile(50) * 1000,
+            "read_p95_ms": self.read_histogram.percentile(95) * 1000,
+            "read_p99_ms": self.read_histogram.percentile(99) * 1000,
+            "writes": self.write_histogram.total,
+            "writes_per_second": self.write_histogram.total / elapsed,
+            "write_errors": self.write_errors,
+            "write_p95_ms": self.write_histogram.percentile(95) * 1000,
+            "violations": list(self.violations),
+        }
+
+
+def print_phase(result):
+    print(f"Reads: {result['reads']} ({result['reads_per_second']:.0f}/s), "
+          f"errors {result['read_errors']}, p50/p95/p99 "
+          f"{result['read_p50_ms']:.1f}/{result['read_p95_ms']:.1f}/"
+          f"{result['read_p99_ms']:.1f} ms")
+    if result["writes"] or result["write_errors"]:
+        print(f"Writes: {result['writes']} ({result['writes_per_second']:.0f}/s), "
+              f"errors {result['write_errors']}, p95 {result['write_p95_ms']:.1f} ms")
+    print(f"Consistency violations: {len(result['violations'])}\n")
+
+
+def run_river_benchmark(contention, duration):
+    """Measures river reads alone, then under concurrent progress writes."""
+    # Give every user a history first so readers always have something to check
+    for user_id in contention.users:
+        stream_id, drops = contention.streams[0]
+        fe_prep.update_user_progress(
+            contention.pool_id, stream_id, *drops[0], user_id=user_id
+        )
+        contention.last_written[user_id] = stream_id
+
+    baseline = contention.run_phase("Baseline (reads only)", duration, False)
+    print_phase(baseline)
+    loaded = contention.run_phase("Contention (reads + writes)", duration, True)
+    print_phase(loaded)
+
+    if baseline["read_p95_ms"]:
+        slowdown = loaded["read_p95_ms"] / baseline["read_p95_ms"]
+        print(f"Read p95 under write load: {slowdown:.2f}x baseline")
+    violations = baseline["violations"] + loaded["violations"]
+    for violation in violations[:20]:
+        print(f"  {violation}")
+    return not violations
+
+
+def main():
+    fe_prep.configure_from_argv()
+    readers = get_flag_value("--readers", DEFAULT_READERS, int)
+    writers = get_flag_value("--writers", DEFAULT_WRITERS, int)
+    users = get_flag_value("--users", DEFAULT_USERS, int)
+    if users < 1:
+        print("--users must be at least 1")
+        sys.exit(2)
+    if writers > users:
+        print(f"Only {users} users: running {users} writers instead of "
+              f"{writers}.\n")
+        writers = users
+    api_client.configure(pool_size=readers + writers)
+    try:
+        pool_id, streams = seed_reading_streams(
+            get_flag_value("--streams", DEFAULT_STREAMS, int),
+            get_flag_value("--drops-per-stream", DEFAULT_DROPS_PER_STREAM, int),
+        )
+        contention = RiverContention(
+            pool_id, streams,
+            users=users,
+            readers=readers,
+            writers=writers,
+            seed=get_flag_value("--seed", 0, int),
+        )
+        ok = run_river_benchmark(
+            contention, get_flag_value("--duration", DEFAULT_DURATION, float)
+        )
+    except requests.exceptions.RequestException as e:
+        print(f"\n!!! Error occurred: {e}")
+        sys.exit(1)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import time
+
+# --- Configuration ---
+DEFAULT_FSYNC_EVERY = 100  # entries between fsyncs
+DEFAULT_FSYNC_INTERVAL = 1.0  # max seconds an entry may sit un-synced
+DEFAULT_COMPACT_EVERY = 50_000  # entries appended before compacting
+
+
+class CheckpointJournal:
+    """Append-only JSONL journal of state changes with fsync batching.
+
+    Each line is one operation on a dict of state:
+
+        {"op": "set", "data": {...}}                top-level field updates
+        {"op": "extend", "key": k, "items": [...]}  append to a list field
+        {"op": "merge", "key": k, "data": {...}}    update a dict field
+        {"op": "snapshot", "data": {...}}           full state (compaction)
+
+    Saving a step costs one short append instead of rewriting everything.
+    A crash can only tear the final line; replay stops at the last complete
+    entry and the torn tail is truncated before new entries are written.
+    Compaction rewrites the journal as a single snapshot via an atomic
+    rename, so a crash mid-compaction leaves the old journal intact.
+    """
+
+    def __init__(self, path, fsync_every=DEFAULT_FSYNC_EVERY,
+                 fsync_interval=DEFAULT_FSYNC_INTERVAL,
+                 compact_every=DEFAULT_COMPACT_EVERY):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.lock = threading.RLock()
+        self.state = {}
+        self.entries_since_compact = 0
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+        self.discarded_bytes = 0
+        self._replay()
+        self.file = open(self.path, "a", encoding="utf-8")
+        if self.entries_since_compact >= self.compact_every:
+            self.compact()
+
+    # --- Replay ---
+    def _apply(self, entry):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Journal entry is not an object: {entry!r}")
+        op = entry["op"]
+        if op == "snapshot":
+            self.state = dict(entry["data"])
+        elif op == "set":
+            self.state.update(entry["data"])
+        elif op == "extend":
+            items = list(entry["items"])  # Checked before state changes
+            self.state.setdefault(entry["key"], []).extend(items)
+        elif op == "merge":
+            data = dict(entry["data"])
+            self.state.setdefault(entry["key"], {}).update(data)
+        else:
+            raise ValueError(f"Unknown journal op: {op}")
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        good_offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn final write
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    break  # Corrupt entry: replay stops here
+                good_offset += len(line)
+                self.entries_since_compact += 1
+        size = os.path.getsize(self.path)
+        if good_offset < size:
+            self.discarded_bytes = size - good_offset
+            with open(self.path, "r+b") as f:
+                f.truncate(good_offset)
+            print(f"Checkpoint journal {self.path}: discarded "
+                  f"{self.discarded_bytes} bytes of incomplete entries.")
+
+    # --- Writing ---
+    def _append(self, entry):
+        with self.lock:
+            self._apply(entry)
+            self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self.entries_since_compact += 1
+            self.unsynced += 1
+            if (
+                self.unsynced >= self.fsync_every
+                or time.monotonic() - self.last_sync >= self.fsync_interval
+            ):
+                self.sync()
+            if self.entries_since_compact >= self.compact_every:
+                self.compact()
+
+    def update(self, data):
+        """Sets top-level fields."""
+        self._append({"op": "set", "data": data})
+
+    def extend(self, key, items):
+        """Appends items to a list field."""
+        self._append({"op": "extend", "key": key, "items": list(items)})
+
+    def merge(self, key, data):
+        """Updates entries of a dict field."""
+        self._append({"op": "merge", "key": key, "data": data})
+
+    def sync(self):
+        """Flushes buffered entries and fsyncs them to disk."""
+        with self.lock:
+            if self.unsynced:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.unsynced = 0
+            self.last_sync = time.monotonic()
+
+    def compact(self):
+        """Rewrites the journal as one snapshot entry, atomically."""
+        with self.lock:
+            self.sync()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                snapshot = {"op": "snapshot", "data": self.state}
+                f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.file.close()
+            os.replace(tmp_path, self.path)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            if hasattr(os, "O_DIRECTORY"):
+                dir_fd = os.open(directory, os.O_DIRECTORY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            self.file = open(self.path, "a", encoding="utf-8")
+            self.entries_since_compact = 1
+
+    def close(self, compact=False):
+        with self.lock:
+            if compact and self.entries_since_compact > 1:
+                self.compact()
+            self.sync()
+            self.file.close()
+
+
+def remove_journal(path):
+    """Deletes a journal and any leftover compaction file."""
+    for candidate in (path, f"{path}.tmp"):
+        if os.path.exists(candidate):
+            os.remove(candidate)
@@ -0,0 +1,25 @@
+import sys
+
+
+def get_flag_value(flag, default=None, cast=str):
+    """Returns the value that follows a command-line flag, or the default."""
+    if flag not in sys.argv:
+        return default
+    index = sys.argv.index(flag)
+    if index + 1 >= len(sys.argv):
+        print(f"Missing value for {flag}")
+        sys.exit(2)
+    raw_value = sys.argv[index + 1]
+    try:
+        return cast(raw_value)
+    except ValueError:
+        print(f"Invalid value for {flag}: {raw_value}")
+        sys.exit(2)
+
+
+def positive_int_list(raw_value):
+    """Casts a comma-separated flag value such as "10,50,100" to ints >= 1."""
+    values = [int(v) for v in raw_value.split(",")]
+    if min(values) < 1:
+        raise ValueError(raw_value)
+    return values
@@ -0,0 +1,72 @@
+import gzip
+import zlib
+
+# Content codecs shared by the harness and the local stand-in server. gzip
+# is always available, brotli ("br") only with the optional brotli package.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# --- Configuration ---
+GZIP_LEVEL = 6  # zlib's default: most of the ratio at a fraction of level 9's CPU
+BROTLI_QUALITY = 5  # 11 is far too slow for per-request use
+MIN_COMPRESS_BYTES = 1024  # smaller bodies barely shrink and can grow
+
+DECODE_ERRORS = (OSError, EOFError, zlib.error) + (
+    (brotli.error,) if brotli else ()
+)
+
+
+def available_codecs():
+    return ["gzip", "br"] if brotli else ["gzip"]
+
+
+def check_codec(encoding):
+    """Raises ValueError unless encoding can be used here."""
+    if encoding == "br" and brotli is None:
+        raise ValueError("br needs the brotli package (pip install brotli)")
+    if encoding not in ("gzip", "br"):
+        raise ValueError(
+            f"Unknown content encoding '{encoding}', expected one of "
+            f"{', '.join(available_codecs())}"
+        )
+
+
+def compress(data, encoding):
+    check_codec(encoding)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def decompress(data, encoding):
+    check_codec(encoding)
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    return brotli.decompress(data)
+
+
+def choose_encoding(accept_encoding):
+    """Picks the codec for a response from an Accept-Encoding header.
+
+    Honours q-values (q=0 refuses a codec); among equally weighted codecs
+    the first one listed wins. Returns None for an identity response.
+    """
+    best = None
+    best_q = 0.0
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if name not in available_codecs():
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        if q > best_q:
+            best, best_q = name, q
+    return best
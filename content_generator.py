@@ -0,0 +1,210 @@
+import hashlib
+import json
+import random
+import sys
+
+from cli import get_flag_value
+
+# --- Configuration ---
+DEFAULT_MAX_BATCH_BYTES = 1_000_000  # keeps long-form batches to ~1 MB bodies
+CATEGORIES = [
+    "Wellness", "Cooking", "Environment", "Science", "Technology",
+    "History", "Arts", "Philosophy", "Travel", "Finance",
+]
+WORDS = (
+    "the of and to in is that for it as with was on be by this are from at "
+    "or an have not which but all one can their there been has more when who "
+    "will about would what so up out if into than them some time could only "
+    "other new these two may first any like now my such make over our even "
+    "most also after made many must before through back where much your way "
+    "well down should because each just those people how too little state "
+    "good very world still own see men work long here between both life being "
+    "under never day same another know while last might great old year off "
+    "come since against go came right used take three himself few house use "
+    "during without again place around however home small found thought went "
+    "say part once general high upon school every does got united left number "
+    "course war until always away something fact though water less public put "
+    "think almost hand enough far took head yet government system better set "
+    "told nothing night end why called eyes find going look asked later point "
+    "knew city next program business give group toward young days let room "
+    "mind light stream pool drop wisdom quiet breath practice bread starter "
+    "carbon ocean forest signal pattern theory memory habit garden river"
+).split()
+
+# Drop size profiles: (weight, min_words, max_words, min_images, max_images, type)
+DEFAULT_PROFILES = {
+    "note": (50, 5, 40, 0, 0, "text"),
+    "article": (35, 80, 400, 0, 2, "text"),
+    "longform": (10, 800, 3000, 1, 4, "text"),
+    "gallery": (5, 3, 20, 1, 6, "image"),
+}
+
+
+def parse_profiles(spec):
+    """Turns a --content-mix value like "note=80,longform=20" into profiles.
+
+    Only the named profiles are used, with the given weights. Returns None
+    (the default mix) when spec is empty.
+    """
+    if not spec:
+        return None
+    profiles = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_PROFILES:
+            raise ValueError(
+                f"Unknown content profile '{name}', "
+                f"expected one of {', '.join(DEFAULT_PROFILES)}"
+            )
+        try:
+            weight = float(weight or 1)
+        except ValueError:
+            weight = -1
+        if weight <= 0:
+            raise ValueError(f"Weight for '{name}' must be a positive number")
+        profiles[name] = (weight, *DEFAULT_PROFILES[name][1:])
+    return profiles
+
+
+def payload_size(item):
+    """Approximate JSON body size of one item."""
+    return len(json.dumps(item))
+
+
+class ContentGenerator:
+    """Deterministic, lazily generated StreamContent/DropContent payloads.
+
+    Every item is derived only from (seed, key, position), so any stream or
+    any slice of a stream can be regenerated on its own: a resumed or
+    parallel seeding run produces exactly the same dataset as an
+    uninterrupted one, and nothing has to be held in memory.
+    """
+
+    def __init__(self, seed=0, profiles=None):
+        self.seed = seed
+        self.profiles = profiles or DEFAULT_PROFILES
+        self.profile_names = list(self.profiles)
+        self.profile_weights = [self.profiles[n][0] for n in self.profile_names]
+
+    def profile_spec(self):
+        return ",".join(
+            f"{name}={self.profiles[name][0]:g}" for name in self.profile_names
+        )
+
+    def rng(self, *parts):
+        return random.Random(":".join(str(p) for p in (self.seed, *parts)))
+
+    def sentence(self, rng, words):
+        text = " ".join(rng.choices(WORDS, k=words))
+        return text[0].upper() + text[1:] + "."
+
+    def text(self, rng, words):
+        """Builds `words` words of text as sentences and paragraphs."""
+        sentences = []
+        remaining = words
+        while remaining > 0:
+            length = min(remaining, rng.randint(6, 24))
+            sentences.append(self.sentence(rng, length))
+            remaining -= length
+        paragraphs = [
+            " ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)
+        ]
+        return "\n\n".join(paragraphs)
+
+    def image_url(self, *parts):
+        digest = hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest()[:16]
+        return f"https://example.com/images/{digest}.jpg"
+
+    def pool_content(self, pool_key):
+        rng = self.rng("pool", pool_key)
+        return {
+            "title": self.sentence(rng, rng.randint(2, 5)).rstrip("."),
+            "description": self.sentence(rng, rng.randint(8, 20)),
+        }
+
+    def stream_content(self, stream_key):
+        rng = self.rng("stream", stream_key)
+        content = {
+            "title": self.sentence(rng, rng.randint(2, 6)).rstrip("."),
+            "description": self.sentence(rng, rng.randint(8, 25)),
+            "ai_framing": self.sentence(rng, rng.randint(10, 30)),
+            "category": rng.choice(CATEGORIES),
+        }
+        if rng.random() < 0.7:
+            content["image"] = self.image_url(self.seed, "stream", stream_key)
+        return content
+
+    def drop(self, stream_key, position):
+        rng = self.rng("drop", stream_key, position)
+        profile = rng.choices(self.profile_names, self.profile_weights)[0]
+        _, min_words, max_words, min_images, max_images, drop_type = (
+            self.profiles[profile]
+        )
+        content = {
+            "title": self.sentence(rng, rng.randint(2, 8)).rstrip("."),
+            "text": self.text(rng, rng.randint(min_words, max_words)),
+            "type": drop_type,
+        }
+        images = rng.randint(min_images, max_images)
+        if images:
+            content["images"] = [
+                self.image_url(self.seed, stream_key, position, i)
+                for i in range(images)
+            ]
+        return content
+
+    def drops(self, stream_key, start, end):
+        """Yields the drops at positions [start, end) one at a time."""
+        for position in range(start, end):
+            yield self.drop(stream_key, position)
+
+    def batch(self, stream_key, start, end, max_items,
+              max_bytes=DEFAULT_MAX_BATCH_BYTES):
+        """Returns the next batch from start: at most max_items drops and
+        about max_bytes of JSON, but always at least one drop."""
+        batch = []
+        size = 0
+        for drop in self.drops(stream_key, start, min(end, start + max_items)):
+            drop_size = payload_size(drop)
+            if batch and size + drop_size > max_bytes:
+                break
+            batch.append(drop)
+            size += drop_size
+        return batch
+
+
+def dataset_digest(generator, streams, drops_per_stream):
+    """SHA-256 over a generated dataset, to check a seed reproduces it."""
+    digest = hashlib.sha256()
+    total_bytes = 0
+    for s in range(streams):
+        key = f"0.{s}"
+        items = [generator.stream_content(key)]
+        items.extend(generator.drops(key, 0, drops_per_stream))
+        for item in items:
+            encoded = json.dumps(item, sort_keys=True).encode()
+            total_bytes += len(encoded)
+            digest.update(encoded)
+    return digest.hexdigest(), total_bytes
+
+
+def main():
+    generator = ContentGenerator(
+        get_flag_value("--seed", 0, int),
+        parse_profiles(get_flag_value("--content-mix")),
+    )
+    streams = get_flag_value("--streams", 3, int)
+    drops = get_flag_value("--drops", 100, int)
+    if "--sample" in sys.argv:
+        print(json.dumps(generator.stream_content("0.0"), indent=2))
+        for drop in generator.drops("0.0", 0, 3):
+            print(json.dumps(drop, indent=2)[:600])
+    digest, total_bytes = dataset_digest(generator, streams, drops)
+    print(f"Seed {generator.seed} ({generator.profile_spec()}): "
+          f"{streams} streams x {drops} drops, "
+          f"{total_bytes / 1024:.0f} KiB, sha256 {digest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+# The server the harness is pointed at. The entry-point scripts select it
+# (set_environment in test_01_endpoints.py and test_10_FE_prep.py); every
+# other module reads it from here, so it is right whichever script runs.
+BASE_URL = ""
+API_V1_URL = ""
+
+
+def set_base_url(base_url):
+    """Points every harness module at base_url."""
+    global BASE_URL, API_V1_URL
+    BASE_URL = base_url
+    API_V1_URL = f"{base_url}/api/v1"
@@ -0,0 +1,130 @@
+import random
+import threading
+import time
+
+import requests
+
+# --- Configuration ---
+# Responses meaning the server refused the request without processing it
+OVERLOAD_STATUSES = {429, 503}
+# Responses worth retrying when repeating the call is harmless
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_BASE_DELAY = 0.25  # seconds
+DEFAULT_MAX_DELAY = 16.0  # seconds
+DEFAULT_INITIAL_LIMIT = 4
+DEFAULT_DECREASE_FACTOR = 0.5
+
+
+def is_overload(response, error):
+    """True when the server signalled it is saturated (429/503 or a timeout)."""
+    if error is not None:
+        return isinstance(error, requests.exceptions.Timeout)
+    return response is not None and response.status_code in OVERLOAD_STATUSES
+
+
+def was_refused(response, error):
+    """True when a failed call cannot have been acted on by the server.
+
+    That is a 429/503 refusal or a connect timeout, where nothing was sent.
+    """
+    if error is not None:
+        return isinstance(error, requests.exceptions.ConnectTimeout)
+    return response is not None and response.status_code in OVERLOAD_STATUSES
+
+
+class AdaptiveLimiter:
+    """AIMD limit on the number of requests in flight.
+
+    Every successful response raises the limit by 1/limit, so it grows by
+    about one per round of requests. An overload signal halves it, but only
+    from a request sent after the previous decrease: requests already in
+    flight under the old limit belong to the same overloaded moment.
+    Callers beyond the limit wait for a free slot.
+    """
+
+    def __init__(self, initial=DEFAULT_INITIAL_LIMIT, minimum=1, maximum=64,
+                 decrease_factor=DEFAULT_DECREASE_FACTOR):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.decrease_factor = decrease_factor
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.last_decrease = float("-inf")
+        self.peak_limit = self.limit
+        self.decreases = 0
+
+    def acquire(self):
+        """Waits for a slot and returns the send time to pass to release()."""
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, sent_at, overloaded):
+        with self.condition:
+            self.in_flight -= 1
+            if overloaded:
+                if sent_at > self.last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self.last_decrease = time.monotonic()
+                    self.decreases += 1
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                self.peak_limit = max(self.peak_limit, self.limit)
+            self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            return {
+                "limit": int(self.limit),
+                "peak_limit": int(self.peak_limit),
+                "in_flight": self.in_flight,
+                "decreases": self.decreases,
+            }
+
+
+class RetryPolicy:
+    """Decides which failed calls to repeat, and how long to wait first.
+
+    Idempotent calls are retried on 429/502/503/504, timeouts and
+    connection errors. Other calls are only retried when the server
+    cannot have acted on them: a 429/503 refusal, or a failure to connect
+    at all. Waits use full jitter on an exponential backoff, and a longer
+    Retry-After from the server is honoured.
+    """
+
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 rng=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+
+    def should_retry(self, attempt, response, error, idempotent):
+        if attempt + 1 >= self.max_attempts:
+            return False
+        if was_refused(response, error):
+            return True
+        if error is not None:
+            return idempotent and isinstance(
+                error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+            )
+        return (
+            idempotent and response is not None
+            and response.status_code in RETRY_STATUSES
+        )
+
+    def delay(self, attempt, response=None):
+        delay = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.max_delay))
+            except ValueError:
+                pass  # HTTP-date form; the backoff is used instead
+        return delay
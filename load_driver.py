@@ -0,0 +1,411 @@
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import api_client
+import environment
+import metrics
+import test_10_FE_prep as fe_prep
+from bench_heartbeat import seed_reading_streams
+from cli import get_flag_value
+from metrics import LatencyHistogram
+from process_pool import (
+    check_worker_flags, configure_worker, default_process_count,
+    run_in_processes,
+)
+
+# --- Configuration ---
+DEFAULT_RATE = 100.0  # requests per second
+DEFAULT_DURATION = 30.0  # seconds
+DEFAULT_WORKERS = 64
+DEFAULT_MAX_IN_FLIGHT = 5000
+DEFAULT_STREAMS = 20
+DEFAULT_DROPS_PER_STREAM = 50
+DEFAULT_USERS = 100
+REPORT_INTERVAL = 5.0  # seconds between progress lines
+
+
+class Workload:
+    """Seeded data the operations draw IDs from."""
+
+    def __init__(self, pool_id, streams, users):
+        self.pool_id = pool_id
+        self.streams = streams  # [(stream_id, [(drop_id, placement_id), ...])]
+        self.users = users
+
+
+def seed_workload(stream_count, drops_per_stream, user_count):
+    pool_id, streams = seed_reading_streams(stream_count, drops_per_stream)
+    run_id = uuid.uuid4().hex[:8]
+    users = [f"load_user_{run_id}_{i}" for i in range(user_count)]
+    return Workload(pool_id, streams, users)
+
+
+# --- Operations: one request each, against the endpoints in CURRENT_API.md ---
+def op_health(workload, rng):
+    return api_client.get(f"{environment.BASE_URL}/health")
+
+
+def op_get_pool(workload, rng):
+    return api_client.get(f"{environment.API_V1_URL}/pools/{workload.pool_id}")
+
+
+def op_get_stream(workload, rng):
+    stream_id, _ = rng.choice(workload.streams)
+    return api_client.get(f"{environment.API_V1_URL}/streams/{stream_id}")
+
+
+def op_get_drop(workload, rng):
+    _, drops = rng.choice(workload.streams)
+    drop_id, _ = rng.choice(drops)
+    return api_client.get(f"{environment.API_V1_URL}/drops/{drop_id}")
+
+
+def op_get_stream_drops(workload, rng):
+    stream_id, drops = rng.choice(workload.streams)
+    _, placement_id = rng.choice(drops)
+    return api_client.get(
+        f"{environment.API_V1_URL}/streams/{stream_id}/drops",
+        params={"from_placement_id": placement_id, "limit": 10}
+    )
+
+
+def op_get_river(workload, rng):
+    return api_client.get(
+        f"{environment.API_V1_URL}/user/river",
+        params={"limit": 30},
+        headers={"X-User-Id": rng.choice(workload.users)}
+    )
+
+
+def op_update_progress(workload, rng):
+    stream_id, drops = rng.choice(workload.streams)
+    drop_id, placement_id = rng.choice(drops)
+    return api_client.post(
+        f"{environment.API_V1_URL}/user/progress",
+        json={
+            "pool_id": workload.pool_id,
+            "stream_id": stream_id,
+            "drop_id": drop_id,
+            "placement_id": placement_id,
+        },
+        headers={"X-User-Id": rng.choice(workload.users)}
+    )
+
+
+def op_add_drops(workload, rng):
+    stream_id, _ = rng.choice(workload.streams)
+    return api_client.post(
+        f"{environment.API_V1_URL}/streams/{stream_id}/drops",
+        json={
+            "drops": [{"title": "Load drop", "text": "Appended under load."}],
+            "creator_id": fe_prep.CREATOR_ID,
+        }
+    )
+
+
+def op_create_stream(workload, rng):
+    return api_client.post(
+        f"{environment.API_V1_URL}/streams",
+        json={
+            "stream_content": {
+                "title": "Load stream",
+                "description": "Under load.",
+                "category": "General",
+            },
+            "pool_id": workload.pool_id,
+            "creator_id": fe_prep.CREATOR_ID,
+        }
+    )
+
+
+def op_create_pool(workload, rng):
+    return api_client.post(
+        f"{environment.API_V1_URL}/pools",
+        json={
+            "pool_content": {"title": "Load pool", "description": "Under load."},
+            "creator_id": fe_prep.CREATOR_ID,
+        }
+    )
+
+
+OPERATIONS = {
+    "health": op_health,
+    "get_pool": op_get_pool,
+    "get_stream": op_get_stream,
+    "get_drop": op_get_drop,
+    "get_stream_drops": op_get_stream_drops,
+    "get_river": op_get_river,
+    "update_progress": op_update_progress,
+    "add_drops": op_add_drops,
+    "create_stream": op_create_stream,
+    "create_pool": op_create_pool,
+}
+
+# Default mix spread across every endpoint, weighted toward reads
+DEFAULT_MIX = {
+    "health": 2,
+    "get_pool": 5,
+    "get_stream": 10,
+    "get_drop": 15,
+    "get_stream_drops": 25,
+    "get_river": 15,
+    "update_progress": 20,
+    "add_drops": 5,
+    "create_stream": 2,
+    "create_pool": 1,
+}
+
+
+class OpenLoopDriver:
+    """Sends requests on a fixed arrival schedule, whatever the responses do.
+
+    Request i is due at start + i / rate (or at Poisson-spaced times). Its
+    latency is measured from that intended send time, not from when a
+    worker got around to sending it, so when the server slows down the
+    queueing delay appears as tail latency instead of silently lowering the
+    achieved rate (coordinated omission). Service time, measured from the
+    actual send, is kept alongside for comparison.
+    """
+
+    def __init__(self, workload, mix, rate, duration, workers=DEFAULT_WORKERS,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, poisson=False, seed=0):
+        self.workload = workload
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        if not rate > 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.duration = duration
+        self.workers = workers
+        self.max_in_flight = max_in_flight
+        self.poisson = poisson
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.scheduled = 0
+        self.dropped = 0
+        self.corrected = {name: LatencyHistogram() for name in self.names}
+        self.service = {name: LatencyHistogram() for name in self.names}
+        self.errors = {name: 0 for name in self.names}
+
+    def execute(self, name, intended, op_seed):
+        rng = random.Random(op_seed)
+        sent = time.perf_counter()
+        failed = False
+        try:
+            response = OPERATIONS[name](self.workload, rng)
+            failed = response.status_code >= 400
+        except requests.exceptions.RequestException:
+            failed = True
+        done = time.perf_counter()
+        with self.lock:
+            self.in_flight -= 1
+            self.corrected[name].record(done - intended)
+            self.service[name].record(done - sent)
+            if failed:
+                self.errors[name] += 1
+
+    def run(self, report=True):
+        if report:
+            print(f"--- Open loop: {self.rate:g} req/s for {self.duration:g}s "
+                  f"({'Poisson' if self.poisson else 'constant'} arrivals, "
+                  f"{self.workers} workers) ---")
+        start = time.perf_counter()
+        end = start + self.duration
+        intended = start
+        next_report = start + REPORT_INTERVAL
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while intended < end:
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                name = self.rng.choices(self.names, self.weights)[0]
+                op_seed = self.rng.getrandbits(32)
+                with self.lock:
+                    self.scheduled += 1
+                    overloaded = self.in_flight >= self.max_in_flight
+                    if not overloaded:
+                        self.in_flight += 1
+                if overloaded:
+                    self.dropped += 1
+                else:
+                    executor.submit(self.execute, name, intended, op_seed)
+
+                now = time.perf_counter()
+                if now >= next_report:
+                    if report:
+                        self.print_progress(now - start)
+                    next_report += REPORT_INTERVAL
+                gap = (
+                    self.rng.expovariate(self.rate) if self.poisson
+                    else 1.0 / self.rate
+                )
+                intended += gap
+        elapsed = time.perf_counter() - start
+        return self.summary(elapsed) if report else None
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "scheduled": self.scheduled,
+                "dropped": self.dropped,
+                "errors": dict(self.errors),
+                "corrected": {n: h.to_dict() for n, h in self.corrected.items()},
+                "service": {n: h.to_dict() for n, h in self.service.items()},
+            }
+
+    def merge(self, data):
+        """Adds results sent back by a worker process."""
+        with self.lock:
+            self.scheduled += data["scheduled"]
+            self.dropped += data["dropped"]
+            for name in self.names:
+                self.errors[name] += data["errors"][name]
+                self.corrected[name].merge(
+                    LatencyHistogram.from_dict(data["corrected"][name])
+                )
+                self.service[name].merge(
+                    LatencyHistogram.from_dict(data["service"][name])
+                )
+
+    def print_progress(self, elapsed):
+        with self.lock:
+            completed = sum(h.total for h in self.corrected.values())
+            in_flight = self.in_flight
+        print(f"  [{elapsed:6.1f}s] scheduled {self.scheduled}, completed "
+              f"{completed}, in flight {in_flight}, dropped {self.dropped}")
+
+    def summary(self, elapsed):
+        total = LatencyHistogram()
+        total_service = LatencyHistogram()
+        for name in self.names:
+            total.merge(self.corrected[name])
+            total_service.merge(self.service[name])
+        completed = total.total
+        print(f"\nTarget {self.rate:g} req/s, achieved "
+              f"{completed / elapsed if elapsed else 0:.1f} req/s "
+              f"({completed} completed, {self.dropped} dropped by the client)")
+        print(f"\n{'operation':<18}{'count':>7}{'err':>6}"
+              f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'p99.9 ms':>10}"
+              f"{'svc p99':>9}")
+        rows = [(name, self.corrected[name], self.service[name],
+                 self.errors[name]) for name in self.names]
+        rows.append(("ALL", total, total_service, sum(self.errors.values())))
+        for name, corrected, service, errors in rows:
+            if not corrected.total:
+                continue
+            print(f"{name:<18}{corrected.total:>7}{errors:>6}"
+                  f"{corrected.percentile(50) * 1000:>9.1f}"
+                  f"{corrected.percentile(95) * 1000:>9.1f}"
+                  f"{corrected.percentile(99) * 1000:>9.1f}"
+                  f"{corrected.percentile(99.9) * 1000:>10.1f}"
+                  f"{service.percentile(99) * 1000:>9.1f}")
+        print("\nLatency is measured from each request's intended send time; "
+              "'svc p99' is from the actual send.")
+        return {
+            "elapsed_seconds": elapsed,
+            "completed": completed,
+            "dropped": self.dropped,
+            "errors": sum(self.errors.values()),
+            "achieved_rate": completed / elapsed if elapsed else 0.0,
+        }
+
+
+def run_driver_worker(base_url, workload, mix, rate, duration, workers,
+                      max_in_flight, poisson, seed, record_endpoints):
+    """Process entry point: drives one share of the total arrival rate."""
+    configure_worker(base_url, workers)
+    recorder = None
+    if record_endpoints:
+        recorder = metrics.MetricsRecorder()
+        api_client.add_request_hook(recorder.record_request)
+    driver = OpenLoopDriver(workload, mix, rate, duration, workers,
+                            max_in_flight, poisson, seed)
+    started_at = time.time()
+    driver.run(report=False)
+    return {
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "endpoints": recorder.to_dict() if recorder else None,
+        **driver.to_dict(),
+    }
+
+
+def run_open_loop_processes(workload, mix, rate, duration, workers,
+                            max_in_flight, poisson, seed, processes):
+    """Splits the arrival rate evenly across processes and merges results."""
+    print(f"--- Open loop: {rate:g} req/s for {duration:g}s across "
+          f"{processes} processes ({workers} workers each) ---")
+    shares = [
+        (environment.BASE_URL, workload, mix, rate / processes, duration, workers,
+         max_in_flight, poisson, seed + i, metrics.recording_enabled())
+        for i in range(processes)
+    ]
+    merged = OpenLoopDriver(workload, mix, rate, duration, workers,
+                            max_in_flight * processes, poisson, seed)
+    worker_results = run_in_processes(run_driver_worker, shares)
+    for result in worker_results:
+        merged.merge(result)
+        if result["endpoints"] is not None:
+            metrics.get_recorder().merge(
+                metrics.MetricsRecorder.from_dict(result["endpoints"])
+            )
+    elapsed = (
+        max(r["finished_at"] for r in worker_results)
+        - min(r["started_at"] for r in worker_results)
+    )
+    return merged.summary(elapsed)
+
+
+def main():
+    # --processes 0 starts one driver process per CPU core
+    processes = get_flag_value("--processes", 1, int) or default_process_count()
+    check_worker_flags(processes)
+    workers = get_flag_value("--workers", DEFAULT_WORKERS, int)
+    settings = {
+        "rate": get_flag_value("--rate", DEFAULT_RATE, float),
+        "duration": get_flag_value("--duration", DEFAULT_DURATION, float),
+        "workers": workers,
+        "max_in_flight": get_flag_value("--max-in-flight", DEFAULT_MAX_IN_FLIGHT, int),
+        "poisson": "--poisson" in sys.argv,
+        "seed": get_flag_value("--seed", 0, int),
+    }
+    sizes = [
+        get_flag_value("--streams", DEFAULT_STREAMS, int),
+        get_flag_value("--drops-per-stream", DEFAULT_DROPS_PER_STREAM, int),
+        get_flag_value("--users", DEFAULT_USERS, int),
+    ]
+    # A zero rate never schedules anything and a negative one runs forever
+    for flag in ("rate", "duration"):
+        if not 0 < settings[flag] < float("inf"):
+            print(f"Invalid value for --{flag}: {settings[flag]:g} "
+                  f"(expected a positive number)")
+            sys.exit(2)
+    if min(workers, settings["max_in_flight"], *sizes) < 1:
+        print("--workers, --max-in-flight, --streams, --drops-per-stream and "
+              "--users must be at least 1")
+        sys.exit(2)
+    fe_prep.configure_from_argv()
+    api_client.configure(pool_size=workers)
+    try:
+        workload = seed_workload(*sizes)
+    except requests.exceptions.RequestException as e:
+        print(f"\n!!! Error occurred while seeding: {e}")
+        sys.exit(1)
+    if processes > 1:
+        result = run_open_loop_processes(
+            workload, DEFAULT_MIX, processes=processes, **settings
+        )
+    else:
+        result = OpenLoopDriver(workload, DEFAULT_MIX, **settings).run()
+    sys.exit(1 if result["errors"] or result["dropped"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,583 @@
+"""In-process stand-in for the Wisdom Pool server (see docs/CURRENT_API.md).
+
+Everything lives in indexed in-memory structures so the harness and load
+tools have a fast, deterministic target that needs no network or database:
+
+    python local_server.py [--port 8000] [--capacity N] [--compress]
+"""
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import compression
+from cli import get_flag_value
+
+COMMIT_HASH = "local-stand-in"
+DEFAULT_DROPS_LIMIT = 10
+RIVER_LIMIT = 30
+
+
+def utc_now():
+    """Returns the current UTC time in the server's ISO format."""
+    now = datetime.now(timezone.utc)
+    return now.strftime("%Y-%m-%dT%H:%M:%S.") + f"{now.microsecond // 1000:03d}Z"
+
+
+_request_context = threading.local()
+
+
+class RequestIdFilter(logging.Filter):
+    """Tags log records with the X-Request-Id of the request being handled."""
+
+    def filter(self, record):
+        request_id = getattr(_request_context, "request_id", None)
+        record.request_tag = f" [request_id={request_id}]" if request_id else ""
+        return True
+
+
+class MemoryLogHandler(logging.Handler):
+    """Keeps formatted log lines in memory for GET /logs.
+
+    Offsets count lines since the server started, so they stay valid for
+    incremental readers across clears.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.first_offset = 0  # Offset of lines[0]
+        self.addFilter(RequestIdFilter())
+        self.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s%(request_tag)s"
+        ))
+
+    def emit(self, record):
+        line = self.format(record)
+        with self.lock:
+            self.lines.append(line)
+
+    def lines_since(self, offset):
+        """Returns (lines after offset, offset after the last line)."""
+        with self.lock:
+            start = max(offset - self.first_offset, 0)
+            return self.lines[start:], self.first_offset + len(self.lines)
+
+    def clear(self):
+        with self.lock:
+            self.first_offset += len(self.lines)
+            self.lines = []
+
+
+class ApiError(Exception):
+    """An error that maps directly onto an HTTP error response."""
+
+    def __init__(self, status, detail, headers=None):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+        self.headers = headers
+
+
+class WisdomPoolStore:
+    """Indexed in-memory storage for pools, streams, drops and user progress."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.pools = {}
+        self.streams = {}
+        self.drops = {}
+        # placement_id -> placement record (stream_id, drop_id, prev/next)
+        self.placements = {}
+        # stream_id -> placement_ids in list order, plus their positions,
+        # so paging from any cursor is O(1) to locate instead of a walk
+        self.stream_order = {}
+        self.placement_position = {}
+        # user_id -> OrderedDict(stream_id -> history record), oldest first
+        self.user_history = {}
+        self.last_active_context = {}
+
+    def create_pool(self, pool_content, creator_id):
+        pool = {
+            "pool_id": str(uuid.uuid4()),
+            "creator_id": creator_id,
+            "created_at": utc_now(),
+            "content": pool_content,
+        }
+        with self.lock:
+            self.pools[pool["pool_id"]] = pool
+        return pool
+
+    def get_pool(self, pool_id):
+        pool = self.pools.get(pool_id)
+        if pool is None:
+            raise ApiError(404, "Pool not found")
+        return pool
+
+    def create_stream(self, stream_content, pool_id, creator_id):
+        with self.lock:
+            self.get_pool(pool_id)
+            stream = {
+                "stream_id": str(uuid.uuid4()),
+                "pool_id": pool_id,
+                "creator_id": creator_id,
+                "created_at": utc_now(),
+                "first_drop_placement_id": None,
+                "last_drop_placement_id": None,
+                "content": stream_content,
+            }
+            self.streams[stream["stream_id"]] = stream
+            self.stream_order[stream["stream_id"]] = []
+        return stream
+
+    def get_stream(self, stream_id):
+        stream = self.streams.get(stream_id)
+        if stream is None:
+            raise ApiError(404, "Stream not found")
+        return stream
+
+    def get_drop(self, drop_id):
+        drop = self.drops.get(drop_id)
+        if drop is None:
+            raise ApiError(404, "Drop not found")
+        return drop
+
+    def add_drops(self, stream_id, drops_content, creator_id):
+        """Appends drops to the end of a stream's placement list atomically."""
+        with self.lock:
+            stream = self.get_stream(stream_id)
+            order = self.stream_order[stream_id]
+            added = []
+            for content in drops_content:
+                drop = {
+                    "drop_id": str(uuid.uuid4()),
+                    "creator_id": creator_id,
+                    "created_at": utc_now(),
+                    "content": content,
+                }
+                placement_id = str(uuid.uuid4())
+                prev_id = stream["last_drop_placement_id"]
+                placement = {
+                    "placement_id": placement_id,
+                    "stream_id": stream_id,
+                    "drop_id": drop["drop_id"],
+                    "prev_placement_id": prev_id,
+                    "next_placement_id": None,
+                }
+                if prev_id is not None:
+                    self.placements[prev_id]["next_placement_id"] = placement_id
+                else:
+                    stream["first_drop_placement_id"] = placement_id
+                stream["last_drop_placement_id"] = placement_id
+                self.drops[drop["drop_id"]] = drop
+                self.placements[placement_id] = placement
+                self.placement_position[placement_id] = len(order)
+                order.append(placement_id)
+                added.append((drop, placement))
+            # Position info is reported after the whole batch is linked
+            return [
+                dict(drop, placement_id=placement["placement_id"],
+                     stream_id=stream_id,
+                     position_info={
+                         "next_placement_id": placement["next_placement_id"],
+                         "prev_placement_id": placement["prev_placement_id"],
+                     })
+                for drop, placement in added
+            ]
+
+    def get_stream_drops(self, stream_id, from_placement_id=None,
+                         limit=DEFAULT_DROPS_LIMIT):
+        """Returns one page of drops, starting at from_placement_id inclusive."""
+        with self.lock:
+            self.get_stream(stream_id)
+            order = self.stream_order[stream_id]
+            start = 0
+            if from_placement_id:
+                placement = self.placements.get(from_placement_id)
+                if placement is None or placement["stream_id"] != stream_id:
+                    raise ApiError(404, "Placement not found in stream")
+                start = self.placement_position[from_placement_id]
+            page = []
+            for placement_id in order[start:start + limit]:
+                placement = self.placements[placement_id]
+                page.append(dict(
+                    self.drops[placement["drop_id"]],
+                    placement_id=placement_id,
+                    next_placement_id=placement["next_placement_id"],
+                    prev_placement_id=placement["prev_placement_id"],
+                ))
+            return {
+                "drops": page,
+                "has_more": start + limit < len(order),
+                "total_count": len(order),
+            }
+
+    def update_progress(self, user_id, pool_id, stream_id, drop_id,
+                        placement_id):
+        with self.lock:
+            placement = self.placements.get(placement_id)
+            if (
+                placement is None
+                or placement["stream_id"] != stream_id
+                or placement["drop_id"] != drop_id
+            ):
+                raise ApiError(404, "Placement not found for drop in stream")
+            record = {
+                "stream_id": stream_id,
+                "last_read_drop_id": drop_id,
+                "last_read_placement_id": placement_id,
+                "updated_at": utc_now(),
+            }
+            history = self.user_history.setdefault(user_id, OrderedDict())
+            history[stream_id] = record
+            history.move_to_end(stream_id)
+            self.last_active_context[user_id] = dict(record, pool_id=pool_id)
+
+    def get_river(self, user_id, limit=RIVER_LIMIT):
+        with self.lock:
+            history = self.user_history.get(user_id, OrderedDict())
+            records = []
+            for stream_id in reversed(history):
+                if len(records) >= limit:
+                    break
+                records.append(dict(history[stream_id]))
+            return {"records": records}
+
+
+class WisdomPoolHandler(BaseHTTPRequestHandler):
+    """Routes HTTP requests onto the server's WisdomPoolStore."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real server
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response stalls ~40ms on Nagle + delayed ACK.
+    disable_nagle_algorithm = True
+    routes = []
+
+    def log_message(self, format, *args):
+        self.server.logger.debug(format % args)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self.status = None
+        self.body_read = False
+        _request_context.request_id = self.headers.get("X-Request-Id")
+        started = time.perf_counter()
+        admitted = False
+        try:
+            if self.server.capacity and url.path.startswith("/api/"):
+                with self.server.active_lock:
+                    admitted = self.server.active < self.server.capacity
+                    if admitted:
+                        self.server.active += 1
+                if not admitted:
+                    raise ApiError(429, "Too many requests in flight")
+            allowed = []
+            for route_method, pattern, handler in self.routes:
+                match = pattern.fullmatch(url.path)
+                if match and route_method == method:
+                    handler(self, *match.groups())
+                    return
+                if match:
+                    allowed.append(route_method)
+            if allowed:
+                raise ApiError(405, "Method Not Allowed",
+                               {"Allow": ", ".join(allowed)})
+            raise ApiError(404, "Not Found")
+        except ApiError as e:
+            self.server.logger.warning(
+                f"{method} {url.path} failed: {e.status} {e.detail}"
+            )
+            self.discard_body()
+            self.send_json({"detail": e.detail}, status=e.status,
+                           headers=e.headers)
+        except Exception as e:
+            self.server.logger.error(
+                f"{method} {url.path} crashed: {type(e).__name__}: {e}"
+            )
+            # The body may be half read or the response half sent
+            self.close_connection = True
+            if self.status is None:
+                self.send_json({"detail": "Internal Server Error"}, status=500)
+        finally:
+            if admitted:
+                with self.server.active_lock:
+                    self.server.active -= 1
+            if not url.path.startswith("/logs"):
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.server.logger.info(
+                    f"{method} {url.path} -> {self.status} in {elapsed_ms:.2f}ms"
+                )
+            _request_context.request_id = None
+
+    def send_response(self, code, message=None):
+        self.status = code
+        super().send_response(code, message)
+        request_id = getattr(_request_context, "request_id", None)
+        if request_id:
+            self.send_header("X-Request-Id", request_id)
+
+    def read_body(self):
+        self.body_read = True
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def discard_body(self):
+        """Drains an unread body so it is not parsed as the next request."""
+        if not self.body_read:
+            self.read_body()
+
+    def read_json(self):
+        body = self.read_body()
+        encoding = self.headers.get("Content-Encoding", "identity").lower()
+        if body and encoding != "identity":
+            try:
+                body = compression.decompress(body, encoding)
+            except ValueError as e:
+                raise ApiError(415, str(e))
+            except compression.DECODE_ERRORS:
+                raise ApiError(400, f"Request body is not valid {encoding}")
+        try:
+            return json.loads(body or b"null")
+        except json.JSONDecodeError:
+            raise ApiError(422, "Request body is not valid JSON")
+
+    def require_fields(self, body, *fields):
+        if not isinstance(body, dict):
+            raise ApiError(422, "Request body must be a JSON object")
+        missing = [f for f in fields if body.get(f) is None]
+        if missing:
+            raise ApiError(422, f"Missing fields: {', '.join(missing)}")
+        return [body[f] for f in fields]
+
+    def require_user(self):
+        user_id = self.headers.get("X-User-Id")
+        if not user_id:
+            raise ApiError(401, "Missing X-User-Id header")
+        return user_id
+
+    def int_query(self, name, default):
+        try:
+            return int(self.query.get(name, default))
+        except ValueError:
+            raise ApiError(422, f"Query parameter '{name}' must be an integer")
+
+    def send_body(self, body, content_type, status=200, headers=None):
+        encoding = None
+        if self.server.compress and len(body) >= compression.MIN_COMPRESS_BYTES:
+            encoding = compression.choose_encoding(
+                self.headers.get("Accept-Encoding")
+            )
+        if encoding:
+            body = compression.compress(body, encoding)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.compress:
+            self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, payload, status=200, headers=None):
+        self.send_body(
+            json.dumps(payload).encode(), "application/json", status, headers
+        )
+
+    def send_no_content(self):
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    # --- Monitoring ---
+    def root(self):
+        self.send_json({"message": "Server is running"})
+
+    def health(self):
+        self.send_json({
+            "status": "ok",
+            "start_time_utc": self.server.start_time_utc,
+            "server_time_utc": utc_now(),
+            "commit_hash": COMMIT_HASH,
+        })
+
+    def get_logs(self):
+        """All buffered lines, or only those after ?offset=N.
+
+        X-Log-Next-Offset tells incremental readers where to continue.
+        """
+        lines, next_offset = self.server.log_handler.lines_since(
+            self.int_query("offset", 0)
+        )
+        text = "".join(line + "\n" for line in lines)
+        self.send_body(
+            text.encode(), "text/plain; charset=utf-8",
+            headers={"X-Log-Next-Offset": str(next_offset)},
+        )
+
+    def clear_logs(self):
+        self.server.log_handler.clear()
+        self.server.logger.info("Log cleared.")
+        self.send_json({"message": "Log cleared."})
+
+    # --- Pools ---
+    def create_pool(self):
+        pool_content, creator_id = self.require_fields(
+            self.read_json(), "pool_content", "creator_id"
+        )
+        pool = self.server.store.create_pool(pool_content, creator_id)
+        self.server.logger.info(f"Created pool {pool['pool_id']}")
+        self.send_json(pool)
+
+    def get_pool(self, pool_id):
+        self.send_json(self.server.store.get_pool(pool_id))
+
+    # --- Streams ---
+    def create_stream(self):
+        stream_content, pool_id, creator_id = self.require_fields(
+            self.read_json(), "stream_content", "pool_id", "creator_id"
+        )
+        stream = self.server.store.create_stream(
+            stream_content, pool_id, creator_id
+        )
+        self.server.logger.info(f"Created stream {stream['stream_id']}")
+        self.send_json(stream)
+
+    def get_stream(self, stream_id):
+        self.send_json(self.server.store.get_stream(stream_id))
+
+    def add_drops(self, stream_id):
+        drops, creator_id = self.require_fields(
+            self.read_json(), "drops", "creator_id"
+        )
+        single = isinstance(drops, dict)
+        added = self.server.store.add_drops(
+            stream_id, [drops] if single else drops, creator_id
+        )
+        self.server.logger.info(f"Added {len(added)} drops to stream {stream_id}")
+        self.send_json(added[0] if single else {"drops": added})
+
+    def get_stream_drops(self, stream_id):
+        limit = self.int_query("limit", DEFAULT_DROPS_LIMIT)
+        if limit < 1:
+            raise ApiError(422, "Query parameter 'limit' must be positive")
+        self.send_json(self.server.store.get_stream_drops(
+            stream_id, self.query.get("from_placement_id"), limit
+        ))
+
+    # --- Drops ---
+    def get_drop(self, drop_id):
+        self.send_json(self.server.store.get_drop(drop_id))
+
+    # --- User State & Progress ---
+    def update_progress(self):
+        user_id = self.require_user()
+        pool_id, stream_id, drop_id, placement_id = self.require_fields(
+            self.read_json(), "pool_id", "stream_id", "drop_id", "placement_id"
+        )
+        self.server.store.update_progress(
+            user_id, pool_id, stream_id, drop_id, placement_id
+        )
+        self.send_no_content()
+
+    def get_river(self):
+        user_id = self.require_user()
+        limit = min(self.int_query("limit", RIVER_LIMIT), RIVER_LIMIT)
+        self.send_json(self.server.store.get_river(user_id, limit))
+
+
+_ID = r"([^/]+)"
+WisdomPoolHandler.routes = [
+    ("GET", re.compile(r"/"), WisdomPoolHandler.root),
+    ("GET", re.compile(r"/health"), WisdomPoolHandler.health),
+    ("GET", re.compile(r"/logs"), WisdomPoolHandler.get_logs),
+    ("DELETE", re.compile(r"/logs/clear"), WisdomPoolHandler.clear_logs),
+    ("POST", re.compile(r"/api/v1/pools"), WisdomPoolHandler.create_pool),
+    ("GET", re.compile(rf"/api/v1/pools/{_ID}"), WisdomPoolHandler.get_pool),
+    ("POST", re.compile(r"/api/v1/streams"), WisdomPoolHandler.create_stream),
+    ("GET", re.compile(rf"/api/v1/streams/{_ID}"), WisdomPoolHandler.get_stream),
+    ("POST", re.compile(rf"/api/v1/streams/{_ID}/drops"),
+     WisdomPoolHandler.add_drops),
+    ("GET", re.compile(rf"/api/v1/streams/{_ID}/drops"),
+     WisdomPoolHandler.get_stream_drops),
+    ("GET", re.compile(rf"/api/v1/drops/{_ID}"), WisdomPoolHandler.get_drop),
+    ("POST", re.compile(r"/api/v1/user/progress"),
+     WisdomPoolHandler.update_progress),
+    ("GET", re.compile(r"/api/v1/user/river"), WisdomPoolHandler.get_river),
+]
+
+
+class WisdomPoolServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the store and the in-memory log buffer."""
+
+    daemon_threads = True
+
+    def __init__(self, address, capacity=None, compress=False):
+        super().__init__(address, WisdomPoolHandler)
+        # With a capacity, API requests beyond that many in flight get a 429,
+        # imitating a throttling backend
+        self.capacity = capacity
+        # With compress, responses are encoded per Accept-Encoding, like a
+        # deployment behind compression middleware. Compressed request
+        # bodies are always accepted.
+        self.compress = compress
+        self.active = 0
+        self.active_lock = threading.Lock()
+        self.store = WisdomPoolStore()
+        self.start_time_utc = utc_now()
+        self.log_handler = MemoryLogHandler()
+        # Named like the real server's logger, but not registered with
+        # logging, so each server in a process keeps its own buffer
+        self.logger = logging.Logger("api_logger", logging.INFO)
+        self.logger.addHandler(self.log_handler)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_in_background(host="127.0.0.1", port=0, compress=False):
+    """Starts a stand-in server on a daemon thread and returns its base URL."""
+    server = WisdomPoolServer((host, port), compress=compress)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server.base_url
+
+
+def main():
+    port = get_flag_value("--port", 8000, int)
+    server = WisdomPoolServer(
+        ("127.0.0.1", port), capacity=get_flag_value("--capacity", None, int),
+        compress="--compress" in sys.argv,
+    )
+    print(f"--- Local Wisdom Pool stand-in listening on {server.base_url} ---")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import atexit
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+
+import api_client
+from cli import get_flag_value
+
+# --- Configuration ---
+DEFAULT_SLOW_MS = 500.0
+DEFAULT_POLL_INTERVAL = 2.0  # seconds between background fetches
+DEFAULT_MAX_TRACKED = 100_000  # request IDs whose server lines are kept
+MAX_REPORTED = 20  # flagged requests printed in the report
+LOG_CHUNK_SIZE = 64 * 1024  # bytes read from the socket at a time
+# Without request IDs in the log, lines this close to a request's start and
+# end are shown for it
+DEFAULT_WINDOW_SLACK = 1.0  # seconds
+LOG_TIME_FORMAT = "%Y-%m-%d %H:%M:%S,%f"  # logging's default asctime
+
+LOG_LINE = re.compile(
+    r"(?P<timestamp>\S+ \S+) - (?P<logger>\S+) - (?P<level>[A-Z]+) - "
+    r"(?P<message>.*?)(?: \[request_id=(?P<request_id>[^\]]+)\])?"
+)
+# Completion line the server writes for every request it handles
+TIMING = re.compile(r"-> (?P<status>\S+) in (?P<ms>[\d.]+)ms")
+
+
+def parse_log_line(line):
+    """Splits a server log line into its fields, or returns None."""
+    match = LOG_LINE.fullmatch(line)
+    if not match:
+        return None
+    entry = match.groupdict()
+    timing = TIMING.search(entry["message"])
+    entry["server_ms"] = float(timing.group("ms")) if timing else None
+    try:
+        entry["time"] = datetime.strptime(
+            entry["timestamp"], LOG_TIME_FORMAT
+        ).timestamp()
+    except ValueError:
+        entry["time"] = None
+    return entry
+
+
+class LogTailer:
+    """Fetches only the server log lines written since the previous fetch.
+
+    Uses GET /logs?offset=N and the X-Log-Next-Offset response header
+    (local_server.py). The real server has no offset support and returns
+    its whole buffer on every poll, so each poll costs the full download.
+    The tailer then keeps only the lines after the last line it saw before
+    (timestamped to the millisecond, so effectively unique). If that line
+    is gone because the buffer was cleared or rotated, every line counts
+    as new, and lines written between the two polls may be missing.
+    Parsed lines are indexed by request ID for the most recent
+    max_tracked requests.
+
+    Only local_server.py ends its lines with [request_id=...]. For a
+    server that does not, lines_for_request() falls back to the lines
+    timestamped within the request's time window, which assumes the
+    server logs in the client's local time on a roughly synced clock.
+    """
+
+    def __init__(self, base_url, max_tracked=DEFAULT_MAX_TRACKED):
+        self.base_url = base_url
+        self.max_tracked = max_tracked
+        self.lock = threading.Lock()
+        self.offset = 0
+        self.incremental = None  # Whether the server supports offsets
+        self.last_line = None  # Anchor for servers without offsets
+        self.lines_by_request = OrderedDict()
+        self.recent = deque(maxlen=max_tracked)  # Parsed lines, oldest first
+        self.tagged = False  # Whether any line carried a request ID
+        self.lines_fetched = 0
+        self.bytes_fetched = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def fetch(self, keep=True):
+        """Returns the raw log lines written since the last fetch.
+
+        The body is read line by line as it arrives. With keep=False the
+        lines are only skipped (or not read at all when the server sends
+        X-Log-Next-Offset), so skipping a large buffer costs no memory.
+        """
+        with self.lock:
+            response = api_client.get(
+                f"{self.base_url}/logs", params={"offset": self.offset},
+                stream=True,
+            )
+            body_bytes = 0
+            try:
+                response.raise_for_status()
+                next_offset = response.headers.get("X-Log-Next-Offset")
+                self.incremental = next_offset is not None
+                if self.incremental and not keep:
+                    self.offset = int(next_offset)
+                    return []
+                lines = []
+                last_line = None
+                for raw in response.iter_lines(LOG_CHUNK_SIZE):
+                    body_bytes += len(raw) + 1
+                    last_line = raw.decode("utf-8", "replace")
+                    if not self.incremental and last_line == self.last_line:
+                        lines = []  # Everything so far was seen last time
+                    elif keep:
+                        lines.append(last_line)
+                self.bytes_fetched += body_bytes
+            finally:
+                api_client.finish_streamed(response, body_bytes)
+                response.close()
+            if self.incremental:
+                self.offset = int(next_offset)
+            elif last_line is not None:
+                self.last_line = last_line
+            self.lines_fetched += len(lines)
+            return lines
+
+    def poll(self):
+        """Fetches new lines, indexes them by request ID and returns them.
+
+        The raw lines are returned, including those that do not parse
+        (tracebacks, unformatted output).
+        """
+        lines = self.fetch()
+        entries = [parse_log_line(line) for line in lines]
+        with self.lock:
+            for entry in entries:
+                if not entry:
+                    continue
+                self.recent.append(entry)
+                if not entry["request_id"]:
+                    continue
+                self.tagged = True
+                request_id = entry["request_id"]
+                self.lines_by_request.setdefault(request_id, []).append(entry)
+                self.lines_by_request.move_to_end(request_id)
+            while len(self.lines_by_request) > self.max_tracked:
+                self.lines_by_request.popitem(last=False)
+        return lines
+
+    def seek_to_end(self):
+        """Skips everything already in the buffer."""
+        self.fetch(keep=False)
+
+    def lines_for(self, request_id):
+        with self.lock:
+            return list(self.lines_by_request.get(request_id, []))
+
+    def lines_between(self, start, end, slack=DEFAULT_WINDOW_SLACK):
+        """Parsed lines timestamped from start - slack to end + slack."""
+        with self.lock:
+            return [
+                entry for entry in self.recent
+                if entry["time"] is not None
+                and start - slack <= entry["time"] <= end + slack
+            ]
+
+    def lines_for_request(self, request_id, start, end):
+        """Returns (lines, matched_by_id) for a request sent from start to end.
+
+        Falls back to the time window while the server's lines carry no
+        request IDs.
+        """
+        if self.tagged:
+            return self.lines_for(request_id), True
+        return self.lines_between(start, end), False
+
+    def start(self, interval=DEFAULT_POLL_INTERVAL):
+        """Polls on a daemon thread so each fetch stays small under load."""
+
+        def run():
+            while not self.stop_event.wait(interval):
+                try:
+                    self.poll()
+                except requests.exceptions.RequestException:
+                    pass  # Try again next interval
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+
+class SlowRequestTracker:
+    """Flags slow or failed client requests and explains them from server logs.
+
+    For each flagged request the report shows the client-side latency, the
+    server's own handling time from its log, and the difference (network,
+    queueing and client overhead), followed by the server's log lines.
+    """
+
+    def __init__(self, tailer, slow_seconds):
+        self.tailer = tailer
+        self.slow_seconds = slow_seconds
+        self.lock = threading.Lock()
+        self.flagged = []
+        self.total_flagged = 0
+
+    def record_request(self, method, url, response, elapsed, streamed_bytes=None):
+        """api_client request hook."""
+        if urlsplit(url).path.startswith("/logs"):
+            return
+        failed = response is None or response.status_code >= 400
+        if not failed and elapsed < self.slow_seconds:
+            return
+        finished = time.time()
+        with self.lock:
+            self.total_flagged += 1
+            if len(self.flagged) < self.tailer.max_tracked:
+                self.flagged.append({
+                    "request_id": api_client.current_request_id(),
+                    "method": method.upper(),
+                    "path": urlsplit(url).path,
+                    "status": response.status_code if response is not None else "error",
+                    "client_ms": elapsed * 1000,
+                    "started": finished - elapsed,
+                    "finished": finished,
+                })
+
+    def report(self):
+        self.tailer.stop()
+        try:
+            self.tailer.poll()
+        except requests.exceptions.RequestException as e:
+            print(f"\nCould not fetch server logs: {e}")
+        with self.lock:
+            flagged = sorted(self.flagged, key=lambda r: -r["client_ms"])
+        print(f"\n--- Slow (>= {self.slow_seconds * 1000:.0f}ms) or failed "
+              f"requests: {self.total_flagged} ---")
+        print(f"Fetched {self.tailer.lines_fetched} server log lines "
+              f"({self.tailer.bytes_fetched / 1024:.1f} KiB)")
+        if flagged and not self.tailer.tagged:
+            print("The server's log lines carry no request IDs (only "
+                  "local_server.py adds them); showing the lines logged "
+                  "during each request instead.")
+        for request in flagged[:MAX_REPORTED]:
+            lines, by_id = self.tailer.lines_for_request(
+                request["request_id"], request["started"], request["finished"]
+            )
+            server_ms = next(
+                (e["server_ms"] for e in lines if e["server_ms"] is not None), None
+            ) if by_id else None  # In a time window it may be another request's
+            breakdown = f"client {request['client_ms']:.1f}ms"
+            if server_ms is not None:
+                breakdown += (f", server {server_ms:.1f}ms, outside server "
+                              f"{request['client_ms'] - server_ms:.1f}ms")
+            print(f"\n{request['method']} {request['path']} -> {request['status']} "
+                  f"[{request['request_id']}]: {breakdown}")
+            if not lines:
+                print("  (no server log lines for this request)")
+            for entry in lines:
+                print(f"  {entry['timestamp']} {entry['level']} {entry['message']}")
+        if len(flagged) > MAX_REPORTED:
+            print(f"\n... and {len(flagged) - MAX_REPORTED} more")
+
+
+def configure_from_argv(base_url):
+    """Enables --tail-logs: server lines for slow or failed requests.
+
+    --slow-ms sets the latency above which a request is reported. Lines
+    are matched by request ID only against local_server.py; other servers
+    get the lines logged during the request.
+    """
+    if "--tail-logs" not in sys.argv:
+        return None
+    tailer = LogTailer(base_url)
+    try:
+        tailer.seek_to_end()
+    except requests.exceptions.RequestException as e:
+        print(f"Log tailing disabled, could not read {base_url}/logs: {e}\n")
+        return None
+    if not tailer.incremental:
+        print(f"{base_url}/logs has no offset support: every poll downloads "
+              f"the whole log buffer, and lines can be missed if it is "
+              f"cleared between polls.\n")
+    tracker = SlowRequestTracker(
+        tailer, get_flag_value("--slow-ms", DEFAULT_SLOW_MS, float) / 1000
+    )
+    api_client.add_request_hook(tracker.record_request)
+    tailer.start()
+    atexit.register(tracker.report)
+    return tracker
@@ -0,0 +1,314 @@
+import atexit
+import csv
+import json
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import api_client
+from cli import get_flag_value
+
+# Path segments whose following segment is an entity ID
+ID_SEGMENTS = {"pools": "pool_id", "streams": "stream_id", "drops": "drop_id"}
+API_PREFIX = re.compile(r"^/api/v\d+")
+REPORT_PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of latencies, stored in microseconds.
+
+    Each power-of-two range is split into 2**SUB_BUCKET_BITS linear buckets,
+    so every recorded value keeps roughly two significant digits no matter
+    how large it is, in constant memory.
+    """
+
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.sum_us = 0
+        self.min_us = None
+        self.max_us = 0
+
+    def _bucket(self, value_us):
+        shift = max(value_us.bit_length() - self.SUB_BUCKET_BITS, 0)
+        return shift, value_us >> shift
+
+    @staticmethod
+    def _bucket_value(bucket):
+        shift, sub_bucket = bucket
+        return ((sub_bucket + 1) << shift) - 1  # Highest equivalent value
+
+    def record(self, seconds, count=1):
+        value_us = max(int(seconds * 1_000_000), 0)
+        bucket = self._bucket(value_us)
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += count
+        self.sum_us += value_us * count
+        self.max_us = max(self.max_us, value_us)
+        if self.min_us is None or value_us < self.min_us:
+            self.min_us = value_us
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None:
+            self.min_us = (
+                other.min_us if self.min_us is None
+                else min(self.min_us, other.min_us)
+            )
+
+    def percentile(self, pct):
+        """Returns the latency in seconds at the given percentile."""
+        if not self.total:
+            return 0.0
+        target = max(pct / 100 * self.total, 1)
+        seen = 0
+        for bucket in sorted(self.counts, key=self._bucket_value):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return min(self._bucket_value(bucket), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+
+    def mean(self):
+        return self.sum_us / self.total / 1_000_000 if self.total else 0.0
+
+    def to_dict(self):
+        return {
+            "total": self.total,
+            "sum_us": self.sum_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "counts": [[s, b, c] for (s, b), c in self.counts.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.total = data["total"]
+        histogram.sum_us = data["sum_us"]
+        histogram.min_us = data["min_us"]
+        histogram.max_us = data["max_us"]
+        histogram.counts = {(s, b): c for s, b, c in data["counts"]}
+        return histogram
+
+
+def endpoint_template(url):
+    """Maps a concrete URL onto its endpoint template.
+
+    e.g. http://host/api/v1/streams/abc/drops?limit=10 -> /streams/{stream_id}/drops
+    """
+    path = API_PREFIX.sub("", urlsplit(url).path) or "/"
+    segments = path.strip("/").split("/")
+    for i in range(1, len(segments)):
+        id_name = ID_SEGMENTS.get(segments[i - 1])
+        if id_name:
+            segments[i] = "{" + id_name + "}"
+    return "/" + "/".join(s for s in segments if s)
+
+
+class EndpointStats:
+    """Counters and a latency histogram for one method + endpoint template."""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.statuses = {}
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.request_bytes += other.request_bytes
+        self.response_bytes += other.response_bytes
+
+    def errors(self):
+        return sum(
+            count for status, count in self.statuses.items()
+            if status == "error" or int(status) >= 400
+        )
+
+    def summary(self):
+        row = {
+            "count": self.histogram.total,
+            "errors": self.errors(),
+            "statuses": dict(self.statuses),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "mean_ms": self.histogram.mean() * 1000,
+            "max_ms": self.histogram.max_us / 1000,
+        }
+        for pct in REPORT_PERCENTILES:
+            row[f"p{pct:g}_ms"] = self.histogram.percentile(pct) * 1000
+        return row
+
+    def to_dict(self):
+        return {
+            "histogram": self.histogram.to_dict(),
+            "statuses": self.statuses,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.histogram = LatencyHistogram.from_dict(data["histogram"])
+        stats.statuses = dict(data["statuses"])
+        stats.request_bytes = data["request_bytes"]
+        stats.response_bytes = data["response_bytes"]
+        return stats
+
+
+class MetricsRecorder:
+    """Collects per-endpoint stats from every request made via api_client."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.started_at = datetime.now(timezone.utc)
+
+    def stats_for(self, method, template):
+        key = f"{method} {template}"
+        if key not in self.endpoints:
+            self.endpoints[key] = EndpointStats()
+        return self.endpoints[key]
+
+    def record_request(self, method, url, response, elapsed, streamed_bytes=None):
+        """api_client request hook."""
+        request_bytes = response_bytes = 0
+        status = "error"
+        if response is not None:
+            status = str(response.status_code)
+            body = response.request.body
+            request_bytes = len(body) if body else 0
+            if streamed_bytes is not None:
+                response_bytes = streamed_bytes
+            else:
+                response_bytes = len(response.content or b"")
+        with self.lock:
+            stats = self.stats_for(method.upper(), endpoint_template(url))
+            stats.histogram.record(elapsed)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.request_bytes += request_bytes
+            stats.response_bytes += response_bytes
+
+    def merge(self, other):
+        with self.lock:
+            for key, stats in other.endpoints.items():
+                method, template = key.split(" ", 1)
+                self.stats_for(method, template).merge(stats)
+
+    def to_dict(self):
+        with self.lock:
+            return {key: stats.to_dict() for key, stats in self.endpoints.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        recorder = cls()
+        for key, stats in data.items():
+            recorder.endpoints[key] = EndpointStats.from_dict(stats)
+        return recorder
+
+    def report(self):
+        with self.lock:
+            endpoints = {
+                key: stats.summary()
+                for key, stats in sorted(self.endpoints.items())
+            }
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "argv": sys.argv,
+            "endpoints": endpoints,
+        }
+
+    def write_report(self, path):
+        """Writes the report as CSV if the path ends in .csv, JSON otherwise."""
+        report = self.report()
+        if path.endswith(".csv"):
+            columns = ["endpoint"] + [
+                c for c in next(iter(report["endpoints"].values()), {})
+                if c != "statuses"
+            ]
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for key, row in report["endpoints"].items():
+                    writer.writerow([key] + [row[c] for c in columns[1:]])
+        else:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=4)
+        print(f"\nLatency report written to {path}")
+
+    def print_summary(self):
+        report = self.report()
+        print("\n--- Per-endpoint latency ---")
+        print(f"{'endpoint':<42}{'count':>7}{'err':>5}"
+              f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for key, row in report["endpoints"].items():
+            print(f"{key:<42}{row['count']:>7}{row['errors']:>5}"
+                  f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+
+
+_recorder = None
+
+
+def get_recorder():
+    """Returns the process-wide recorder, hooking it into api_client once."""
+    global _recorder
+    if _recorder is None:
+        _recorder = MetricsRecorder()
+        api_client.add_request_hook(_recorder.record_request)
+    return _recorder
+
+
+def recording_enabled():
+    return _recorder is not None
+
+
+def configure_from_argv():
+    """Enables per-endpoint timing when --report PATH is given."""
+    report_path = get_flag_value("--report")
+    if report_path:
+        recorder = get_recorder()
+        atexit.register(recorder.write_report, report_path)
+        atexit.register(recorder.print_summary)
+
+
+def compare_reports(baseline_path, current_path):
+    """Prints per-endpoint p50/p95 changes between two JSON reports."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["endpoints"]
+    with open(current_path) as f:
+        current = json.load(f)["endpoints"]
+    print(f"--- Comparing {current_path} against {baseline_path} ---")
+    print(f"{'endpoint':<42}{'p50 ms':>16}{'p95 ms':>16}{'change':>9}")
+    for key in sorted(set(baseline) | set(current)):
+        if key not in baseline or key not in current:
+            side = "baseline" if key not in baseline else "current"
+            print(f"{key:<42}  (missing from {side})")
+            continue
+        old, new = baseline[key], current[key]
+        change = (
+            (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            if old["p95_ms"] else 0.0
+        )
+        print(f"{key:<42}{old['p50_ms']:>7.1f} -> {new['p50_ms']:<6.1f}"
+              f"{old['p95_ms']:>7.1f} -> {new['p95_ms']:<6.1f}{change:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    if "--compare" in sys.argv and len(sys.argv) >= 4:
+        index = sys.argv.index("--compare")
+        compare_reports(sys.argv[index + 1], sys.argv[index + 2])
+    else:
+        print("Usage: python metrics.py --compare BASELINE.json CURRENT.json")
+        sys.exit(2)
@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import api_client
+import environment
+
+# --- Configuration ---
+# Flags whose hooks live only in the parent process. Load processes would
+# either ignore them or write the same file from every process.
+PARENT_ONLY_FLAGS = ("--record", "--tail-logs", "--profile", "--compress",
+                     "--wire-stats")
+
+
+def default_process_count():
+    """One load process per CPU core."""
+    return os.cpu_count() or 1
+
+
+def split_evenly(total, parts):
+    """Splits total into `parts` integers that differ by at most one."""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+def check_worker_flags(processes):
+    """Exits with a usage error if a flag cannot work across processes.
+
+    With --local every process sends its load to the single stand-in
+    server in the parent, which then limits the result; that is allowed
+    but announced.
+    """
+    if processes <= 1:
+        return
+    unsupported = [flag for flag in PARENT_ONLY_FLAGS if flag in sys.argv]
+    if unsupported:
+        print(f"{', '.join(unsupported)} cannot be combined with "
+              f"--processes {processes}: load processes do not record, tail, "
+              f"profile or compress. Use --processes 1.")
+        sys.exit(2)
+    if "--local" in sys.argv:
+        print(f"Note: all {processes} processes share the one --local "
+              f"stand-in server in this process, so it may be the "
+              f"bottleneck. Start local_server.py separately to avoid that.\n")
+
+
+def configure_worker(base_url, pool_size):
+    """Points a load process at base_url with the parent's client flags.
+
+    spawn gives the worker the parent's sys.argv, so --timeout, --retry,
+    --adaptive and --pool-size are read again here.
+    """
+    environment.set_base_url(base_url)
+    api_client.configure_from_argv()
+    api_client.configure(pool_size=pool_size)
+
+
+def run_in_processes(func, arg_lists):
+    """Runs func(*args) once per entry in its own process, returning results.
+
+    Workers are started with the spawn method so they do not inherit the
+    parent's threads (such as a local stand-in server) or open sockets.
+    Everything passed in or returned must be picklable, and each worker
+    starts from freshly imported modules, so it has to set its own base
+    URL and client settings (configure_worker).
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(arg_lists), mp_context=context) as pool:
+        futures = [pool.submit(func, *args) for args in arg_lists]
+        return [future.result() for future in futures]
@@ -0,0 +1,269 @@
+import atexit
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+import api_client
+from cli import get_flag_value
+from metrics import LatencyHistogram
+
+# --- Configuration ---
+SATURATION_CPU = 0.85  # fraction of one core; Python code shares one GIL
+OVERHEAD_WARNING = 0.25  # harness CPU per request as a fraction of p50 latency
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 8
+TRACEMALLOC_FRAMES = 1
+CALIBRATION_CALLS = 20000
+
+# Where harness CPU goes, matched against a profile entry's file and name.
+# Checked in order; the first matching category wins.
+CPU_CATEGORIES = [
+    ("json encode/decode", ("/json/", "_json", "json.", "orjson")),
+    ("output and state writes", (
+        "builtins.print", "TextIOWrapper", "BufferedWriter", "posix.fsync",
+        "/logging/", "checkpoint.py", "/gzip.py", "zlib",
+    )),
+    # requests re-reads the proxy environment variables on every request,
+    # iterating all of os.environ (a collections.abc Mapping)
+    ("proxy/env lookups", (
+        "<frozen os>", "<frozen _collections_abc>", "/urllib/request.py",
+    )),
+    ("HTTP client stack", (
+        "/requests/", "/urllib3/", "/http/", "socket", "/ssl.py", "_ssl",
+        "selectors", "select.", "/email/", "/idna/", "/charset_normalizer/",
+    )),
+    ("metrics and hooks", (
+        "metrics.py", "log_tailer.py", "traffic.py", "profiler.py",
+    )),
+    ("threading and queues", ("threading.py", "/concurrent/", "queue.py", "_thread")),
+]
+
+
+def categorize(filename, name):
+    for category, patterns in CPU_CATEGORIES:
+        for pattern in patterns:
+            if pattern in filename or pattern in name:
+                return category
+    return "other harness code"
+
+
+def calibrate(calls=CALIBRATION_CALLS):
+    """Thread CPU a cProfile profiler adds to each profiled function call.
+
+    Runs the same loop of trivial calls with and without a profiler; the
+    report subtracts calls x this cost so the profiler's own work does not
+    pass for harness overhead.
+    """
+    def call():
+        pass
+
+    def loop():
+        for _ in range(calls):
+            call()
+
+    started = time.thread_time()
+    loop()
+    bare = time.thread_time() - started
+    profile = cProfile.Profile(time.thread_time)
+    started = time.thread_time()
+    profile.runcall(loop)
+    profiled = time.thread_time() - started
+    return max(profiled - bare, 0.0) / calls
+
+
+class ProfileSnapshot:
+    """A thread's profiler stats at one moment, for loading into pstats.Stats.
+
+    cProfile's disable() only stops the calling thread, and pstats.Stats
+    calls it on every profiler it loads, so other threads' profilers are
+    read through this instead; the ones still running keep counting, but
+    only into stats the report no longer reads.
+    """
+
+    def __init__(self, profile):
+        profile.snapshot_stats()
+        self.stats = profile.stats
+
+    def create_stats(self):
+        pass  # Already frozen; pstats.Stats calls this before reading stats
+
+
+class HarnessProfiler:
+    """Measures the harness's own CPU and memory while it sends requests.
+
+    Every thread gets its own cProfile profiler timed with thread CPU
+    time, so waiting on sockets or locks costs nothing and the totals are
+    what the client itself burned. tracemalloc follows allocations. The
+    report relates both to the number of requests and flags runs where
+    the client, not the server, was the bottleneck. Profiling adds CPU of
+    its own; its calibrated per-call cost is subtracted before judging
+    saturation.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.lock = threading.Lock()
+        self.profiles = []
+        self.thread_profile = threading.local()  # The calling thread's own
+        self.merged_stats = None
+        self.histogram = LatencyHistogram()
+        self.requests = 0
+        self.trace_memory = trace_memory
+        self.start_snapshot = None
+        self.end_snapshot = None
+
+    def start(self):
+        self.call_overhead = calibrate()
+        if self.trace_memory:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self.start_snapshot = tracemalloc.take_snapshot()
+        api_client.add_request_hook(self.record_request)
+        threading.setprofile(self.profile_thread)
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+        self.profile_thread()
+
+    def profile_thread(self, *args):
+        """Starts a profiler for the calling thread (threading.setprofile hook)."""
+        sys.setprofile(None)
+        if "process_request_thread" in threading.current_thread().name:
+            return  # A handler thread of the in-process --local server
+        profile = cProfile.Profile(time.thread_time)
+        with self.lock:
+            self.profiles.append(profile)
+        self.thread_profile.profile = profile
+        profile.enable()
+
+    def record_request(self, method, url, response, elapsed, streamed_bytes=None):
+        """api_client request hook."""
+        with self.lock:
+            self.requests += 1
+            self.histogram.record(elapsed)
+
+    def stop(self):
+        threading.setprofile(None)
+        self.elapsed = time.perf_counter() - self.started
+        self.cpu = time.process_time() - self.started_cpu
+        own = getattr(self.thread_profile, "profile", None)
+        if own:
+            own.disable()  # Only ever stops the calling thread's profiler
+        with self.lock:
+            snapshots = [ProfileSnapshot(p) for p in self.profiles if p.getstats()]
+        if snapshots:
+            self.merged_stats = pstats.Stats(*snapshots)
+        if self.trace_memory:
+            # Before any report work, so the stats merge is not counted
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            self.end_snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def stats(self):
+        """All threads' stats as of stop(), or None if nothing was profiled."""
+        return self.merged_stats
+
+    def report(self, stats_path=None):
+        self.stop()
+        requests = self.requests
+        print(f"\n--- Harness profile ({len(self.profiles)} threads profiled) ---")
+        stats = self.stats()
+        calls = sum(nc for _, nc, _, _, _ in stats.stats.values()) if stats else 0
+        overhead = min(calls * self.call_overhead, self.cpu)
+        cpu = self.cpu - overhead
+        utilisation = cpu / self.elapsed if self.elapsed else 0.0
+        per_request_ms = cpu / requests * 1000 if requests else 0.0
+        p50_ms = self.histogram.percentile(50) * 1000
+        print(f"{requests} requests in {self.elapsed:.1f}s; harness CPU "
+              f"{cpu:.2f}s ({utilisation * 100:.0f}% of one core), "
+              f"{per_request_ms:.2f}ms per request")
+        print(f"(excludes ~{overhead:.2f}s of profiler overhead: {calls} profiled "
+              f"calls at {self.call_overhead * 1e6:.2f}us)")
+        if requests:
+            print(f"Request latency p50 {p50_ms:.1f}ms, p99 "
+                  f"{self.histogram.percentile(99) * 1000:.1f}ms")
+        local = "--local" in sys.argv
+        if local:
+            print("Note: with --local the server runs in this process, so the "
+                  "CPU totals include it; function and category figures do not.")
+
+        if stats:
+            if stats_path:
+                stats.dump_stats(stats_path)
+                print(f"cProfile stats written to {stats_path}")
+            self.print_categories(stats, requests)
+            self.print_top_functions(stats)
+        if self.trace_memory:
+            self.print_memory(requests)
+
+        saturated = utilisation >= SATURATION_CPU
+        heavy = requests and p50_ms and per_request_ms >= p50_ms * OVERHEAD_WARNING
+        if local:
+            # Server and harness share the CPU totals (and the GIL)
+            print("\nNo saturation verdict with --local: start local_server.py "
+                  "separately and point the harness at it to get one.")
+        elif saturated:
+            print(f"\n!!! Client saturated: the harness used {utilisation * 100:.0f}% "
+                  f"of a core. Latency and throughput include client-side "
+                  f"queueing; use fewer workers per process or --processes. !!!")
+        elif heavy:
+            print(f"\n!!! Harness overhead is {per_request_ms / p50_ms * 100:.0f}% of "
+                  f"p50 latency; small latencies are inflated by the client. !!!")
+        else:
+            print("\nClient not saturated: latencies reflect the server and "
+                  "network, not the harness.")
+
+    def print_categories(self, stats, requests):
+        totals = {}
+        for (filename, _, name), (_, _, tottime, _, _) in stats.stats.items():
+            category = categorize(filename, name)
+            totals[category] = totals.get(category, 0.0) + tottime
+        profiled = sum(totals.values())
+        print(f"\n{'CPU by category':<28}{'secs':>8}{'share':>8}{'per req ms':>12}")
+        for category, seconds in sorted(totals.items(), key=lambda kv: -kv[1]):
+            print(f"{category:<28}{seconds:>8.2f}"
+                  f"{seconds / profiled * 100 if profiled else 0:>7.0f}%"
+                  f"{seconds / requests * 1000 if requests else 0:>12.3f}")
+
+    def print_top_functions(self, stats):
+        rows = sorted(stats.stats.items(), key=lambda kv: -kv[1][2])
+        print(f"\n{'Top functions by own CPU':<60}{'calls':>10}{'secs':>8}")
+        for (filename, lineno, name), (_, calls, tottime, _, _) in rows[:TOP_FUNCTIONS]:
+            where = name if filename == "~" else (
+                f"{name} ({os.path.basename(filename)}:{lineno})"
+            )
+            print(f"{where[:59]:<60}{calls:>10}{tottime:>8.3f}")
+
+    def print_memory(self, requests):
+        ignore = [
+            tracemalloc.Filter(False, pattern)
+            for pattern in (tracemalloc.__file__, cProfile.__file__, __file__)
+        ]
+        snapshot = self.end_snapshot.filter_traces(ignore)
+        start_snapshot = self.start_snapshot.filter_traces(ignore)
+        growth = sum(
+            stat.size_diff for stat in snapshot.compare_to(start_snapshot, "filename")
+        )
+        print(f"\nMemory: peak {self.peak_memory / 1024 / 1024:.1f} MiB traced, "
+              f"{growth / 1024:.0f} KiB retained"
+              + (f" ({growth / requests:.0f} bytes per request)" if requests else ""))
+        print(f"{'Largest allocation growth':<60}{'KiB':>10}{'blocks':>8}")
+        for stat in snapshot.compare_to(start_snapshot, "lineno")[:TOP_ALLOCATIONS]:
+            frame = stat.traceback[0]
+            where = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+            print(f"{where:<60}{stat.size_diff / 1024:>10.1f}{stat.count_diff:>8}")
+
+
+def configure_from_argv():
+    """Enables --profile: harness CPU, allocations and client saturation.
+
+    --profile-out PATH also saves the merged cProfile stats (for pstats
+    or snakeviz); --no-tracemalloc skips allocation tracking.
+    """
+    if "--profile" not in sys.argv:
+        return None
+    profiler = HarnessProfiler(trace_memory="--no-tracemalloc" not in sys.argv)
+    profiler.start()
+    atexit.register(profiler.report, get_flag_value("--profile-out"))
+    return profiler
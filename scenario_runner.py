@@ -0,0 +1,417 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+import api_client
+import environment
+import test_10_FE_prep as fe_prep
+from bench_heartbeat import seed_reading_streams
+from cli import get_flag_value
+from content_generator import ContentGenerator
+from load_driver import OPERATIONS, Workload
+from metrics import LatencyHistogram
+
+# --- Configuration ---
+SCENARIO_DIR = "scenarios"
+DEFAULT_DURATION = 30.0  # seconds, when a scenario does not set one
+DEFAULT_STREAMS = 20
+DEFAULT_DROPS_PER_STREAM = 50
+DEFAULT_PAGE_SIZE = 10
+REPORT_INTERVAL = 5.0  # seconds between progress lines
+
+
+# --- Distributions: {"distribution": name, ...parameters} or a bare number ---
+def make_sampler(spec, field):
+    """Builds rng -> value from a scenario distribution spec."""
+    if isinstance(spec, (int, float)):
+        return lambda rng: spec
+    kind = spec.get("distribution", "fixed")
+    if kind == "fixed":
+        value = spec["value"]
+        return lambda rng: value
+    if kind == "uniform":
+        low, high = spec["min"], spec["max"]
+        return lambda rng: rng.uniform(low, high)
+    if kind == "exponential":
+        mean = spec["mean"]
+        return lambda rng: rng.expovariate(1 / mean) if mean else 0.0
+    if kind == "beta":
+        alpha, beta = spec["alpha"], spec["beta"]
+        return lambda rng: rng.betavariate(alpha, beta)
+    if kind == "choice":
+        values = [float(value) for value in spec["values"]]
+        weights = list(spec["values"].values())
+        return lambda rng: rng.choices(values, weights)[0]
+    raise ValueError(f"{field}: unknown distribution '{kind}'")
+
+
+class Population:
+    """A group of identical virtual users from a scenario file."""
+
+    def __init__(self, spec, scenario_duration):
+        self.name = spec["name"]
+        self.users = spec["users"]
+        self.mix = spec["mix"]
+        unknown = set(self.mix) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(
+                f"population '{self.name}': unknown operations "
+                f"{', '.join(sorted(unknown))}"
+            )
+        self.names = list(self.mix)
+        self.weights = [self.mix[name] for name in self.names]
+        # update_progress on a stream opened at reading depth 0 only looks
+        # at its first page; those requests are reported separately
+        self.recorded_names = self.names + (
+            ["open_stream"] if "update_progress" in self.mix else []
+        )
+        self.think_time = make_sampler(
+            spec.get("think_time", 0), f"{self.name}.think_time"
+        )
+        self.reading_depth = make_sampler(
+            spec.get("reading_depth", 1.0), f"{self.name}.reading_depth"
+        )
+        self.start = spec.get("start", 0.0)
+        self.duration = spec.get("duration", scenario_duration - self.start)
+        self.ramp_up = spec.get("ramp_up", 0.0)
+        self.batch_size = spec.get("batch_size", 1)
+        self.page_size = spec.get("page_size", DEFAULT_PAGE_SIZE)
+
+
+class Scenario:
+    """A named workload: dataset size, duration and user populations."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.description = spec.get("description", "")
+        self.duration = spec.get("duration", DEFAULT_DURATION)
+        dataset = spec.get("dataset", {})
+        self.streams = dataset.get("streams", DEFAULT_STREAMS)
+        self.drops_per_stream = dataset.get(
+            "drops_per_stream", DEFAULT_DROPS_PER_STREAM
+        )
+        self.populations = [
+            Population(population, self.duration)
+            for population in spec["populations"]
+        ]
+
+    @property
+    def total_users(self):
+        return sum(population.users for population in self.populations)
+
+
+def scenario_path(name):
+    """Resolves a scenario name (or a path to a JSON file)."""
+    if name.endswith(".json") or os.sep in name:
+        return name
+    return os.path.join(SCENARIO_DIR, f"{name}.json")
+
+
+def load_scenario(name):
+    path = scenario_path(name)
+    with open(path) as f:
+        spec = json.load(f)
+    return Scenario(os.path.splitext(os.path.basename(path))[0], spec)
+
+
+def list_scenarios():
+    names = sorted(
+        os.path.splitext(f)[0] for f in os.listdir(SCENARIO_DIR)
+        if f.endswith(".json")
+    )
+    for name in names:
+        scenario = load_scenario(name)
+        print(f"{name:<16}{scenario.total_users:>6} users  {scenario.description}")
+
+
+class VirtualUser:
+    """One scenario user: its own ID, reading position and random stream.
+
+    A user opens a stream, reads it up to a depth drawn from the
+    population's reading-depth distribution (1.0 finishes it), then moves
+    on to another stream. At depth 0.0 the user only opens the stream,
+    looks at its first page and leaves without recording progress.
+    """
+
+    def __init__(self, user_id, population, workload, content, rng):
+        self.user_id = user_id
+        self.population = population
+        self.workload = workload
+        self.content = content
+        self.rng = rng
+        self.uploads = 0
+        self.open_stream()
+
+    def open_stream(self):
+        self.stream_id, self.drops = self.rng.choice(self.workload.streams)
+        depth = min(max(self.population.reading_depth(self.rng), 0.0), 1.0)
+        self.target = round(depth * len(self.drops))
+        self.position = 0
+        self.finished = False
+
+    def wants_progress(self):
+        """Whether the next read records progress.
+
+        Opens another stream once the current one is read to its target.
+        False for a stream opened at depth 0, which is then finished.
+        """
+        if self.finished:
+            self.open_stream()
+        if not self.target:
+            self.finished = True
+            return False
+        return True
+
+    def next_drop(self):
+        """Advances one drop; call wants_progress() first."""
+        drop_id, placement_id = self.drops[self.position]
+        self.position += 1
+        self.finished = self.position >= self.target
+        return drop_id, placement_id
+
+
+# --- Operations that depend on the user's own state; the rest come from
+# load_driver.OPERATIONS and draw from the shared workload ---
+def user_get_river(user):
+    return api_client.get(
+        f"{environment.API_V1_URL}/user/river",
+        params={"limit": 30},
+        headers={"X-User-Id": user.user_id}
+    )
+
+
+def user_get_stream_drops(user):
+    _, placement_id = user.drops[min(user.position, len(user.drops) - 1)]
+    return api_client.get(
+        f"{environment.API_V1_URL}/streams/{user.stream_id}/drops",
+        params={"from_placement_id": placement_id,
+                "limit": user.population.page_size}
+    )
+
+
+def user_update_progress(user):
+    drop_id, placement_id = user.next_drop()
+    return api_client.post(
+        f"{environment.API_V1_URL}/user/progress",
+        json={
+            "pool_id": user.workload.pool_id,
+            "stream_id": user.stream_id,
+            "drop_id": drop_id,
+            "placement_id": placement_id,
+        },
+        headers={"X-User-Id": user.user_id}
+    )
+
+
+def user_add_drops(user):
+    stream_id, _ = user.rng.choice(user.workload.streams)
+    key = f"{user.user_id}.{user.uploads}"
+    user.uploads += 1
+    return api_client.post(
+        f"{environment.API_V1_URL}/streams/{stream_id}/drops",
+        json={
+            "drops": list(user.content.drops(key, 0, user.population.batch_size)),
+            "creator_id": fe_prep.CREATOR_ID,
+        }
+    )
+
+
+USER_OPERATIONS = {
+    "get_river": user_get_river,
+    "get_stream_drops": user_get_stream_drops,
+    "update_progress": user_update_progress,
+    "add_drops": user_add_drops,
+}
+
+
+class ScenarioRunner:
+    """Runs a scenario's populations as closed-loop virtual users.
+
+    Each user picks an operation from its population's weighted mix,
+    waits for the response, then sleeps for a think time drawn from the
+    population's distribution. Populations can start late, run for part of
+    the scenario and ramp their users in, which is how bursts are modelled.
+    """
+
+    def __init__(self, scenario, workload, seed=0):
+        self.scenario = scenario
+        self.workload = workload
+        self.rng = random.Random(seed)
+        self.content = ContentGenerator(seed)
+        self.lock = threading.Lock()
+        self.histograms = {
+            p.name: {name: LatencyHistogram() for name in p.recorded_names}
+            for p in scenario.populations
+        }
+        self.errors = {
+            p.name: {name: 0 for name in p.recorded_names}
+            for p in scenario.populations
+        }
+        self.failure_reasons = {}  # (population, operation, reason) -> count
+
+    def run_user(self, user, stop_at):
+        population = user.population
+        rng = user.rng
+        while time.perf_counter() < stop_at:
+            name = rng.choices(population.names, population.weights)[0]
+            if name == "update_progress" and not user.wants_progress():
+                name = "open_stream"
+            sent = time.perf_counter()
+            reason = None
+            try:
+                if name == "open_stream":
+                    response = user_get_stream_drops(user)
+                elif name in USER_OPERATIONS:
+                    response = USER_OPERATIONS[name](user)
+                else:
+                    response = OPERATIONS[name](user.workload, rng)
+                if response.status_code >= 400:
+                    reason = f"HTTP {response.status_code}"
+            except requests.exceptions.RequestException as e:
+                reason = type(e).__name__
+            latency = time.perf_counter() - sent
+            with self.lock:
+                self.histograms[population.name][name].record(latency)
+                if reason:
+                    self.errors[population.name][name] += 1
+                    key = (population.name, name, reason)
+                    self.failure_reasons[key] = self.failure_reasons.get(key, 0) + 1
+            pause = min(population.think_time(rng), stop_at - time.perf_counter())
+            if pause > 0:
+                time.sleep(pause)
+
+    def start_user(self, user, index, started):
+        population = user.population
+        offset = population.start
+        if population.users > 1:
+            offset += population.ramp_up * index / population.users
+        delay = started + offset - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.run_user(user, started + population.start + population.duration)
+
+    def run(self):
+        scenario = self.scenario
+        print(f"--- Scenario '{scenario.name}': {scenario.total_users} users for "
+              f"{scenario.duration:g}s ---")
+        if scenario.description:
+            print(scenario.description)
+        run_id = uuid.uuid4().hex[:8]
+        users = [
+            (VirtualUser(f"scenario_{run_id}_{p.name}_{i}", p, self.workload,
+                         self.content, random.Random(self.rng.getrandbits(32))), i)
+            for p in scenario.populations
+            for i in range(p.users)
+        ]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(users)) as executor:
+            futures = [
+                executor.submit(self.start_user, user, index, started)
+                for user, index in users
+            ]
+            next_report = started + REPORT_INTERVAL
+            pending = set(futures)
+            while pending:
+                _, pending = wait(
+                    pending, timeout=max(next_report - time.perf_counter(), 0)
+                )
+                now = time.perf_counter()
+                if now >= next_report:
+                    self.print_progress(now - started)
+                    next_report += REPORT_INTERVAL
+            for future in futures:
+                future.result()
+        return self.summary(time.perf_counter() - started)
+
+    def print_progress(self, elapsed):
+        with self.lock:
+            completed = sum(
+                h.total for ops in self.histograms.values() for h in ops.values()
+            )
+            errors = sum(e for ops in self.errors.values() for e in ops.values())
+        print(f"  [{elapsed:6.1f}s] {completed} requests, {errors} errors")
+
+    def summary(self, elapsed):
+        total = LatencyHistogram()
+        total_errors = 0
+        print(f"\n{'population':<14}{'operation':<18}{'count':>7}{'req/s':>8}"
+              f"{'err':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for population in self.scenario.populations:
+            for name in population.recorded_names:
+                histogram = self.histograms[population.name][name]
+                errors = self.errors[population.name][name]
+                total.merge(histogram)
+                total_errors += errors
+                if not histogram.total:
+                    continue
+                print(f"{population.name:<14}{name:<18}{histogram.total:>7}"
+                      f"{histogram.total / elapsed:>8.1f}{errors:>6}"
+                      f"{histogram.percentile(50) * 1000:>9.1f}"
+                      f"{histogram.percentile(95) * 1000:>9.1f}"
+                      f"{histogram.percentile(99) * 1000:>9.1f}")
+        print(f"{'ALL':<32}{total.total:>7}{total.total / elapsed:>8.1f}"
+              f"{total_errors:>6}{total.percentile(50) * 1000:>9.1f}"
+              f"{total.percentile(95) * 1000:>9.1f}"
+              f"{total.percentile(99) * 1000:>9.1f}")
+        if self.failure_reasons:
+            print("\nFailures:")
+            for (population, name, reason), count in sorted(
+                self.failure_reasons.items(), key=lambda item: -item[1]
+            ):
+                print(f"  {population} {name}: {reason} x{count}")
+        return {
+            "elapsed_seconds": elapsed,
+            "completed": total.total,
+            "errors": total_errors,
+        }
+
+
+def main():
+    if "--list" in sys.argv:
+        list_scenarios()
+        return
+    name = get_flag_value("--scenario")
+    if not name:
+        print("Usage: python scenario_runner.py --scenario NAME [--local|--live] "
+              "(--list shows the available scenarios)")
+        sys.exit(2)
+    try:
+        scenario = load_scenario(name)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Could not load scenario '{name}': {e}")
+        sys.exit(2)
+    duration = get_flag_value("--duration", None, float)
+    if duration:
+        # Stretch or shrink every population's timeline proportionally
+        factor = duration / scenario.duration
+        scenario.duration = duration
+        for population in scenario.populations:
+            population.start *= factor
+            population.duration *= factor
+            population.ramp_up *= factor
+
+    fe_prep.configure_from_argv()
+    api_client.configure(pool_size=scenario.total_users)
+    try:
+        pool_id, streams = seed_reading_streams(
+            scenario.streams, scenario.drops_per_stream
+        )
+    except requests.exceptions.RequestException as e:
+        print(f"\n!!! Error occurred while seeding: {e}")
+        sys.exit(1)
+    workload = Workload(pool_id, streams, users=[])
+    result = ScenarioRunner(
+        scenario, workload, get_flag_value("--seed", 0, int)
+    ).run()
+    sys.exit(1 if result["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
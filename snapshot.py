@@ -0,0 +1,495 @@
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+import api_client
+import environment
+import streaming
+import test_10_FE_prep as fe_prep
+from checkpoint import CheckpointJournal
+from cli import get_flag_value
+from content_generator import DEFAULT_MAX_BATCH_BYTES, payload_size
+
+# --- Configuration ---
+SNAPSHOT_FORMAT = "wisdom-pool-snapshot"
+SNAPSHOT_VERSION = 1
+DEFAULT_EXPORT_WORKERS = 8
+DEFAULT_RESTORE_WORKERS = 16
+DEFAULT_PAGE_LIMIT = 1000
+DEFAULT_RESTORE_BATCH_SIZE = 1000
+RIVER_LIMIT = 30
+COMPRESS_LEVEL = 6
+
+# A snapshot is gzip-compressed JSON lines:
+#
+#   {"format": ..., "version": 1, "pool": {...}, ...}      header
+#   {"stream": i, "content": {...}, "drops": n, "marks": [positions]}
+#   {"drops": [{...}, ...]}                                 drops of stream i
+#   ...                                                     next stream
+#   {"progress": {"user_id": u, "stream": i, "position": p}}
+#   {"end": {"streams": s, "drops": d, "progress": r}}
+#
+# Each stream's drops follow its own line in list order, so restore can
+# append them as it reads. "marks" are the positions user progress points
+# at; restore keeps placement IDs for those positions only. Progress
+# lines are oldest first so replaying them rebuilds each river's order.
+
+
+def write_line(f, record):
+    f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def fetch_json(url, **kwargs):
+    response = api_client.get(url, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+def export_stream(stream_id, pool_id, marked, tmp_path, page_limit):
+    """Pages one stream's drops into tmp_path in list order.
+
+    Returns the stream content, its drop count and the positions of the
+    placements in `marked`.
+    """
+    stream = fetch_json(f"{environment.API_V1_URL}/streams/{stream_id}")
+    if stream.get("pool_id") != pool_id:
+        raise ValueError(f"Stream {stream_id} belongs to pool {stream.get('pool_id')}")
+    positions = {}
+    count = 0
+    cursor = None
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        while True:
+            params = {"limit": page_limit}
+            if cursor:
+                params["from_placement_id"] = cursor
+            page = streaming.get_page(
+                f"{environment.API_V1_URL}/streams/{stream_id}/drops", params=params
+            )
+            contents = []
+            last = None
+            with page:
+                for drop in page:  # Keeps only the content of each drop
+                    contents.append(drop["content"])
+                    if drop["placement_id"] in marked:
+                        positions[drop["placement_id"]] = count
+                    count += 1
+                    last = drop
+            if contents:
+                write_line(f, {"drops": contents})
+            cursor = last.get("next_placement_id") if last else None
+            if not page.fields.get("has_more") or not cursor:
+                break
+    return stream["content"], count, positions
+
+
+def export_snapshot(path, pool_id, stream_ids, user_ids=(),
+                    workers=DEFAULT_EXPORT_WORKERS, page_limit=DEFAULT_PAGE_LIMIT):
+    """Writes a pool, the given streams and users' progress to a snapshot.
+
+    The API cannot list a pool's streams, so the caller names them. Streams
+    are paged in parallel into temporary files, then copied into the
+    compressed snapshot one after another; the snapshot appears atomically
+    once complete.
+    """
+    print(f"--- Exporting pool {pool_id}: {len(stream_ids)} streams, "
+          f"{len(user_ids)} users -> {path} ---")
+    started = time.perf_counter()
+    pool = fetch_json(f"{environment.API_V1_URL}/pools/{pool_id}")
+    stream_keys = {stream_id: i for i, stream_id in enumerate(stream_ids)}
+    rivers = {}
+    marked = {}  # stream_id -> placement_ids that user progress points at
+    for user_id in user_ids:
+        records = fetch_json(
+            f"{environment.API_V1_URL}/user/river", params={"limit": RIVER_LIMIT},
+            headers={"X-User-Id": user_id}
+        ).get("records", [])
+        rivers[user_id] = [r for r in records if r["stream_id"] in stream_keys]
+        for record in rivers[user_id]:
+            marked.setdefault(record["stream_id"], set()).add(
+                record["last_read_placement_id"]
+            )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_dir = tempfile.mkdtemp(prefix=".snapshot-", dir=directory)
+    tmp_path = f"{path}.tmp"
+    total_drops = 0
+    positions = {}
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    export_stream, stream_id, pool_id,
+                    marked.get(stream_id, set()),
+                    os.path.join(tmp_dir, f"{i}.jsonl"), page_limit,
+                )
+                for i, stream_id in enumerate(stream_ids)
+            ]
+            with gzip.open(tmp_path, "wt", encoding="utf-8",
+                           compresslevel=COMPRESS_LEVEL) as out:
+                write_line(out, {
+                    "format": SNAPSHOT_FORMAT,
+                    "version": SNAPSHOT_VERSION,
+                    "exported_at": datetime.now(timezone.utc).isoformat(),
+                    "source": environment.BASE_URL,
+                    "pool": pool["content"],
+                })
+                for i, future in enumerate(futures):
+                    content, count, stream_positions = future.result()
+                    positions.update(stream_positions)
+                    write_line(out, {
+                        "stream": i,
+                        "content": content,
+                        "drops": count,
+                        "marks": sorted(stream_positions.values()),
+                    })
+                    stream_file = os.path.join(tmp_dir, f"{i}.jsonl")
+                    with open(stream_file, "r", encoding="utf-8") as f:
+                        shutil.copyfileobj(f, out)
+                    os.remove(stream_file)
+                    total_drops += count
+                progress_count = 0
+                skipped = []
+                for user_id, records in rivers.items():
+                    for record in reversed(records):  # Oldest first
+                        if record["last_read_placement_id"] not in positions:
+                            # Progress points past what the export read
+                            skipped.append((user_id, record))
+                            continue
+                        write_line(out, {"progress": {
+                            "user_id": user_id,
+                            "stream": stream_keys[record["stream_id"]],
+                            "position": positions[record["last_read_placement_id"]],
+                        }})
+                        progress_count += 1
+                write_line(out, {"end": {
+                    "streams": len(stream_ids),
+                    "drops": total_drops,
+                    "progress": progress_count,
+                }})
+        os.replace(tmp_path, path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    for user_id, record in skipped:
+        print(f"  Skipped progress of {user_id} in stream {record['stream_id']}: "
+              f"placement {record['last_read_placement_id']} is not in the "
+              f"exported stream")
+    elapsed = time.perf_counter() - started
+    print(f"Exported {len(stream_ids)} streams, {total_drops} drops and "
+          f"{progress_count} progress records in {elapsed:.1f}s "
+          f"({os.path.getsize(path) / 1024:.0f} KiB compressed)")
+
+
+def read_snapshot(path):
+    """Yields snapshot records, checking the header first."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not a Wisdom Pool snapshot")
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} is snapshot version {header.get('version')}, "
+                             f"expected {SNAPSHOT_VERSION}")
+        yield header
+        for line in f:
+            yield json.loads(line)
+
+
+def append_batch(stream_id, batch, expected_before):
+    """Appends one batch, reconciling against the server count on errors.
+
+    Adding drops is not idempotent, so after a failure the stream's
+    total_count decides whether the batch landed. Returns the batch's
+    (drop_id, placement_id) pairs when the server reported them.
+    """
+    failures = 0
+    while True:
+        try:
+            drop_ids, placement_ids = fe_prep.add_drops_to_stream(
+                stream_id, batch, verbose=False, chunk_size=len(batch)
+            )
+            return list(zip(drop_ids, placement_ids))
+        except requests.exceptions.RequestException as e:
+            failures += 1
+            if (fe_prep.is_permanent_failure(e)
+                    or failures >= fe_prep.MAX_SEED_ATTEMPTS):
+                raise
+            fe_prep.seed_backoff(failures)
+            count = fe_prep.get_stream_drop_count(stream_id)
+            if count >= expected_before + len(batch):
+                return None  # It landed; its IDs are unknown
+            if count != expected_before:
+                raise RuntimeError(
+                    f"Stream {stream_id} holds {count} drops, expected "
+                    f"{expected_before} or {expected_before + len(batch)}"
+                )
+
+
+class StreamRestore:
+    """Recreates one stream from the batches the reader spooled for it."""
+
+    def __init__(self, pool_id, record, spool_path):
+        self.pool_id = pool_id
+        self.key = record["stream"]
+        self.content = record["content"]
+        self.expected = record["drops"]
+        self.marks = set(record.get("marks", []))
+        self.spool_path = spool_path  # One JSON batch per line
+        self.stream_id = None
+        self.marked_placements = {}  # position -> (drop_id, placement_id)
+
+    def restore(self, progress):
+        self.stream_id = fe_prep.retry_create(self.create_stream)
+        progress.add(streams=1)
+        added = 0
+        with open(self.spool_path, encoding="utf-8") as spool:
+            for line in spool:
+                batch = json.loads(line)
+                drops = append_batch(self.stream_id, batch, added)
+                wanted = [p for p in self.marks if added <= p < added + len(batch)]
+                if wanted and drops is None:
+                    drops = self.drops_from(added, len(batch))
+                for position in wanted:
+                    self.marked_placements[position] = drops[position - added]
+                added += len(batch)
+                progress.add(drops=len(batch))
+        if added != self.expected:
+            raise RuntimeError(f"Stream {self.key}: restored {added} drops, "
+                               f"snapshot has {self.expected}")
+        return self
+
+    def create_stream(self):
+        response = api_client.post(f"{environment.API_V1_URL}/streams", json={
+            "stream_content": self.content,
+            "pool_id": self.pool_id,
+            "creator_id": fe_prep.CREATOR_ID,
+        })
+        response.raise_for_status()
+        return response.json()["stream_id"]
+
+    def drops_from(self, start, count):
+        """Reads back the IDs of a batch whose response was lost."""
+        placements = []
+        cursor = None
+        while len(placements) < start + count:
+            params = {"limit": DEFAULT_PAGE_LIMIT}
+            if cursor:
+                params["from_placement_id"] = cursor
+            payload = fetch_json(
+                f"{environment.API_V1_URL}/streams/{self.stream_id}/drops", params=params
+            )
+            drops = payload.get("drops", [])
+            placements.extend(
+                (drop["drop_id"], drop["placement_id"]) for drop in drops
+            )
+            cursor = drops[-1].get("next_placement_id") if drops else None
+            if not cursor:
+                break
+        return placements[start:start + count]
+
+
+def restore_snapshot(path, workers=DEFAULT_RESTORE_WORKERS,
+                     batch_size=DEFAULT_RESTORE_BATCH_SIZE):
+    """Recreates a snapshot's pool, streams, drops and user progress.
+
+    The reader streams the file once, spooling each stream's batches to
+    its own temporary file, and hands a stream to a worker as soon as its
+    last drop is spooled. Up to `workers` streams then append in parallel,
+    each reading its spool independently, so the reader never waits on a
+    deep stream; the spools take about the snapshot's uncompressed size on
+    disk. A stream's batches go out in order and hold up to batch_size
+    drops and ~1 MB of JSON. Progress is replayed once every stream is
+    complete. Returns the new pool_id and stream IDs in snapshot order.
+    """
+    records = read_snapshot(path)
+    header = next(records)
+    print(f"--- Restoring {path} (exported {header.get('exported_at')} from "
+          f"{header.get('source')}) with {workers} workers ---")
+    started = time.perf_counter()
+    response = api_client.post(f"{environment.API_V1_URL}/pools", json={
+        "pool_content": header["pool"],
+        "creator_id": fe_prep.CREATOR_ID,
+    })
+    response.raise_for_status()
+    pool_id = response.json()["pool_id"]
+
+    progress = fe_prep.SeedProgress(0, 0)
+    progress.add(pools=1)
+    failed = threading.Event()
+    restores = {}
+    futures = []
+    progress_records = []
+    trailer = None
+    current = None
+    spool = None
+    batch = []
+    batch_bytes = 0
+
+    def run_restore(restore):
+        try:
+            return restore.restore(progress)
+        except BaseException:
+            failed.set()
+            raise
+
+    def flush():
+        nonlocal batch, batch_bytes
+        if batch:
+            write_line(spool, batch)
+        batch, batch_bytes = [], 0
+
+    def finish_stream():
+        nonlocal spool
+        if current is not None:
+            flush()
+            spool.close()
+            spool = None
+            futures.append(executor.submit(run_restore, current))
+
+    spool_dir = tempfile.mkdtemp(prefix="snapshot-restore-")
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                for record in records:
+                    if failed.is_set():
+                        break  # The failing stream's error is raised below
+                    if "stream" in record:
+                        finish_stream()
+                        current = StreamRestore(
+                            pool_id, record,
+                            os.path.join(spool_dir, f"{record['stream']}.jsonl"),
+                        )
+                        restores[current.key] = current
+                        progress.total_streams += 1
+                        progress.total_drops += current.expected
+                        spool = open(current.spool_path, "w", encoding="utf-8")
+                    elif "drops" in record:
+                        for drop in record["drops"]:
+                            size = payload_size(drop)
+                            if batch and (len(batch) >= batch_size
+                                          or batch_bytes + size > DEFAULT_MAX_BATCH_BYTES):
+                                flush()
+                            batch.append(drop)
+                            batch_bytes += size
+                    elif "progress" in record:
+                        progress_records.append(record["progress"])
+                    elif "end" in record:
+                        trailer = record["end"]
+                finish_stream()
+            finally:
+                if spool is not None:
+                    spool.close()
+            for future in futures:
+                future.result()
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+    if trailer is None:
+        raise ValueError(f"{path} is truncated: no end record")
+    if trailer["streams"] != len(restores):
+        raise ValueError(f"{path} lists {trailer['streams']} streams, "
+                         f"found {len(restores)}")
+
+    by_user = {}
+    for record in progress_records:
+        by_user.setdefault(record["user_id"], []).append(record)
+
+    def replay(user_records):
+        for record in user_records:
+            restore = restores[record["stream"]]
+            drop_id, placement_id = restore.marked_placements[record["position"]]
+            fe_prep.update_user_progress(
+                pool_id, restore.stream_id, drop_id, placement_id,
+                user_id=record["user_id"]
+            )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(replay, by_user.values()):
+            pass
+
+    progress.report()
+    elapsed = time.perf_counter() - started
+    print(f"Restored pool {pool_id}: {len(restores)} streams, "
+          f"{trailer['drops']} drops and {len(progress_records)} progress "
+          f"records in {elapsed:.1f}s")
+    return pool_id, [restores[key].stream_id for key in sorted(restores)]
+
+
+def streams_from_checkpoint(path, pool_index):
+    """Returns (pool_id, stream_ids) for one pool of a seeding checkpoint."""
+    journal = CheckpointJournal(path)
+    try:
+        state = journal.state
+        pool_id = state.get("pools", {}).get(str(pool_index))
+        streams = sorted(
+            ((int(key.split(".")[1]), record["stream_id"])
+             for key, record in state.get("streams", {}).items()
+             if key.split(".")[0] == str(pool_index)),
+        )
+    finally:
+        journal.close()
+    if not pool_id:
+        raise ValueError(f"{path} has no pool {pool_index}")
+    return pool_id, [stream_id for _, stream_id in streams]
+
+
+def main():
+    fe_prep.configure_from_argv()
+    if "--no-retry" not in sys.argv:
+        api_client.enable_retries(get_flag_value("--max-attempts", None, int))
+    export_path = get_flag_value("--export")
+    restore_path = get_flag_value("--restore")
+    if not export_path and not restore_path:
+        print("Usage: python snapshot.py --export PATH (--fe-test | --pool-id ID "
+              "--stream-ids A,B | --checkpoint PATH [--pool-index N]) "
+              "[--user-ids U1,U2]\n"
+              "       python snapshot.py --restore PATH [--workers N] "
+              "[--batch-size N]")
+        sys.exit(2)
+    try:
+        if export_path:
+            user_ids = get_flag_value("--user-ids", "")
+            user_ids = user_ids.split(",") if user_ids else []
+            if "--fe-test" in sys.argv:
+                pool_id, stream_ids = fe_prep.create_test_data()
+                user_ids = user_ids or [fe_prep.TEST_USER_ID]
+            elif get_flag_value("--checkpoint"):
+                pool_id, stream_ids = streams_from_checkpoint(
+                    get_flag_value("--checkpoint"),
+                    get_flag_value("--pool-index", 0, int),
+                )
+            else:
+                pool_id = get_flag_value("--pool-id")
+                stream_ids = get_flag_value("--stream-ids", "").split(",")
+                if not pool_id or not stream_ids[0]:
+                    print("--export needs --fe-test, --checkpoint or "
+                          "--pool-id with --stream-ids")
+                    sys.exit(2)
+            workers = get_flag_value("--workers", DEFAULT_EXPORT_WORKERS, int)
+            api_client.configure(pool_size=workers)
+            export_snapshot(export_path, pool_id, stream_ids, user_ids, workers,
+                            get_flag_value("--page-limit", DEFAULT_PAGE_LIMIT, int))
+        else:
+            workers = get_flag_value("--workers", DEFAULT_RESTORE_WORKERS, int)
+            api_client.configure(pool_size=workers)
+            restore_snapshot(
+                restore_path, workers,
+                get_flag_value("--batch-size", DEFAULT_RESTORE_BATCH_SIZE, int),
+            )
+    except (requests.exceptions.RequestException, ValueError, RuntimeError,
+            OSError) as e:
+        print(f"\n!!! Snapshot failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import threading
+from collections import OrderedDict
+
+import streaming
+
+# --- Configuration ---
+DEFAULT_MAX_DROPS = 1_000_000  # cached drops across all streams
+DEFAULT_PAGE_LIMIT = 100
+
+
+class StreamIndex:
+    """Drops of one stream in list order, indexed both ways."""
+
+    def __init__(self, stream_id):
+        self.stream_id = stream_id
+        self.placement_by_drop = {}
+        self.drop_by_placement = {}
+        self.order = []  # placement_ids, first to last
+
+    def __len__(self):
+        return len(self.order)
+
+    def add(self, drop_id, placement_id):
+        if placement_id in self.drop_by_placement:
+            return
+        self.placement_by_drop[drop_id] = placement_id
+        self.drop_by_placement[placement_id] = drop_id
+        self.order.append(placement_id)
+
+    def records(self):
+        """Returns [(drop_id, placement_id), ...] in reading order."""
+        return [(self.drop_by_placement[p], p) for p in self.order]
+
+
+class StreamCache:
+    """LRU cache of fully paged streams for O(1) drop/placement lookups.
+
+    A stream is loaded by following next_placement_id cursors across all of
+    its pages. A lookup miss on a cached stream only fetches drops appended
+    after the last cached placement. Least recently used streams are evicted
+    once the total number of cached drops exceeds max_drops.
+    """
+
+    def __init__(self, api_v1_url, max_drops=DEFAULT_MAX_DROPS,
+                 page_limit=DEFAULT_PAGE_LIMIT):
+        self.api_v1_url = api_v1_url
+        self.max_drops = max_drops
+        self.page_limit = page_limit
+        self.lock = threading.RLock()
+        self.streams = OrderedDict()
+        self.cached_drops = 0
+        self.hits = 0
+        self.misses = 0
+        self.pages_fetched = 0
+
+    def _fetch_pages(self, index, from_placement_id=None):
+        """Appends every drop from from_placement_id (inclusive) to the end."""
+        cursor = from_placement_id
+        while True:
+            params = {"limit": self.page_limit}
+            if cursor:
+                params["from_placement_id"] = cursor
+            page = streaming.get_page(
+                f"{self.api_v1_url}/streams/{index.stream_id}/drops",
+                params=params
+            )
+            self.pages_fetched += 1
+            last = None
+            with page:
+                for drop in page:  # Only the IDs are kept, never the whole page
+                    index.add(drop["drop_id"], drop["placement_id"])
+                    last = drop
+            cursor = last.get("next_placement_id") if last else None
+            if not page.fields.get("has_more") or not cursor:
+                return
+
+    def _evict(self, keep):
+        while self.cached_drops > self.max_drops and len(self.streams) > 1:
+            stream_id, index = next(iter(self.streams.items()))
+            if stream_id == keep:
+                self.streams.move_to_end(stream_id)
+                continue
+            del self.streams[stream_id]
+            self.cached_drops -= len(index)
+
+    def get_stream(self, stream_id):
+        """Returns the stream's index, loading every page on first use."""
+        with self.lock:
+            index = self.streams.get(stream_id)
+            if index is None:
+                index = StreamIndex(stream_id)
+                self._fetch_pages(index)  # Cached only once fully loaded
+                self.streams[stream_id] = index
+                self.cached_drops += len(index)
+                self._evict(keep=stream_id)
+            else:
+                self.streams.move_to_end(stream_id)
+            return index
+
+    def refresh(self, stream_id):
+        """Fetches only the drops appended since the stream was cached."""
+        with self.lock:
+            index = self.get_stream(stream_id)
+            before = len(index)
+            try:
+                # An empty stream is read again from its start
+                self._fetch_pages(index, index.order[-1] if index.order else None)
+            finally:
+                self.cached_drops += len(index) - before
+            self._evict(keep=stream_id)
+            return index
+
+    def placement_for_drop(self, stream_id, drop_id):
+        """Returns the drop's placement_id in the stream, or None."""
+        with self.lock:
+            index = self.get_stream(stream_id)
+            placement_id = index.placement_by_drop.get(drop_id)
+            if placement_id is None:
+                self.misses += 1
+                placement_id = self.refresh(stream_id).placement_by_drop.get(drop_id)
+            else:
+                self.hits += 1
+            return placement_id
+
+    def drop_for_placement(self, stream_id, placement_id):
+        """Returns the drop_id at a placement in the stream, or None."""
+        with self.lock:
+            index = self.get_stream(stream_id)
+            drop_id = index.drop_by_placement.get(placement_id)
+            if drop_id is None:
+                self.misses += 1
+                drop_id = self.refresh(stream_id).drop_by_placement.get(placement_id)
+            else:
+                self.hits += 1
+            return drop_id
+
+    def invalidate(self, stream_id):
+        with self.lock:
+            index = self.streams.pop(stream_id, None)
+            if index is not None:
+                self.cached_drops -= len(index)
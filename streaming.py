@@ -0,0 +1,312 @@
+import json
+import re
+import sys
+import time
+import tracemalloc
+from collections import deque
+
+import api_client
+import environment
+from cli import get_flag_value
+
+# --- Configuration ---
+DEFAULT_CHUNK_SIZE = 64 * 1024  # bytes read from the socket at a time
+DEFAULT_PAGE_LIMIT = 500
+DEFAULT_LOG_TAIL = 50  # lines echoed after a log dump is saved
+
+# Characters that change the parser's state outside strings. JSON's
+# structural characters are ASCII, and UTF-8 never uses ASCII bytes
+# inside a multi-byte character, so the parser can work on raw bytes.
+STRUCTURE = re.compile(rb'[{}\[\],:"]')
+BACKSLASH = ord("\\")
+
+
+class JsonItemStream:
+    """Push parser that yields the items of one array field of a JSON object.
+
+    Feed it the body in chunks of any size; each item of `field` (e.g. a
+    page's "drops") is decoded and returned as soon as its last byte
+    arrives, and the bytes before it are dropped. Memory is bounded by the
+    largest single item plus one chunk, not by the size of the body. The
+    object's other top-level fields (total_count, has_more, ...) are
+    collected in `fields`.
+    """
+
+    def __init__(self, field="drops"):
+        self.field = field
+        self.fields = {}
+        self.buffer = bytearray()
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.expect_key = False
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+        self.item_start = None
+        self.done = False
+        self.bytes_read = 0
+        self.peak_buffer = 0
+
+    def feed(self, chunk):
+        """Consumes a chunk and returns the items it completed."""
+        items = []
+        buf = self.buffer
+        buf += chunk
+        self.bytes_read += len(chunk)
+        self.peak_buffer = max(self.peak_buffer, len(buf))
+        pos = self.pos
+        while not self.done:
+            if self.in_string:
+                pos = self._string_end(buf, pos)
+                if pos is None:
+                    pos = self._trailing_backslashes(buf, len(buf))
+                    break  # Wait for the rest of the string
+                self.in_string = False
+                if self.depth == 1 and self.expect_key:
+                    self.key = json.loads(buf[self.key_start:pos])
+                    self.key_start = None
+                    self.expect_key = False
+                continue
+
+            match = STRUCTURE.search(buf, pos)
+            if not match:
+                pos = len(buf)
+                break
+            char = match.group()
+            index = match.start()
+            pos = match.end()
+            if self.depth == 0 and char != b"{":
+                raise ValueError(f"Expected a JSON object, got {char!r}")
+            if char == b'"':
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.key_start = index
+            elif char in (b"{", b"["):
+                self.depth += 1
+                if self.depth == 1:
+                    self.expect_key = True
+                elif self.depth == 2 and char == b"[" and self.key == self.field:
+                    self.value_start = None
+                    self.item_start = pos
+            elif char in (b"}", b"]"):
+                if self.item_start is not None and self.depth == 2:
+                    self._item(buf[self.item_start:index], items)
+                    self.item_start = None
+                self.depth -= 1
+                if self.depth == 0:
+                    self._field(buf, index)
+                    self.done = True
+            elif char == b",":
+                if self.item_start is not None and self.depth == 2:
+                    self._item(buf[self.item_start:index], items)
+                    self.item_start = pos
+                elif self.depth == 1:
+                    self._field(buf, index)
+                    self.expect_key = True
+            elif char == b":" and self.depth == 1:
+                self.value_start = pos
+
+        # Keep only the bytes of the value still being read
+        keep = min(
+            i for i in (pos, self.item_start, self.value_start, self.key_start)
+            if i is not None
+        )
+        del buf[:keep]
+        self.pos = pos - keep
+        for name in ("item_start", "value_start", "key_start"):
+            if getattr(self, name) is not None:
+                setattr(self, name, getattr(self, name) - keep)
+        return items
+
+    def _string_end(self, buf, pos):
+        """Index just past the closing quote of the string at pos, or None.
+
+        Quotes are found with bytes.find; a quote preceded by an odd run of
+        backslashes is escaped and skipped.
+        """
+        while True:
+            quote = buf.find(b'"', pos)
+            if quote < 0:
+                return None
+            if (quote - self._trailing_backslashes(buf, quote, pos)) % 2 == 0:
+                return quote + 1
+            pos = quote + 1
+
+    def _trailing_backslashes(self, buf, end, start=0):
+        """Start of the run of backslashes that ends at end."""
+        while end > start and buf[end - 1] == BACKSLASH:
+            end -= 1
+        return end
+
+    def _item(self, data, items):
+        if data.strip():
+            items.append(json.loads(data))
+
+    def _field(self, buf, end):
+        if self.value_start is not None:
+            self.fields[self.key] = json.loads(buf[self.value_start:end])
+            self.value_start = None
+
+    def close(self):
+        if not self.done:
+            raise ValueError(
+                f"JSON body ended early after {self.bytes_read} bytes"
+            )
+
+
+class StreamedPage:
+    """A JSON response whose array field is read item by item.
+
+    Iterate it once for the items; `fields` holds the other top-level
+    fields once iteration is over. Use it as a context manager (or call
+    close()) wherever a page may be left unread: until then the request
+    holds its rate limiter slot and its pooled connection.
+    """
+
+    def __init__(self, response, field="drops", chunk_size=DEFAULT_CHUNK_SIZE):
+        self.response = response
+        self.parser = JsonItemStream(field)
+        self.chunk_size = chunk_size
+
+    @property
+    def fields(self):
+        return self.parser.fields
+
+    def __iter__(self):
+        try:
+            for chunk in self.response.iter_content(self.chunk_size):
+                yield from self.parser.feed(chunk)
+            self.parser.close()
+        finally:
+            self.close()
+
+    def close(self):
+        """Finishes the request, whether or not the body was read to its end."""
+        # Request hooks see the time and bytes up to here
+        api_client.finish_streamed(self.response, self.parser.bytes_read)
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def get_page(url, field="drops", chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """GETs url without buffering the body and returns a StreamedPage.
+
+    The request counts as finished (for metrics, wire stats and the other
+    request hooks) once the page has been read to its end or abandoned.
+    """
+    response = api_client.get(url, stream=True, **kwargs)
+    response.raise_for_status()  # Error bodies were read with the headers
+    return StreamedPage(response, field, chunk_size)
+
+
+def iter_stream_drops(api_v1_url, stream_id, limit=DEFAULT_PAGE_LIMIT,
+                      from_placement_id=None, on_page=None):
+    """Yields a stream's drops in list order, one at a time, across pages.
+
+    on_page(page_fields, drops_on_page) is called after each page.
+    """
+    cursor = from_placement_id
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["from_placement_id"] = cursor
+        count = 0
+        last = None
+        with get_page(
+            f"{api_v1_url}/streams/{stream_id}/drops", params=params
+        ) as page:
+            for drop in page:
+                count += 1
+                last = drop
+                yield drop
+        if on_page:
+            on_page(page.fields, count)
+        cursor = last.get("next_placement_id") if last else None
+        if not page.fields.get("has_more") or not cursor:
+            return
+
+
+def download(url, path, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """Streams a response body straight to a file. Returns (response, bytes)."""
+    response = api_client.get(url, stream=True, **kwargs)
+    written = 0
+    try:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(chunk_size):
+                f.write(chunk)
+                written += len(chunk)
+        return response, written
+    finally:
+        api_client.finish_streamed(response, written)
+        response.close()
+
+
+def tail_file(path, lines=DEFAULT_LOG_TAIL):
+    """Returns the last `lines` lines of a text file, reading it once."""
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return [line.rstrip("\n") for line in deque(f, maxlen=lines)]
+
+
+def measure(label, read):
+    """Runs read() under tracemalloc and prints items, time and peak memory."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    items = read()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28}{items:>10}{elapsed:>8.2f}{peak / 1024 / 1024:>12.2f}")
+    return peak
+
+
+def main():
+    """Compares peak client memory of buffered vs. streamed page reads."""
+    import test_10_FE_prep as fe_prep
+
+    fe_prep.configure_from_argv()
+    stream_id = get_flag_value("--stream-id")
+    if not stream_id:
+        print("Usage: python streaming.py --stream-id ID [--limit N] [--local]")
+        sys.exit(2)
+    limit = get_flag_value("--limit", DEFAULT_PAGE_LIMIT, int)
+    url = f"{environment.API_V1_URL}/streams/{stream_id}/drops"
+
+    def buffered():
+        count = 0
+        cursor = None
+        while True:
+            params = {"limit": limit}
+            if cursor:
+                params["from_placement_id"] = cursor
+            response = api_client.get(url, params=params)
+            response.raise_for_status()
+            payload = response.json()
+            drops = payload.get("drops", [])
+            count += len(drops)
+            cursor = drops[-1].get("next_placement_id") if drops else None
+            if not payload.get("has_more") or not cursor:
+                return count
+
+    def streamed():
+        return sum(
+            1 for _ in iter_stream_drops(environment.API_V1_URL, stream_id, limit)
+        )
+
+    print(f"--- Reading stream {stream_id}, limit={limit} ---")
+    print(f"{'':<28}{'drops':>10}{'secs':>8}{'peak MiB':>12}")
+    buffered_peak = measure("response.json()", buffered)
+    streamed_peak = measure("streamed", streamed)
+    if streamed_peak:
+        print(f"Streaming used {buffered_peak / streamed_peak:.1f}x less "
+              f"peak memory.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,79 @@
 import json
 import os
 import sys
+import threading
+import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 
 import requests
 
+import api_client
+import environment
+import local_server
+import log_tailer
+import metrics
+import profiler
+import streaming
+import traffic
+import wire_stats
+from checkpoint import CheckpointJournal, remove_journal
+from cli import get_flag_value
+from process_pool import (
+    check_worker_flags, configure_worker, default_process_count,
+    run_in_processes, split_evenly,
+)
+from stream_cache import StreamCache
+
 # --- Configuration ---
 URLS = {
     "test": "http://localhost:8000",
     "live": "https://wisdom-pool-server-3473lz5ika-nw.a.run.app",
 }
-STATE_FILE = "test_state.json"
-
-# These will be set based on the environment
-BASE_URL = ""
-API_V1_URL = ""
+STATE_FILE = "test_state.jsonl"
+LEGACY_STATE_FILE = "test_state.json"
+DEFAULT_LOGS_FILE = "server_logs.log"
+DEFAULT_VALIDATION_WORKERS = 16
+VALIDATION_SAVE_EVERY = 200  # validated entities per journal entry
 
 
 def set_environment(env="test"):
-    """Sets the global URLs based on the chosen environment."""
-    global BASE_URL, API_V1_URL
-    BASE_URL = URLS.get(env, URLS["test"])
-    API_V1_URL = f"{BASE_URL}/api/v1"
-    print(f"--- Running tests against {env.upper()} environment: {BASE_URL} ---\n")
+    """Points the harness at the chosen environment's URLs."""
+    environment.set_base_url(URLS.get(env, URLS["test"]))
+    print(f"--- Running tests against {env.upper()} environment: {environment.BASE_URL} ---\n")
+
+
+_journal = None
 
 
-def save_state(data):
-    """Saves the current test state to a file."""
-    with open(STATE_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-    print(f"Progress saved. Last successful step: {data.get('last_step')}")
+def get_journal(import_legacy=True):
+    """Opens the checkpoint journal, importing a legacy JSON state file once."""
+    global _journal
+    if _journal is None:
+        fresh = not os.path.exists(STATE_FILE)
+        _journal = CheckpointJournal(STATE_FILE)
+        if fresh and import_legacy and os.path.exists(LEGACY_STATE_FILE):
+            with open(LEGACY_STATE_FILE, "r") as f:
+                try:
+                    _journal.update(json.load(f))
+                except json.JSONDecodeError:
+                    pass  # Start over if the legacy file is corrupted
+            _journal.sync()
+    return _journal
+
+
+def save_state(state, changes):
+    """Appends changes to the journal, which applies them to `state`."""
+    journal = get_journal()
+    journal.update(changes)
+    journal.sync()
+    print(f"Progress saved. Last successful step: {state.get('last_step')}")
 
 
 def load_state():
-    """Loads the test state from a file if it exists."""
-    if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {}  # Return empty state if file is corrupted
-    return {}
+    """Returns the journal's live state; saving through it updates it."""
+    return get_journal().state
 
 
 def generate_creator_id():
@@ -49,30 +81,122 @@ def generate_creator_id():
     return f"user_{uuid.uuid4()}"
 
 
-def clear_server_logs():
-    """Clears the in-memory logs on the server."""
-    print("--- Clearing server logs for a fresh run ---")
-    try:
-        response = requests.delete(f"{BASE_URL}/logs/clear")
-        response.raise_for_status()
-        print("Server logs cleared successfully.\n")
-    except requests.exceptions.RequestException as e:
-        print(f"Could not clear server logs: {e}\n")
-
+def dump_server_logs(tailer=None, request_id=None, window=None):
+    """Shows the server logs: everything, or only lines the tailer has not seen.
 
-def dump_server_logs():
-    """Fetches and prints the in-memory logs from the server."""
+    The whole buffer is streamed to --logs-out (server_logs.log) rather
+    than held in memory, and only its last lines are printed. With a
+    request_id, that request's own lines are printed first; a server that
+    does not tag its lines with request IDs gets the lines logged within
+    window, the request's (start, end) wall-clock times, instead.
+    """
     print("\n" + "="*20 + " FETCHING SERVER LOGS " + "="*20)
     try:
-        log_response = requests.get(f"{BASE_URL}/logs")
-        log_response.raise_for_status()
-        print(log_response.text)
+        if tailer is None:
+            path = get_flag_value("--logs-out", DEFAULT_LOGS_FILE)
+            _, written = streaming.download(f"{environment.BASE_URL}/logs", path)
+            lines = streaming.tail_file(path)
+            print(f"{written / 1024:.0f} KiB of server logs saved to {path}; "
+                  f"last {len(lines)} lines:")
+            for line in lines:
+                print(line)
+        else:
+            lines = tailer.poll()
+            if request_id:
+                if window:
+                    entries, by_id = tailer.lines_for_request(request_id, *window)
+                else:
+                    entries, by_id = tailer.lines_for(request_id), True
+                print(f"Lines for failed request {request_id}"
+                      + ("" if by_id else " (logged while it was in flight)") + ":")
+                for line in entries:
+                    print(f"  {line['timestamp']} {line['level']} {line['message']}")
+                print("\nAll lines since this run started:")
+            for line in lines:
+                print(line)  # As written, so tracebacks and raw output survive
         print("="*62 + "\n")
     except requests.exceptions.RequestException as log_e:
         print(f"Failed to fetch server logs: {log_e}")
 
 
-def test_full_workflow():
+ENTITY_PATHS = {"pool": "pools", "stream": "streams", "drop": "drops"}
+
+
+def validate_entity(kind, entity_id):
+    """Fetches one created pool, stream or drop and checks its ID.
+
+    Returns None if it is valid, otherwise the error.
+    """
+    try:
+        response = api_client.get(f"{environment.API_V1_URL}/{ENTITY_PATHS[kind]}/{entity_id}")
+        response.raise_for_status()
+        returned_id = response.json().get(f"{kind}_id")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return e
+    if returned_id != entity_id:
+        return ValueError(f"server returned {kind}_id {returned_id}")
+    return None
+
+
+def save_validated(state, results):
+    """Merges newly validated entities into the resumable state."""
+    if not results:
+        return
+    journal = get_journal()
+    journal.merge("validated", results)
+    journal.sync()
+
+
+def validate_entities(state, entities, workers=DEFAULT_VALIDATION_WORKERS):
+    """Validates (kind, id) entities concurrently, at most `workers` at once.
+
+    Entities already recorded in state["validated"] are skipped, and
+    successes are merged back into the journal as they complete, so an
+    interrupted pass resumes with only the unchecked ones. The pass takes
+    about as long as the slowest request per worker slot rather than the
+    sum of all requests. Returns a list of (kind, id, error) failures.
+    """
+    validated = state.get("validated", {})
+    pending = [(kind, entity_id) for kind, entity_id in entities
+               if f"{kind}:{entity_id}" not in validated]
+    if len(pending) < len(entities):
+        print(f"{len(entities) - len(pending)} already validated (skipping)")
+    failures = []
+    results = {}
+    started = time.perf_counter()
+
+    def collect(done):
+        for future in done:
+            kind, entity_id = futures.pop(future)
+            error = future.result()
+            if error is None:
+                results[f"{kind}:{entity_id}"] = True
+            else:
+                failures.append((kind, entity_id, error))
+        if len(results) >= VALIDATION_SAVE_EVERY:
+            save_validated(state, results)
+            results.clear()
+
+    futures = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for kind, entity_id in pending:
+            futures[executor.submit(validate_entity, kind, entity_id)] = (
+                kind, entity_id
+            )
+            if len(futures) >= workers * 4:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                collect(done)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            collect(done)
+    save_validated(state, results)
+    elapsed = time.perf_counter() - started
+    print(f"Validated {len(pending) - len(failures)}/{len(pending)} in "
+          f"{elapsed:.2f}s")
+    return failures
+
+
+def test_full_workflow(validate_workers=DEFAULT_VALIDATION_WORKERS):
     """Runs the full API workflow, resuming from the last saved state."""
     # Load previous state or initialize a new one
     state = load_state()
@@ -92,69 +216,47 @@ def test_full_workflow():
     creator_id = state.get("creator_id", generate_creator_id())
     user_id = state.get("user_id", generate_creator_id())
 
-    # If starting a fresh run, clear the logs on the server
-    if not state:
-        clear_server_logs()
+    # Remember where the shared server log ends so a failure only shows this
+    # run's lines, without clearing the buffer for everyone else
+    log_tail = log_tailer.LogTailer(environment.BASE_URL)
+    try:
+        log_tail.seek_to_end()
+    except requests.exceptions.RequestException as e:
+        print(f"Could not read server logs: {e}\n")
 
     # Always save the creator_id and user_id
-    if "creator_id" not in state:
-        state["creator_id"] = creator_id
-    if "user_id" not in state:
-        state["user_id"] = user_id
-        save_state(state)
-
-    def refresh_drop_records_from_server():
-        """Fetch drop records (with placement IDs) and persist them."""
-        nonlocal drop_records
-        if not stream_id:
-            return
-        response = requests.get(
-            f"{API_V1_URL}/streams/{stream_id}/drops",
-            params={"limit": 50}
-        )
-        response.raise_for_status()
-        drops_payload = response.json().get("drops", [])
-        if not drops_payload:
-            return
-        drop_records = [
-            {
-                "drop_id": d["drop_id"],
-                "placement_id": d.get("placement_id"),
-            }
-            for d in drops_payload
-        ]
-        state["drop_records"] = drop_records
-        state["drop_ids"] = [d["drop_id"] for d in drop_records]
-        save_state(state)
+    if "creator_id" not in state or "user_id" not in state:
+        save_state(state, {"creator_id": creator_id, "user_id": user_id})
+
+    stream_cache = StreamCache(environment.API_V1_URL)
 
     def get_placement_for_drop(target_drop_id):
         """Ensures we have a placement ID for the given drop."""
-        for record in drop_records:
-            if (
-                record["drop_id"] == target_drop_id
-                and record.get("placement_id")
-            ):
-                return record["placement_id"]
-        refresh_drop_records_from_server()
-        for record in drop_records:
-            if (
-                record["drop_id"] == target_drop_id
-                and record.get("placement_id")
-            ):
-                return record["placement_id"]
-        return None
+        placement_id = state.get("placements", {}).get(target_drop_id) or next(
+            (r.get("placement_id") for r in drop_records
+             if r["drop_id"] == target_drop_id), None
+        )
+        if placement_id or not stream_id:
+            return placement_id
+        placement_id = stream_cache.placement_for_drop(stream_id, target_drop_id)
+        if placement_id:
+            # Persist what we learned so a resumed run needs no lookup
+            journal = get_journal()
+            journal.merge("placements", {target_drop_id: placement_id})
+            journal.sync()
+        return placement_id
 
     try:
         # Step 0: Root Endpoint (always run)
         print("--- 0. Checking root endpoint ---")
-        response = requests.get(f"{BASE_URL}/")
+        response = api_client.get(f"{environment.BASE_URL}/")
         response.raise_for_status()
         root_message = response.json().get("message", "No message returned")
         print(f"Root endpoint healthy: {root_message}\n")
 
         # Step 1: Health Check (always run)
         print("--- 1. Checking server health ---")
-        response = requests.get(f"{BASE_URL}/health")
+        response = api_client.get(f"{environment.BASE_URL}/health")
         response.raise_for_status()
         health_data = response.json()
         start_ts = health_data["start_time_utc"].replace("Z", "+00:00")
@@ -164,9 +266,9 @@ def test_full_workflow():
         uptime_minutes = (server_time - start_time).total_seconds() / 60
         print(f"Server is OK. Uptime: {uptime_minutes:.2f} minutes.\n")
 
-        # Step 2: Create and Validate Pool
+        # Step 2: Create Pool
         if not pool_id:
-            print("--- 1. Creating a new pool ---")
+            print("--- 2. Creating a new pool ---")
             pool_data = {
                 "pool_content": {
                     "title": "Test Pool",
@@ -174,25 +276,16 @@ def test_full_workflow():
                 },
                 "creator_id": creator_id,
             }
-            response = requests.post(f"{API_V1_URL}/pools", json=pool_data)
+            response = api_client.post(f"{environment.API_V1_URL}/pools", json=pool_data)
             response.raise_for_status()
             pool_id = response.json()["pool_id"]
-            state.update({"pool_id": pool_id, "last_step": "create_pool"})
-            save_state(state)
+            save_state(state, {"pool_id": pool_id, "last_step": "create_pool"})
             print(f"Pool created with ID: {pool_id}\n")
         else:
-            print("--- 1. Pool already exists (skipping creation) ---")
+            print("--- 2. Pool already exists (skipping creation) ---")
             print(f"Using Pool ID: {pool_id}\n")
 
-        if last_step in ["", "create_pool"]:
-            print(f"--- 2. Validating pool {pool_id} ---")
-            response = requests.get(f"{API_V1_URL}/pools/{pool_id}")
-            response.raise_for_status()
-            state.update({"last_step": "validate_pool"})
-            save_state(state)
-            print(f"Pool {pool_id} validated successfully.\n")
-
-        # Step 3: Create and Validate Stream
+        # Step 3: Create Stream
         if not stream_id:
             print("--- 3. Creating a new stream ---")
             stream_data = {
@@ -203,30 +296,21 @@ def test_full_workflow():
                 "pool_id": pool_id,
                 "creator_id": creator_id,
             }
-            response = requests.post(f"{API_V1_URL}/streams", json=stream_data)
+            response = api_client.post(f"{environment.API_V1_URL}/streams", json=stream_data)
             response.raise_for_status()
             stream_id = response.json()["stream_id"]
-            state.update({
+            save_state(state, {
                 "stream_id": stream_id,
                 "last_step": "create_stream",
             })
-            save_state(state)
             print(f"Stream created with ID: {stream_id}\n")
         else:
             print("--- 3. Stream already exists (skipping creation) ---")
             print(f"Using Stream ID: {stream_id}\n")
 
-        if last_step in ["create_pool", "validate_pool", "create_stream"]:
-            print(f"--- 4. Validating stream {stream_id} ---")
-            response = requests.get(f"{API_V1_URL}/streams/{stream_id}")
-            response.raise_for_status()
-            state.update({"last_step": "validate_stream"})
-            save_state(state)
-            print(f"Stream {stream_id} validated successfully.\n")
-
-        # Step 4: Add and Validate Drops
+        # Step 4: Add Drops
         if len(drop_records) < 3:
-            print(f"--- 5. Adding 3 drops to stream {stream_id} ---")
+            print(f"--- 4. Adding 3 drops to stream {stream_id} ---")
             drops_data = {
                 "drops": [
                     {"title": "Drop 1", "text": "This is the first drop."},
@@ -235,8 +319,8 @@ def test_full_workflow():
                 ],
                 "creator_id": creator_id,
             }
-            response = requests.post(
-                f"{API_V1_URL}/streams/{stream_id}/drops",
+            response = api_client.post(
+                f"{environment.API_V1_URL}/streams/{stream_id}/drops",
                 json=drops_data,
             )
             response.raise_for_status()
@@ -249,37 +333,45 @@ def test_full_workflow():
                 for d in new_drops
             ]
             drop_ids = [record["drop_id"] for record in drop_records]
-            state.update({
+            save_state(state, {
                 "drop_records": drop_records,
                 "drop_ids": drop_ids,
                 "last_step": "add_drops"
             })
-            save_state(state)
             print(f"3 drops added with IDs: {drop_ids}\n")
         else:
-            print("--- 5. Drops already exist (skipping creation) ---")
+            print("--- 4. Drops already exist (skipping creation) ---")
             print(f"Using Drop IDs: {drop_ids}\n")
 
+        # Step 5: Validate Pool, Stream and Drops in Parallel
         if last_step != "validate_drops":
-            print("--- 6. Validating individual drops ---")
-            for drop_record in drop_records:
-                response = requests.get(
-                    f"{API_V1_URL}/drops/{drop_record['drop_id']}"
-                )
-                response.raise_for_status()
-                print(f"Drop {drop_record['drop_id']} validated successfully.")
-            state.update({"last_step": "validate_drops"})
-            save_state(state)
-            print("All drops validated.\n")
-
-        # Step 5: Test User Progress Endpoints
+            entities = [("pool", pool_id), ("stream", stream_id)] + [
+                ("drop", record["drop_id"]) for record in drop_records
+            ]
+            print(f"--- 5. Validating {len(entities)} entities "
+                  f"({validate_workers} at a time) ---")
+            failures = validate_entities(state, entities, validate_workers)
+            if failures:
+                for kind, entity_id, error in failures:
+                    print(f"{kind.capitalize()} {entity_id} failed validation: {error}")
+                request_errors = [
+                    error for _, _, error in failures
+                    if isinstance(error, requests.exceptions.RequestException)
+                ]
+                if request_errors:
+                    raise request_errors[0]
+                raise RuntimeError(f"{len(failures)} entities failed validation.")
+            save_state(state, {"last_step": "validate_drops"})
+            print("Pool, stream and all drops validated.\n")
+
+        # Step 6: Test User Progress Endpoints
         if last_step != "test_user_progress":
-            print("--- 7. Testing user progress endpoints ---")
+            print("--- 6. Testing user progress endpoints ---")
             
             # First, get user river (should have limited history initially)
             print("Getting initial user river...")
-            response = requests.get(
-                f"{API_V1_URL}/user/river",
+            response = api_client.get(
+                f"{environment.API_V1_URL}/user/river",
                 params={"limit": 30},
                 headers={"X-User-Id": user_id}
             )
@@ -302,8 +394,8 @@ def test_full_workflow():
                 "drop_id": target_drop_id,
                 "placement_id": placement_id
             }
-            response = requests.post(
-                f"{API_V1_URL}/user/progress",
+            response = api_client.post(
+                f"{environment.API_V1_URL}/user/progress",
                 json=progress_data,
                 headers={"X-User-Id": user_id}
             )
@@ -312,8 +404,8 @@ def test_full_workflow():
             
             # Get user river again (should now reflect the activity)
             print("Getting updated user river...")
-            response = requests.get(
-                f"{API_V1_URL}/user/river",
+            response = api_client.get(
+                f"{environment.API_V1_URL}/user/river",
                 params={"limit": 30},
                 headers={"X-User-Id": user_id}
             )
@@ -330,15 +422,14 @@ def test_full_workflow():
             else:
                 print("User river reflects the recent activity.")
             
-            state.update({"last_step": "test_user_progress"})
-            save_state(state)
+            save_state(state, {"last_step": "test_user_progress"})
             print("User progress tests completed.\n")
 
-        # Step 5: Test Get Drops in Stream
+        # Step 7: Test Get Drops in Stream
         if last_step != "test_get_drops":
-            print("--- 8. Testing get drops in stream endpoint ---")
-            response = requests.get(
-                f"{API_V1_URL}/streams/{stream_id}/drops",
+            print("--- 7. Testing get drops in stream endpoint ---")
+            response = api_client.get(
+                f"{environment.API_V1_URL}/streams/{stream_id}/drops",
                 params={"limit": 10}
             )
             response.raise_for_status()
@@ -348,8 +439,7 @@ def test_full_workflow():
             print(f"Has more: {drops_response.get('has_more')}")
             print(f"Total count: {drops_response.get('total_count')}")
             
-            state.update({"last_step": "test_get_drops"})
-            save_state(state)
+            save_state(state, {"last_step": "test_get_drops"})
             print("Get drops test completed.\n")
 
         print("--- Full workflow test completed successfully! ---")
@@ -364,27 +454,300 @@ def test_full_workflow():
                 print(f"Response body: {e.response.json()}")
             except ValueError:
                 print(f"Response body: {e.response.text}")
-        
-        dump_server_logs()
+
+        request_id = window = None
+        if e.response is not None:
+            request_id = e.response.request.headers.get("X-Request-Id")
+            now = time.time()
+            window = (now - e.response.elapsed.total_seconds(), now)
+        dump_server_logs(log_tail, request_id, window)
         sys.exit(1)
 
 
+# --- Load generation ---
+LOAD_STEPS = ["create_pool", "create_stream", "add_drops", "update_progress", "get_river"]
+
+
+def load_create_pool(creator_id):
+    """Creates a pool for one virtual user."""
+    pool_data = {
+        "pool_content": {"title": "Load Pool", "description": "A load test pool."},
+        "creator_id": creator_id,
+    }
+    response = api_client.post(f"{environment.API_V1_URL}/pools", json=pool_data)
+    response.raise_for_status()
+    return response.json()["pool_id"]
+
+
+def load_create_stream(pool_id, creator_id):
+    """Creates a stream in the virtual user's pool."""
+    stream_data = {
+        "stream_content": {"title": "Load Stream", "description": "A load test stream."},
+        "pool_id": pool_id,
+        "creator_id": creator_id,
+    }
+    response = api_client.post(f"{environment.API_V1_URL}/streams", json=stream_data)
+    response.raise_for_status()
+    return response.json()["stream_id"]
+
+
+def load_add_drops(stream_id, creator_id):
+    """Adds three drops to the virtual user's stream."""
+    drops_data = {
+        "drops": [
+            {"title": f"Drop {i}", "text": f"This is load drop {i}."}
+            for i in range(1, 4)
+        ],
+        "creator_id": creator_id,
+    }
+    response = api_client.post(
+        f"{environment.API_V1_URL}/streams/{stream_id}/drops",
+        json=drops_data,
+    )
+    response.raise_for_status()
+    return response.json().get("drops", [])
+
+
+def load_update_progress(user_id, pool_id, stream_id, drop):
+    """Records progress on a drop for the virtual user."""
+    progress_data = {
+        "pool_id": pool_id,
+        "stream_id": stream_id,
+        "drop_id": drop["drop_id"],
+        "placement_id": drop["placement_id"],
+    }
+    response = api_client.post(
+        f"{environment.API_V1_URL}/user/progress",
+        json=progress_data,
+        headers={"X-User-Id": user_id}
+    )
+    response.raise_for_status()
+
+
+def load_get_river(user_id):
+    """Fetches the virtual user's river."""
+    response = api_client.get(
+        f"{environment.API_V1_URL}/user/river",
+        params={"limit": 30},
+        headers={"X-User-Id": user_id}
+    )
+    response.raise_for_status()
+    return response.json().get("records", [])
+
+
+def run_virtual_user(latencies, errors, lock):
+    """Runs one independent copy of the workflow, timing every step.
+
+    Returns whether the workflow completed. A failed step counts as that
+    step's error; only request failures are expected, anything else is
+    raised for run_virtual_users to report.
+    """
+
+    def timed(step, func, *args):
+        started = time.perf_counter()
+        failed = False
+        try:
+            return func(*args)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            with lock:
+                latencies[step].record(time.perf_counter() - started)
+                if failed:
+                    errors[step] += 1
+
+    creator_id = generate_creator_id()
+    user_id = generate_creator_id()
+    try:
+        pool_id = timed("create_pool", load_create_pool, creator_id)
+        stream_id = timed("create_stream", load_create_stream, pool_id, creator_id)
+        drops = timed("add_drops", load_add_drops, stream_id, creator_id)
+        if not drops:
+            with lock:
+                errors["add_drops"] += 1  # Nothing to record progress on
+            return False
+        timed(
+            "update_progress", load_update_progress,
+            user_id, pool_id, stream_id, drops[-1]
+        )
+        timed("get_river", load_get_river, user_id)
+    except requests.exceptions.RequestException:
+        return False
+    return True
+
+
+def run_virtual_users(users, concurrency):
+    """Runs `users` workflows on a pool of `concurrency` threads.
+
+    The client is the blocking requests client, so each workflow in
+    flight holds one thread; concurrency is the thread count.
+
+    Returns (completed flags, per-step histograms, per-step errors,
+    elapsed seconds). A workflow that raised an unexpected error counts
+    as not completed, and the first such error is printed.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+    latencies = {step: metrics.LatencyHistogram() for step in LOAD_STEPS}
+    errors = {step: 0 for step in LOAD_STEPS}
+    lock = threading.Lock()
+    results = []
+    failures = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(run_virtual_user, latencies, errors, lock)
+            for _ in range(users)
+        ]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                failures.append(e)
+                results.append(False)
+    elapsed = time.perf_counter() - started
+    if failures:
+        print(f"!!! {len(failures)} workflows failed with unexpected errors, "
+              f"e.g. {failures[0]!r}")
+    return results, latencies, errors, elapsed
+
+
+def run_load_worker(base_url, users, concurrency, record_endpoints):
+    """Process entry point: runs a share of the virtual users."""
+    configure_worker(base_url, concurrency)
+    recorder = None
+    if record_endpoints:
+        recorder = metrics.MetricsRecorder()
+        api_client.add_request_hook(recorder.record_request)
+    started_at = time.time()
+    results, latencies, errors, _ = run_virtual_users(users, concurrency)
+    return {
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "completed": sum(1 for ok in results if ok),
+        "latencies": {step: h.to_dict() for step, h in latencies.items()},
+        "errors": errors,
+        "endpoints": recorder.to_dict() if recorder else None,
+    }
+
+
+def run_load_processes(users, concurrency, processes):
+    """Splits the virtual users across processes and merges their results."""
+    shares = [
+        (environment.BASE_URL, share_users, max(1, share_concurrency),
+         metrics.recording_enabled())
+        for share_users, share_concurrency in zip(
+            split_evenly(users, processes), split_evenly(concurrency, processes)
+        )
+        if share_users
+    ]
+    worker_results = run_in_processes(run_load_worker, shares)
+    latencies = {step: metrics.LatencyHistogram() for step in LOAD_STEPS}
+    errors = {step: 0 for step in LOAD_STEPS}
+    for result in worker_results:
+        for step in LOAD_STEPS:
+            latencies[step].merge(
+                metrics.LatencyHistogram.from_dict(result["latencies"][step])
+            )
+            errors[step] += result["errors"][step]
+        if result["endpoints"] is not None:
+            metrics.get_recorder().merge(
+                metrics.MetricsRecorder.from_dict(result["endpoints"])
+            )
+    # Processes start at slightly different times; measure the span in which
+    # any of them was generating load
+    elapsed = (
+        max(r["finished_at"] for r in worker_results)
+        - min(r["started_at"] for r in worker_results)
+    )
+    completed = sum(r["completed"] for r in worker_results)
+    return completed, latencies, errors, elapsed
+
+
+def run_load_test(users, concurrency, processes=1):
+    """Runs the workflow for many virtual users and prints per-step stats."""
+    print(f"--- Load test: {users} users on {concurrency} threads"
+          + (f", {processes} processes" if processes > 1 else "") + " ---")
+    if processes > 1:
+        completed, latencies, errors, elapsed = run_load_processes(
+            users, concurrency, processes
+        )
+    else:
+        results, latencies, errors, elapsed = run_virtual_users(
+            users, concurrency
+        )
+        completed = sum(1 for ok in results if ok)
+    print(f"Completed {completed}/{users} workflows in {elapsed:.2f}s\n")
+    print(f"{'step':<16}{'ok':>7}{'err':>6}{'req/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for step in LOAD_STEPS:
+        histogram = latencies[step]
+        ok_count = histogram.total - errors[step]
+        throughput = ok_count / elapsed if elapsed else 0.0
+        p50, p95, p99 = (histogram.percentile(p) * 1000 for p in (50, 95, 99))
+        print(f"{step:<16}{ok_count:>7}{errors[step]:>6}{throughput:>9.1f}"
+              f"{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}")
+    print()
+    return completed == users
+
+
 if __name__ == "__main__":
+    # --processes 0 starts one load process per CPU core
+    processes = get_flag_value("--processes", 1, int) or default_process_count()
+    if "--users" in sys.argv:
+        check_worker_flags(processes)
+
     # Determine environment
     if "--live" in sys.argv:
         set_environment("live")
+    elif "--local" in sys.argv:
+        URLS["local"] = local_server.start_in_background(
+            compress=wire_stats.local_server_compression()
+        )
+        set_environment("local")
     else:
         set_environment("test")
 
+    api_client.configure_from_argv()
+    metrics.configure_from_argv()
+    traffic.configure_from_argv()
+    log_tailer.configure_from_argv(environment.BASE_URL)
+    profiler.configure_from_argv()
+    wire_stats.configure_from_argv()
+
     # Handle command-line flags
     if "--logs" in sys.argv:
         dump_server_logs()
         sys.exit(0)
 
-    if "--reset" in sys.argv and os.path.exists(STATE_FILE):
-        os.remove(STATE_FILE)
+    # --users N runs N workflows, --concurrency of them at a time, each on
+    # its own thread with the blocking requests client
+    if "--users" in sys.argv:
+        users = get_flag_value("--users", 1, int)
+        concurrency = get_flag_value("--concurrency", users, int)
+        if users < 1 or concurrency < 1:
+            print("--users and --concurrency must be at least 1")
+            sys.exit(2)
+        api_client.configure(pool_size=concurrency)
+        sys.exit(0 if run_load_test(users, concurrency, processes) else 1)
+
+    # The workflow should ride out throttling instead of aborting
+    if "--no-retry" not in sys.argv:
+        api_client.enable_retries(get_flag_value("--max-attempts", None, int))
+
+    if "--reset" in sys.argv:
+        # The legacy file is tracked; a fresh journal just stops importing it
+        remove_journal(STATE_FILE)
+        get_journal(import_legacy=False)
         print("Test state has been reset. Starting from the beginning.")
 
-    test_full_workflow()
+    validate_workers = get_flag_value(
+        "--validate-workers", DEFAULT_VALIDATION_WORKERS, int
+    )
+    if "--pool-size" not in sys.argv:
+        # One pooled connection per concurrent validation
+        api_client.configure(pool_size=validate_workers)
+    test_full_workflow(validate_workers)
 
 
@@ -1,7 +1,24 @@
+import json
 import random
 import requests
 import sys
+import threading
+import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import api_client
+import environment
+import local_server
+import log_tailer
+import metrics
+import profiler
+import traffic
+import wire_stats
+from checkpoint import CheckpointJournal, remove_journal
+from cli import get_flag_value
+from content_generator import ContentGenerator, parse_profiles
+from flow_control import was_refused
 
 # --- Configuration ---
 URLS = {
@@ -9,41 +26,51 @@ URLS = {
     "live": "https://wisdom-pool-server-3473lz5ika-nw.a.run.app",
 }
 
-BASE_URL = ""
-API_V1_URL = ""
-
 # Test user ID
 TEST_USER_ID = "fe_test_user_001"
 CREATOR_ID = "fe_test_creator_001"
 
+# Large-scale seeding defaults
+DEFAULT_SEED_WORKERS = 16
+DEFAULT_SEED_BATCH_SIZE = 100
+SEED_PROGRESS_INTERVAL = 2.0  # seconds between progress lines
+MAX_SEED_ATTEMPTS = 5  # per create or drop batch, on top of api_client retries
+SEED_STATE_FILE = "seed_state.jsonl"
+BATCH_SIZE_FILE = "batch_size.json"  # written by bench_batch_size.py
+
 
 def set_environment(env="test"):
-    """Sets the global URLs based on the chosen environment."""
-    global BASE_URL, API_V1_URL
-    BASE_URL = URLS.get(env, URLS["test"])
-    API_V1_URL = f"{BASE_URL}/api/v1"
+    """Points the harness at the chosen environment's URLs."""
+    environment.set_base_url(URLS.get(env, URLS["test"]))
     print(f"--- Setting up test data for {env.upper()} environment ---")
-    print(f"Base URL: {BASE_URL}\n")
+    print(f"Base URL: {environment.BASE_URL}\n")
 
 
-def create_pool():
+def create_pool(
+    title="FE_TEST",
+    description="Frontend testing pool with sample streams and drops",
+    verbose=True,
+):
     """Creates the FE_TEST pool."""
-    print("--- Creating FE_TEST pool ---")
+    if verbose:
+        print(f"--- Creating {title} pool ---")
     pool_data = {
         "pool_content": {
-            "title": "FE_TEST",
-            "description": "Frontend testing pool with sample streams and drops"
+            "title": title,
+            "description": description
         },
         "creator_id": CREATOR_ID,
     }
-    response = requests.post(f"{API_V1_URL}/pools", json=pool_data)
+    response = api_client.post(f"{environment.API_V1_URL}/pools", json=pool_data)
     response.raise_for_status()
     pool_id = response.json()["pool_id"]
-    print(f"Created pool: {pool_id}\n")
+    if verbose:
+        print(f"Created pool: {pool_id}\n")
     return pool_id
 
 
-def create_stream(pool_id, title, description, category="General"):
+def create_stream(pool_id, title, description, category="General",
+                  verbose=True, ai_framing=None, image=None):
     """Creates a stream in the pool."""
     stream_data = {
         "stream_content": {
@@ -54,32 +81,85 @@ def create_stream(pool_id, title, description, category="General"):
         "pool_id": pool_id,
         "creator_id": CREATOR_ID,
     }
-    response = requests.post(f"{API_V1_URL}/streams", json=stream_data)
+    if ai_framing:
+        stream_data["stream_content"]["ai_framing"] = ai_framing
+    if image:
+        stream_data["stream_content"]["image"] = image
+    response = api_client.post(f"{environment.API_V1_URL}/streams", json=stream_data)
     response.raise_for_status()
     stream_id = response.json()["stream_id"]
-    print(f"Created stream: '{title}' ({stream_id})")
+    if verbose:
+        print(f"Created stream: '{title}' ({stream_id})")
     return stream_id
 
 
-def add_drops_to_stream(stream_id, drops_content):
-    """Adds multiple drops to a stream."""
-    drops_data = {
-        "drops": drops_content,
-        "creator_id": CREATOR_ID,
-    }
-    response = requests.post(
-        f"{API_V1_URL}/streams/{stream_id}/drops",
-        json=drops_data
+_tuned_batch_sizes = {}  # base URL -> batch size
+
+
+def tuned_batch_size():
+    """Returns the fastest add-drops batch size measured by the sweep.
+
+    Falls back to DEFAULT_SEED_BATCH_SIZE until bench_batch_size.py has
+    written BATCH_SIZE_FILE for the server currently targeted; a size
+    measured against another server is ignored.
+    """
+    base_url = environment.BASE_URL
+    if base_url not in _tuned_batch_sizes:
+        batch_size = DEFAULT_SEED_BATCH_SIZE
+        try:
+            with open(BATCH_SIZE_FILE) as f:
+                tuned = json.load(f)
+            if tuned.get("base_url") == base_url:
+                batch_size = int(tuned["best_batch_size"])
+            else:
+                print(f"Ignoring {BATCH_SIZE_FILE}: it was measured against "
+                      f"{tuned.get('base_url')}, not {base_url}.")
+        except (OSError, ValueError, KeyError):
+            pass
+        _tuned_batch_sizes[base_url] = batch_size
+    return _tuned_batch_sizes[base_url]
+
+
+def add_drops_to_stream(stream_id, drops_content, verbose=True,
+                        chunk_size=None):
+    """Adds multiple drops to a stream.
+
+    Lists longer than chunk_size (the tuned batch size by default) are sent
+    as consecutive requests, so each chunk is transactional on its own.
+    """
+    chunk_size = chunk_size or tuned_batch_size()
+    drop_ids = []
+    placement_ids = []
+    for start in range(0, len(drops_content), chunk_size):
+        drops_data = {
+            "drops": drops_content[start:start + chunk_size],
+            "creator_id": CREATOR_ID,
+        }
+        response = api_client.post(
+            f"{environment.API_V1_URL}/streams/{stream_id}/drops",
+            json=drops_data
+        )
+        response.raise_for_status()
+        result = response.json()
+        drop_ids.extend(d["drop_id"] for d in result.get("drops", []))
+        placement_ids.extend(d["placement_id"] for d in result.get("drops", []))
+    if verbose:
+        print(f"  Added {len(drop_ids)} drops")
+    return drop_ids, placement_ids
+
+
+def get_stream_drop_count(stream_id):
+    """Returns how many drops the server holds for a stream."""
+    response = api_client.get(
+        f"{environment.API_V1_URL}/streams/{stream_id}/drops",
+        params={"limit": 1}
     )
     response.raise_for_status()
-    result = response.json()
-    drop_ids = [d["drop_id"] for d in result.get("drops", [])]
-    placement_ids = [d["placement_id"] for d in result.get("drops", [])]
-    print(f"  Added {len(drop_ids)} drops")
-    return drop_ids, placement_ids
+    return response.json().get("total_count", 0)
 
 
-def update_user_progress(pool_id, stream_id, drop_id, placement_id):
+def update_user_progress(pool_id, stream_id, drop_id, placement_id,
+                         user_id=TEST_USER_ID):
     """Updates user progress for a specific drop."""
     progress_data = {
         "pool_id": pool_id,
@@ -87,16 +167,20 @@ def update_user_progress(pool_id, stream_id, drop_id, placement_id):
         "drop_id": drop_id,
         "placement_id": placement_id
     }
-    response = requests.post(
-        f"{API_V1_URL}/user/progress",
+    response = api_client.post(
+        f"{environment.API_V1_URL}/user/progress",
         json=progress_data,
-        headers={"X-User-Id": TEST_USER_ID}
+        headers={"X-User-Id": user_id},
+        idempotent=True,  # Setting the same position twice is harmless
     )
     response.raise_for_status()
 
 
 def create_test_data():
-    """Creates the complete test data structure."""
+    """Creates the complete test data structure.
+
+    Returns (pool_id, stream_ids) so the dataset can be exported.
+    """
     
     # Stream definitions with their drops
     streams_data = [
@@ -249,8 +333,8 @@ def create_test_data():
     
     # Test session-sync and river endpoints
     print(f"\n--- Testing user river endpoint ---")
-    response = requests.get(
-        f"{API_V1_URL}/user/river",
+    response = api_client.get(
+        f"{environment.API_V1_URL}/user/river",
         params={"limit": 30},
         headers={"X-User-Id": TEST_USER_ID}
     )
@@ -264,18 +348,381 @@ def create_test_data():
         print(f"Most recent stream: {latest_record.get('stream_id')}")
     
     print("\n--- All tests passed! ---")
+    return pool_id, [stream["stream_id"] for stream in all_stream_data]
 
 
-def main():
-    """Main function to set up test data."""
-    # Determine environment
+class SeedProgress:
+    """Thread-safe seeding counters that print throughput as they advance."""
+
+    def __init__(self, total_streams, total_drops):
+        self.lock = threading.Lock()
+        self.total_streams = total_streams
+        self.total_drops = total_drops
+        self.pools = 0
+        self.streams = 0
+        self.drops = 0
+        self.started = time.perf_counter()
+        self.last_report = self.started
+
+    def add(self, pools=0, streams=0, drops=0):
+        with self.lock:
+            self.pools += pools
+            self.streams += streams
+            self.drops += drops
+            now = time.perf_counter()
+            if now - self.last_report >= SEED_PROGRESS_INTERVAL:
+                self.last_report = now
+                self.report(now)
+
+    def report(self, now=None):
+        elapsed = (now or time.perf_counter()) - self.started
+        drops_per_sec = self.drops / elapsed if elapsed else 0.0
+        limiter = api_client.limiter_stats()
+        print(
+            f"  [{elapsed:7.1f}s] pools {self.pools}, "
+            f"streams {self.streams}/{self.total_streams}, "
+            f"drops {self.drops}/{self.total_drops} "
+            f"({drops_per_sec:.0f} drops/s)"
+            + (f", concurrency {limiter['limit']}" if limiter else "")
+        )
+
+
+def run_bounded(executor, tasks, max_pending):
+    """Submits (func, *args) tasks keeping at most max_pending in flight.
+
+    Yields each task's result as it completes, re-raising the first failure.
+    """
+    pending = set()
+    for func, *args in tasks:
+        pending.add(executor.submit(func, *args))
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+def synthetic_drops(stream_title, start, end):
+    """Builds placeholder drop content for positions [start, end)."""
+    return [
+        {"title": f"Drop {i + 1}", "text": f"Drop {i + 1} of '{stream_title}'."}
+        for i in range(start, end)
+    ]
+
+
+def is_permanent_failure(error):
+    """True for client errors that no amount of retrying will fix."""
+    response = getattr(error, "response", None)
+    return (
+        response is not None
+        and 400 <= response.status_code < 500
+        and response.status_code != 429
+    )
+
+
+def seed_backoff(failures):
+    """Sleeps a jittered, exponentially growing time before another attempt."""
+    time.sleep(random.uniform(0, min(8.0, 0.25 * 2 ** failures)))
+
+
+class UnknownCreateOutcome(RuntimeError):
+    """A create failed after the server may already have carried it out."""
+
+
+# Identifies this process's seeding run in create markers without a journal
+_seed_run_id = uuid.uuid4().hex[:12]
+
+
+def seed_marker(journal, kind, key):
+    """Client-generated tag put in a seeded object's description."""
+    run_id = journal.state.get("run_id") if journal else None
+    return f"seed-{run_id or _seed_run_id}-{kind}-{key}"
+
+
+def retry_create(create, *args, journal=None, intent=None, marker=None,
+                 **kwargs):
+    """Creates a pool or stream, repeating it only if the server refused it.
+
+    Refusals (429/503, connect timeouts) and 4xx errors cannot have created
+    anything. A timeout or 5xx after the request went out may have, and the
+    API cannot look objects up by marker, so the create is never repeated
+    blindly: UnknownCreateOutcome is raised naming the marker the caller
+    put in the description. With a journal, the marker is journalled under
+    `intent` before the request is sent; a rerun that finds it without a
+    result stops the same way unless --recreate-unknown is given.
+    """
+    if journal:
+        previous = journal.state.get("intents", {}).get(intent)
+        if previous and "--recreate-unknown" not in sys.argv:
+            raise UnknownCreateOutcome(
+                f"An earlier run sent create {intent} (marker {previous}) and "
+                f"never recorded its result. Check the server for an object "
+                f"with that marker, then rerun with --recreate-unknown."
+            )
+        journal.merge("intents", {intent: marker})
+        journal.sync()  # On disk before the request can be processed
+    for attempt in range(MAX_SEED_ATTEMPTS):
+        try:
+            return create(*args, **kwargs)
+        except requests.exceptions.RequestException as e:
+            response = getattr(e, "response", None)
+            refused = was_refused(response, None if response is not None else e)
+            if not refused and not is_permanent_failure(e):
+                raise UnknownCreateOutcome(
+                    f"Create {intent or create.__name__} failed after it was "
+                    f"sent ({e}); it may exist on the server"
+                    + (f" with marker {marker}" if marker else "")
+                    + ". Not retried, to avoid a duplicate."
+                ) from e
+            if not refused or attempt + 1 >= MAX_SEED_ATTEMPTS:
+                if journal:
+                    journal.merge("intents", {intent: None})  # Nothing created
+                raise
+            seed_backoff(attempt + 1)
+
+
+def seed_stream(pool_id, title, drops_per_stream, batch_size, progress,
+                journal=None, key=None, content=None):
+    """Creates one stream and appends its drops in order, batch by batch.
+
+    Batches for a stream are sent sequentially so the placement linked list
+    keeps the intended drop order; parallelism comes from seeding many
+    streams at once. With a journal, the stream and every completed batch
+    are checkpointed under `key` so a rerun continues where it stopped.
+    With a ContentGenerator, the stream and its drops are generated for
+    `key` one batch at a time (also capped in bytes) instead of using
+    placeholder text.
+    """
+    record = journal.state.get("streams", {}).get(key) if journal else None
+    if record:
+        stream_id = record["stream_id"]
+        added = record["drops"]
+        if added < drops_per_stream:
+            # A batch may have landed after the last checkpoint was written
+            added = get_stream_drop_count(stream_id)
+            if added != record["drops"]:
+                journal.merge(
+                    "streams", {key: {"stream_id": stream_id, "drops": added}}
+                )
+    else:
+        marker = seed_marker(journal, "stream", key or title)
+        once = {"journal": journal, "intent": f"stream:{key}", "marker": marker}
+        if content:
+            stream_content = content.stream_content(key)
+            stream_id = retry_create(
+                create_stream, pool_id, stream_content["title"],
+                f"{stream_content['description']} [{marker}]",
+                stream_content["category"], verbose=False,
+                ai_framing=stream_content["ai_framing"],
+                image=stream_content.get("image"), **once,
+            )
+        else:
+            stream_id = retry_create(
+                create_stream, pool_id, title,
+                f"Synthetic stream {title} [{marker}]", "Synthetic",
+                verbose=False, **once,
+            )
+        added = 0
+        if journal:
+            journal.merge("streams", {key: {"stream_id": stream_id, "drops": 0}})
+    progress.add(streams=1, drops=added)
+    failures = 0
+    while added < drops_per_stream:
+        if content:
+            batch = content.batch(key, added, drops_per_stream, batch_size)
+        else:
+            batch = synthetic_drops(
+                title, added, min(added + batch_size, drops_per_stream)
+            )
+        end = added + len(batch)
+        try:
+            add_drops_to_stream(
+                stream_id, batch, verbose=False, chunk_size=batch_size,
+            )
+            landed = end
+        except requests.exceptions.RequestException as e:
+            failures += 1
+            if is_permanent_failure(e) or failures >= MAX_SEED_ATTEMPTS:
+                raise
+            seed_backoff(failures)
+            # Adding drops is not idempotent and the batch may have been
+            # applied before the error; the server's count says how far the
+            # stream really got, so the batch is never added twice
+            landed = get_stream_drop_count(stream_id)
+        if landed > added:
+            failures = 0
+            if journal:
+                journal.merge(
+                    "streams", {key: {"stream_id": stream_id, "drops": landed}}
+                )
+            progress.add(drops=landed - added)
+            added = landed
+    return stream_id
+
+
+def create_seed_pool(index, journal=None, content=None):
+    """Creates the index-th seeding pool unless the journal already has it."""
+    pool_id = journal.state.get("pools", {}).get(str(index)) if journal else None
+    if not pool_id:
+        title, description = f"SEED_POOL_{index + 1}", "Synthetic seeding pool"
+        if content:
+            pool_content = content.pool_content(index)
+            title = f"{title}: {pool_content['title']}"
+            description = pool_content["description"]
+        marker = seed_marker(journal, "pool", index)
+        pool_id = retry_create(
+            create_pool, title, f"{description} [{marker}]", verbose=False,
+            journal=journal, intent=f"pool:{index}", marker=marker,
+        )
+        if journal:
+            journal.merge("pools", {str(index): pool_id})
+    return index, pool_id
+
+
+def seed_large_dataset(pools, streams_per_pool, drops_per_stream,
+                       workers=DEFAULT_SEED_WORKERS,
+                       batch_size=None,
+                       journal=None,
+                       content=None):
+    """Seeds pools x streams x drops of synthetic data on a bounded pool.
+
+    With a checkpoint journal the run is resumable: finished pools and
+    streams are skipped and partly seeded streams are topped up. Drops are
+    sent in batches of the tuned batch size unless batch_size is given.
+    Drops are fixed placeholder payloads unless a ContentGenerator is
+    given; its content depends only on its seed and mix, so the same
+    seed, mix and sizes always produce the same dataset. Pool and
+    stream descriptions end in a [seed-<run>-<kind>-<key>] marker that
+    identifies them if a create's outcome is ever unknown.
+    """
+    batch_size = batch_size or tuned_batch_size()
+    config = {
+        "pools": pools,
+        "streams_per_pool": streams_per_pool,
+        "drops_per_stream": drops_per_stream,
+    }
+    if content:
+        config["content_seed"] = content.seed
+        config["content_profiles"] = content.profile_spec()
+    if journal:
+        saved_config = journal.state.get("config")
+        if saved_config and saved_config != config:
+            print(f"Checkpoint {journal.path} was seeded with {saved_config}; "
+                  "pass --reset to start a new dataset.")
+            sys.exit(2)
+        if saved_config:
+            print(f"--- Resuming seeding from {journal.path} ---")
+        else:
+            journal.update({"config": config})
+        if not journal.state.get("run_id"):
+            journal.update({"run_id": uuid.uuid4().hex[:12]})
+    total_streams = pools * streams_per_pool
+    source = f"content seed {content.seed}" if content else "placeholder content"
+    print(
+        f"--- Seeding {pools} pools x {streams_per_pool} streams x "
+        f"{drops_per_stream} drops ({total_streams * drops_per_stream} drops) "
+        f"with {workers} workers, batches of {batch_size}, {source} ---"
+    )
+    progress = SeedProgress(total_streams, total_streams * drops_per_stream)
+    max_pending = workers * 4
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pool_ids = [None] * pools
+            pool_tasks = (
+                (create_seed_pool, p, journal, content) for p in range(pools)
+            )
+            for index, pool_id in run_bounded(executor, pool_tasks, max_pending):
+                pool_ids[index] = pool_id
+                progress.add(pools=1)
+
+            stream_tasks = (
+                (seed_stream, pool_id, f"Stream {p + 1}.{s + 1}",
+                 drops_per_stream, batch_size, progress, journal, f"{p}.{s}",
+                 content)
+                for p, pool_id in enumerate(pool_ids)
+                for s in range(streams_per_pool)
+            )
+            for _ in run_bounded(executor, stream_tasks, max_pending):
+                pass
+    finally:
+        if journal:
+            journal.close(compact=True)
+    progress.report()
+    print("\n--- Seeding complete! ---")
+    return pool_ids
+
+
+def configure_from_argv():
+    """Selects the environment and applies shared client/report flags."""
     if "--live" in sys.argv:
         set_environment("live")
+    elif "--local" in sys.argv:
+        URLS["local"] = local_server.start_in_background(
+            compress=wire_stats.local_server_compression()
+        )
+        set_environment("local")
     else:
         set_environment("test")
-    
+    api_client.configure_from_argv()
+    metrics.configure_from_argv()
+    traffic.configure_from_argv()
+    log_tailer.configure_from_argv(environment.BASE_URL)
+    profiler.configure_from_argv()
+    wire_stats.configure_from_argv()
+
+
+def content_from_argv():
+    """A ContentGenerator for --content-seed/--content-mix, else None.
+
+    Without either flag seeding keeps its fixed placeholder payloads.
+    """
+    if "--content-seed" not in sys.argv and "--content-mix" not in sys.argv:
+        return None
     try:
-        create_test_data()
+        profiles = parse_profiles(get_flag_value("--content-mix"))
+    except ValueError as e:
+        print(f"Invalid value for --content-mix: {e}")
+        print("Usage: --content-mix note=80,article=15,longform=5")
+        sys.exit(2)
+    return ContentGenerator(get_flag_value("--content-seed", 0, int), profiles)
+
+
+def main():
+    """Main function to set up test data."""
+    configure_from_argv()
+    # Ride out throttling and cold starts instead of aborting
+    if "--no-retry" not in sys.argv:
+        api_client.enable_retries(get_flag_value("--max-attempts", None, int))
+
+    seed_flags = ["--pools", "--streams-per-pool", "--drops-per-stream"]
+    try:
+        if any(flag in sys.argv for flag in seed_flags):
+            workers = get_flag_value("--workers", DEFAULT_SEED_WORKERS, int)
+            api_client.configure(pool_size=workers)
+            if "--no-adaptive" not in sys.argv:
+                # Workers become the ceiling; AIMD finds what the server takes
+                api_client.enable_adaptive_concurrency(workers)
+            state_file = get_flag_value("--checkpoint", SEED_STATE_FILE)
+            if "--reset" in sys.argv:
+                remove_journal(state_file)
+                print("Seed checkpoint has been reset.")
+            seed_large_dataset(
+                get_flag_value("--pools", 1, int),
+                get_flag_value("--streams-per-pool", 10, int),
+                get_flag_value("--drops-per-stream", 100, int),
+                workers=workers,
+                batch_size=get_flag_value("--batch-size", None, int),
+                journal=CheckpointJournal(state_file),
+                content=content_from_argv(),
+            )
+        else:
+            create_test_data()
+    except UnknownCreateOutcome as e:
+        print(f"\n!!! {e}")
+        sys.exit(1)
     except requests.exceptions.RequestException as e:
         print(f"\n!!! Error occurred: {e}")
         if hasattr(e, 'response') and e.response is not None:
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The harness modules live at the repository root, next to the scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import environment  # noqa: E402
+import local_server  # noqa: E402
+
+
+@pytest.fixture
+def server():
+    """Points the harness at a fresh in-process local_server.py."""
+    previous = environment.BASE_URL
+    environment.set_base_url(local_server.start_in_background())
+    yield environment.BASE_URL
+    environment.set_base_url(previous)
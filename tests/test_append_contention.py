@@ -0,0 +1,101 @@
+import bench_append_contention as contention
+import test_10_FE_prep as fe_prep
+
+
+def seeded_stream():
+    pool_id = fe_prep.create_pool(verbose=False)
+    return fe_prep.create_stream(pool_id, "S", "d", verbose=False)
+
+
+def test_concurrent_appends_verify_clean(server):
+    stream_id = seeded_stream()
+    acknowledged, histogram, errors, _ = contention.run_writers(
+        stream_id, writers=4, batches=5, batch_size=2
+    )
+    assert errors == [] and histogram.total == 20
+    walked, issues = contention.verify_placement_list(
+        stream_id, acknowledged, limit=7
+    )
+    assert (walked, issues) == (40, [])
+
+
+def test_tampered_acknowledgements_are_reported(server):
+    stream_id = seeded_stream()
+    acknowledged, _, _, _ = contention.run_writers(
+        stream_id, writers=2, batches=3, batch_size=1
+    )
+    by_writer = sorted(
+        (owner, placement_id) for placement_id, owner in acknowledged.items()
+    )
+    (_, first), (_, second) = by_writer[:2]  # Writer 0's first two drops
+    acknowledged[first], acknowledged[second] = (
+        acknowledged[second], acknowledged[first]
+    )
+    missing = by_writer[-1][1]
+    del acknowledged[missing]
+    acknowledged["never-placed"] = (9, 0)
+
+    walked, issues = contention.verify_placement_list(stream_id, acknowledged)
+    assert walked == 6
+    assert any("placed after drop" in issue for issue in issues)
+    assert f"placement {missing} was never acknowledged" in issues
+    assert any("unreachable (e.g. never-placed)" in issue for issue in issues)
+
+
+class FakePage:
+    def __init__(self, drops, fields):
+        self.drops = drops
+        self.fields = fields
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self.drops)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+
+
+def fake_list(monkeypatch, links):
+    """Serves a placement list whose next links are given as {id: next_id}."""
+    order = list(links)
+    pages = []
+
+    def get_page(url, params):
+        start = order.index(params["from_placement_id"])
+        drops = [
+            {"placement_id": p, "next_placement_id": links[p],
+             "prev_placement_id": order[i - 1] if i else None}
+            for i, p in enumerate(order) if i >= start
+        ]
+        pages.append(FakePage(drops, {"total_count": len(order)}))
+        return pages[-1]
+
+    monkeypatch.setattr(contention, "get_stream", lambda stream_id: {
+        "first_drop_placement_id": order[0],
+        "last_drop_placement_id": order[-1],
+    })
+    monkeypatch.setattr(contention.streaming, "get_page", get_page)
+    return pages
+
+
+def test_cycle_is_reported_and_every_page_closed(monkeypatch):
+    pages = fake_list(monkeypatch, {"a": "b", "b": "c", "c": "a"})
+    acknowledged = {"a": (0, 0), "b": (0, 1), "c": (0, 2)}
+    walked, issues = contention.verify_placement_list("s", acknowledged)
+    assert walked == 3
+    assert "cycle: c links back to a" in issues
+    assert pages and all(page.closed for page in pages)
+
+
+def test_skipped_placement_is_reported(monkeypatch):
+    # a links past b, which is then unreachable
+    pages = fake_list(monkeypatch, {"a": "c", "b": "c", "c": None})
+    acknowledged = {"a": (0, 0), "b": (0, 1), "c": (0, 2)}
+    walked, issues = contention.verify_placement_list("s", acknowledged)
+    assert walked == 2
+    assert "a links to c but the page continues with b" in issues
+    assert any("unreachable (e.g. b)" in issue for issue in issues)
+    assert all(page.closed for page in pages)
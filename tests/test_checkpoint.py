@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from checkpoint import CheckpointJournal, remove_journal
+
+
+def read_entries(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_replay_rebuilds_state(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    journal = CheckpointJournal(path)
+    journal.update({"pool_id": "p1", "last_step": "create_pool"})
+    journal.extend("drop_ids", ["d1", "d2"])
+    journal.merge("validated", {"pool:p1": True})
+    journal.merge("validated", {"drop:d1": True})
+    journal.close()
+
+    replayed = CheckpointJournal(path)
+    assert replayed.state == {
+        "pool_id": "p1",
+        "last_step": "create_pool",
+        "drop_ids": ["d1", "d2"],
+        "validated": {"pool:p1": True, "drop:d1": True},
+    }
+    replayed.close()
+
+
+def test_truncated_last_line_is_discarded_and_overwritten(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    journal = CheckpointJournal(path)
+    journal.update({"last_step": "create_pool"})
+    journal.update({"last_step": "create_stream"})
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op":"set","data":{"last_step":"add_dr')  # Torn write
+
+    replayed = CheckpointJournal(path)
+    assert replayed.state == {"last_step": "create_stream"}
+    assert replayed.discarded_bytes > 0
+    replayed.update({"last_step": "add_drops"})
+    replayed.close()
+
+    assert [e["data"]["last_step"] for e in read_entries(path)] == [
+        "create_pool", "create_stream", "add_drops",
+    ]
+    assert CheckpointJournal(path).state == {"last_step": "add_drops"}
+
+
+def test_corrupt_complete_line_stops_replay(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"op":"set","data":{"a":1}}\n')
+        f.write("not json\n")
+        f.write('{"op":"set","data":{"a":2}}\n')
+    journal = CheckpointJournal(path)
+    assert journal.state == {"a": 1}
+    journal.close()
+
+
+@pytest.mark.parametrize("line", [
+    "[]", '"x"', "3", "null", '{"op":"set","data":[1]}',
+    '{"op":"extend","key":"k","items":5}', '{"op":"merge","key":"k","data":"x"}',
+])
+def test_valid_json_that_is_not_an_entry_stops_replay(tmp_path, line):
+    path = str(tmp_path / "state.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"op":"set","data":{"a":1}}\n')
+        f.write(line + "\n")
+        f.write('{"op":"set","data":{"a":2}}\n')
+    journal = CheckpointJournal(path)
+    assert journal.state == {"a": 1}
+    assert journal.discarded_bytes == len(line) + 1 + len('{"op":"set","data":{"a":2}}') + 1
+    journal.update({"b": 2})
+    journal.close()
+    assert CheckpointJournal(path).state["b"] == 2
+
+
+def test_compaction_writes_one_snapshot(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    journal = CheckpointJournal(path)
+    for i in range(10):
+        journal.merge("streams", {str(i): {"drops": i}})
+    journal.close(compact=True)
+
+    entries = read_entries(path)
+    assert len(entries) == 1
+    assert entries[0]["op"] == "snapshot"
+    assert not (tmp_path / "state.jsonl.tmp").exists()
+    replayed = CheckpointJournal(path)
+    assert replayed.state["streams"]["9"] == {"drops": 9}
+    replayed.merge("streams", {"10": {"drops": 10}})
+    replayed.close()
+    assert len(CheckpointJournal(path).state["streams"]) == 11
+
+
+def test_automatic_compaction_after_compact_every(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    journal = CheckpointJournal(path, compact_every=5)
+    for i in range(12):
+        journal.extend("items", [i])
+    journal.close()
+    assert len(read_entries(path)) < 12
+    assert CheckpointJournal(path).state["items"] == list(range(12))
+
+
+def test_remove_journal(tmp_path):
+    path = str(tmp_path / "state.jsonl")
+    CheckpointJournal(path).close()
+    (tmp_path / "state.jsonl.tmp").write_text("")
+    remove_journal(path)
+    assert list(tmp_path.iterdir()) == []
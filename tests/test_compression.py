@@ -0,0 +1,52 @@
+import pytest
+
+import compression
+from compression import choose_encoding
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP", "gzip"),
+    ("deflate, gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip; q=0.0, identity", None),
+    ("gzip;q=0.5", "gzip"),
+    ("gzip;q=bogus", None),
+    ("x-unknown;q=1, gzip;q=0.1", "gzip"),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
+
+
+@pytest.mark.skipif(compression.brotli is None, reason="brotli not installed")
+@pytest.mark.parametrize("header, expected", [
+    ("br, gzip", "br"),
+    ("gzip, br", "gzip"),
+    ("gzip;q=0.5, br;q=0.8", "br"),
+    ("br;q=0, gzip", "gzip"),
+])
+def test_choose_encoding_with_brotli(header, expected):
+    assert choose_encoding(header) == expected
+
+
+@pytest.mark.skipif(compression.brotli is not None, reason="brotli installed")
+def test_br_is_ignored_without_brotli():
+    assert choose_encoding("br, gzip;q=0.1") == "gzip"
+    with pytest.raises(ValueError, match="brotli"):
+        compression.check_codec("br")
+
+
+def test_gzip_round_trip_is_deterministic():
+    data = b'{"drops": []}' * 200
+    encoded = compression.compress(data, "gzip")
+    assert encoded == compression.compress(data, "gzip")  # mtime=0
+    assert len(encoded) < len(data)
+    assert compression.decompress(encoded, "gzip") == data
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError, match="Unknown content encoding"):
+        compression.compress(b"x", "zstd")
@@ -0,0 +1,88 @@
+import random
+
+import requests
+
+from flow_control import AdaptiveLimiter, RetryPolicy, was_refused
+
+
+def response(status, headers=None):
+    result = requests.Response()
+    result.status_code = status
+    result.headers.update(headers or {})
+    return result
+
+
+def test_limiter_grows_about_one_per_round_of_successes():
+    limiter = AdaptiveLimiter(initial=4, maximum=64)
+    for _ in range(4):
+        limiter.release(limiter.acquire(), overloaded=False)
+    assert 4.9 < limiter.limit < 5.0
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_limiter_never_exceeds_maximum():
+    limiter = AdaptiveLimiter(initial=4, maximum=5)
+    for _ in range(100):
+        limiter.release(limiter.acquire(), overloaded=False)
+    assert limiter.limit == 5
+
+
+def test_limiter_halves_once_per_overloaded_moment():
+    limiter = AdaptiveLimiter(initial=16, minimum=1)
+    sent = [limiter.acquire() for _ in range(3)]
+    for sent_at in sent:  # All sent before the first decrease
+        limiter.release(sent_at, overloaded=True)
+    assert limiter.limit == 8
+    assert limiter.decreases == 1
+
+    limiter.release(limiter.acquire(), overloaded=True)  # Sent after it
+    assert limiter.limit == 4
+    assert limiter.decreases == 2
+
+
+def test_limiter_respects_minimum():
+    limiter = AdaptiveLimiter(initial=2, minimum=2)
+    limiter.release(limiter.acquire(), overloaded=True)
+    assert limiter.limit == 2
+
+
+def test_idempotent_calls_retry_transient_failures():
+    policy = RetryPolicy(max_attempts=3)
+    for status in (429, 502, 503, 504):
+        assert policy.should_retry(0, response(status), None, idempotent=True)
+    assert policy.should_retry(0, None, requests.exceptions.ReadTimeout(), True)
+    assert policy.should_retry(0, None, requests.exceptions.ConnectionError(), True)
+    assert not policy.should_retry(0, response(500), None, idempotent=True)
+    assert not policy.should_retry(0, response(404), None, idempotent=True)
+
+
+def test_non_idempotent_calls_retry_only_refusals():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(0, response(429), None, idempotent=False)
+    assert policy.should_retry(0, response(503), None, idempotent=False)
+    assert policy.should_retry(0, None, requests.exceptions.ConnectTimeout(), False)
+    assert not policy.should_retry(0, response(502), None, idempotent=False)
+    assert not policy.should_retry(0, response(504), None, idempotent=False)
+    assert not policy.should_retry(0, None, requests.exceptions.ReadTimeout(), False)
+    assert not policy.should_retry(0, None, requests.exceptions.ConnectionError(), False)
+
+
+def test_retries_stop_at_max_attempts():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(1, response(503), None, idempotent=True)
+    assert not policy.should_retry(2, response(503), None, idempotent=True)
+
+
+def test_delay_is_jittered_backoff_raised_by_retry_after():
+    policy = RetryPolicy(base_delay=1.0, max_delay=16.0, rng=random.Random(1))
+    assert all(0 <= policy.delay(3) <= 8.0 for _ in range(50))
+    assert policy.delay(0, response(503, {"Retry-After": "5"})) == 5.0
+    assert policy.delay(0, response(503, {"Retry-After": "60"})) == 16.0
+    assert policy.delay(0, response(503, {"Retry-After": "Wed, 21 Oct"})) <= 1.0
+
+
+def test_was_refused():
+    assert was_refused(response(429), None)
+    assert was_refused(None, requests.exceptions.ConnectTimeout())
+    assert not was_refused(response(500), None)
+    assert not was_refused(None, requests.exceptions.ReadTimeout())
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import requests
+
+import bench_heartbeat
+from bench_heartbeat import HeartbeatSimulator, VirtualReader
+
+STREAMS = [
+    ("s1", [(f"d{i}", f"p{i}") for i in range(100)]),
+    ("s2", [("e0", "q0"), ("e1", "q1")]),
+]
+
+
+def fake_progress(monkeypatch, delay=0.0, fail=False):
+    """Replaces the progress POST; returns the (user_id, placement_id) sent."""
+    sent = []
+    lock = threading.Lock()
+
+    def update_user_progress(pool_id, stream_id, drop_id, placement_id, user_id):
+        time.sleep(delay)
+        with lock:
+            sent.append((user_id, placement_id))
+        if fail:
+            raise requests.exceptions.ConnectionError("down")
+
+    monkeypatch.setattr(
+        bench_heartbeat.fe_prep, "update_user_progress", update_user_progress
+    )
+    return sent
+
+
+# Rates, durations and windows are powers of two so tick times add up exactly
+def simulate(readers=2, rate=64, duration=0.25, **kwargs):
+    simulator = HeartbeatSimulator(
+        "pool", [STREAMS[0]], readers, rate, duration, workers=4, **kwargs
+    )
+    dispatched = []
+    dispatch = simulator.dispatch
+
+    def record(executor, reader, heartbeat, now):
+        dispatched.append((reader.user_id, now))
+        dispatch(executor, reader, heartbeat, now)
+
+    simulator.dispatch = record
+    return simulator, simulator.run(), dispatched
+
+
+def test_without_coalescing_every_tick_is_sent(monkeypatch):
+    sent = fake_progress(monkeypatch)
+    _, result, _ = simulate()
+    assert result["ticks"] == 32
+    assert result["sent"] == result["ok"] == len(sent) == 32
+    assert result["superseded"] == 0
+    # Each reader reports its drops in reading order
+    reader = sent[0][0]
+    assert [p for u, p in sent if u == reader] == [f"p{i}" for i in range(16)]
+
+
+def test_coalescing_sends_only_the_latest_position_per_window(monkeypatch):
+    sent = fake_progress(monkeypatch)
+    window = 1 / 16  # Four ticks per window
+    simulator, result, dispatched = simulate(coalesce_window=window)
+    pending = sum(r.pending is not None for r in simulator.readers)
+    assert result["ticks"] == 32
+    assert result["ticks"] == result["sent"] + result["superseded"] + pending
+    assert result["sent"] <= 2 * (0.25 / window + 1)
+    assert result["superseded"] >= 16
+    for reader in simulator.readers:
+        times = [now for user, now in dispatched if user == reader.user_id]
+        assert all(b - a >= window for a, b in zip(times, times[1:]))
+        positions = [int(p[1:]) for u, p in sent if u == reader.user_id]
+        assert positions == sorted(positions) and positions[0] == 0
+        # The positions in between were superseded, never sent
+        assert len(positions) < positions[-1] + 1
+
+
+def test_saturated_client_drops_heartbeats(monkeypatch):
+    fake_progress(monkeypatch, delay=0.3)
+    simulator = HeartbeatSimulator(
+        "pool", [STREAMS[0]], readers=8, rate=64, duration=0.25, workers=1
+    )
+    result = simulator.run()
+    assert result["sent"] == 4  # workers * 4 in flight at most
+    assert result["backlog_drops"] == result["ticks"] - 4
+
+
+def test_failed_heartbeats_are_counted(monkeypatch):
+    fake_progress(monkeypatch, fail=True)
+    _, result, _ = simulate(duration=0.125)
+    assert result["errors"] == 16 and result["ok"] == 0
+    assert result["error_rate"] == 1.0
+
+
+def test_reader_moves_on_to_another_stream_at_the_end():
+    class FirstThenSecond:
+        def __init__(self):
+            self.picks = iter(STREAMS[1:] + STREAMS[:1])
+
+        def choice(self, streams):
+            return next(self.picks)
+
+    reader = VirtualReader("u", STREAMS, FirstThenSecond())
+    heartbeats = [reader.advance() for _ in range(3)]
+    assert heartbeats == [("s2", "e0", "q0"), ("s2", "e1", "q1"), ("s1", "d0", "p0")]
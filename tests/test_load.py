@@ -0,0 +1,64 @@
+import pytest
+import requests
+
+import test_01_endpoints as endpoints
+
+
+@pytest.fixture
+def steps(monkeypatch):
+    """Replaces the workflow's requests with instant stand-ins."""
+    monkeypatch.setattr(endpoints, "load_create_pool", lambda creator: "pool")
+    monkeypatch.setattr(endpoints, "load_create_stream", lambda pool, creator: "stream")
+    monkeypatch.setattr(endpoints, "load_add_drops", lambda stream, creator: [
+        {"drop_id": "d", "placement_id": "p"},
+    ])
+    monkeypatch.setattr(endpoints, "load_update_progress", lambda *args: None)
+    monkeypatch.setattr(endpoints, "load_get_river", lambda user: [])
+    return monkeypatch
+
+
+def run(users, concurrency=2):
+    return endpoints.run_virtual_users(users, concurrency)
+
+
+def test_completed_workflows(steps):
+    results, latencies, errors, _ = run(3)
+    assert results == [True, True, True]
+    assert latencies["get_river"].total == 3
+    assert not any(errors.values())
+
+
+def test_request_failure_fails_only_its_workflow(steps):
+    calls = []
+
+    def river(user):
+        calls.append(user)
+        if len(calls) == 1:
+            raise requests.exceptions.ConnectionError("down")
+        return []
+
+    steps.setattr(endpoints, "load_get_river", river)
+    results, _, errors, _ = run(3, concurrency=1)
+    assert results == [False, True, True]
+    assert errors["get_river"] == 1
+
+
+def test_unexpected_error_does_not_abort_the_run(steps, capsys):
+    steps.setattr(endpoints, "load_get_river", lambda user: {}["records"])
+    results, _, errors, _ = run(2)
+    assert results == [False, False]
+    assert errors["get_river"] == 2
+    assert "2 workflows failed with unexpected errors" in capsys.readouterr().out
+
+
+def test_empty_drop_list_fails_the_workflow(steps):
+    steps.setattr(endpoints, "load_add_drops", lambda stream, creator: [])
+    results, latencies, errors, _ = run(1)
+    assert results == [False]
+    assert errors["add_drops"] == 1
+    assert latencies["update_progress"].total == 0
+
+
+def test_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        run(1, concurrency=0)
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+import requests
+
+import load_driver
+from load_driver import OpenLoopDriver
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def install(monkeypatch, delay=0.0, status_code=200, error=False):
+    """Replaces the operations with one stand-in that takes `delay` seconds."""
+    def op(workload, rng):
+        time.sleep(delay)
+        if error:
+            raise requests.exceptions.ConnectionError("down")
+        return FakeResponse(status_code)
+
+    monkeypatch.setattr(load_driver, "OPERATIONS", {"op": op})
+
+
+# Rates and durations are powers of two so the schedule adds up exactly
+def drive(rate, duration, **kwargs):
+    driver = OpenLoopDriver(None, {"op": 1}, rate, duration, **kwargs)
+    driver.run(report=False)
+    return driver
+
+
+def test_schedule_is_independent_of_response_times(monkeypatch):
+    install(monkeypatch, delay=0.02)
+    driver = drive(rate=128, duration=0.25, workers=1)
+    # A closed loop on one worker would manage ~12; the schedule keeps 32 due
+    assert driver.scheduled == 32
+    assert driver.corrected["op"].total == 32 and driver.dropped == 0
+
+
+def test_latency_includes_queueing_behind_a_slow_server(monkeypatch):
+    install(monkeypatch, delay=0.02)
+    driver = drive(rate=128, duration=0.25, workers=1)
+    service_p99 = driver.service["op"].percentile(99)
+    corrected_p99 = driver.corrected["op"].percentile(99)
+    assert 0.015 < service_p99 < 0.1
+    # The last request is due at 0.24s but waits for the 31 ahead of it
+    assert corrected_p99 > 0.3
+    assert driver.corrected["op"].percentile(50) > 3 * service_p99
+
+
+def test_fast_server_latency_matches_service_time(monkeypatch):
+    install(monkeypatch)
+    driver = drive(rate=256, duration=0.25, workers=4)
+    assert driver.scheduled == 64
+    assert driver.corrected["op"].percentile(99) < 0.05
+
+
+def test_requests_beyond_max_in_flight_are_dropped(monkeypatch):
+    install(monkeypatch, delay=0.2)
+    driver = drive(rate=128, duration=0.125, workers=2, max_in_flight=3)
+    assert driver.scheduled == 16
+    assert driver.dropped == 13
+    assert driver.corrected["op"].total == 3
+
+
+def test_errors_and_failures_are_counted(monkeypatch):
+    install(monkeypatch, status_code=503)
+    assert drive(rate=128, duration=0.0625).errors["op"] == 8
+    install(monkeypatch, error=True)
+    assert drive(rate=128, duration=0.0625).errors["op"] == 8
+
+
+def test_poisson_arrivals_average_the_rate(monkeypatch):
+    install(monkeypatch)
+    driver = drive(rate=1024, duration=0.25, workers=8, poisson=True, seed=3)
+    assert 200 < driver.scheduled < 312
+
+
+def test_merge_adds_worker_results(monkeypatch):
+    install(monkeypatch)
+    first = drive(rate=128, duration=0.0625)
+    second = drive(rate=128, duration=0.125)
+    first.merge(second.to_dict())
+    assert first.scheduled == 24
+    assert first.corrected["op"].total == 24
+
+
+@pytest.mark.parametrize("rate", [0, -1.0])
+def test_non_positive_rate_is_rejected(rate):
+    with pytest.raises(ValueError):
+        OpenLoopDriver(None, {"op": 1}, rate, 1.0)
@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+import requests
+
+import local_server
+
+
+@pytest.fixture
+def server():
+    server = local_server.WisdomPoolServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_unknown_path_is_404(server):
+    response = requests.get(f"{server.base_url}/api/v1/nowhere")
+    assert response.status_code == 404
+
+
+def test_unsupported_method_on_a_known_path_is_405(server):
+    response = requests.delete(f"{server.base_url}/health")
+    assert response.status_code == 405
+    assert response.headers["Allow"] == "GET"
+    assert response.json() == {"detail": "Method Not Allowed"}
+
+
+def test_handler_crash_is_a_500_json_error(server, monkeypatch):
+    def crash(*args):
+        raise KeyError("boom")
+
+    monkeypatch.setattr(server.store, "get_river", crash)
+    response = requests.get(
+        f"{server.base_url}/api/v1/user/river", headers={"X-User-Id": "u"}
+    )
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Internal Server Error"}
+    assert any("crashed: KeyError" in line for line in server.log_handler.lines)
+    # The server keeps serving after the crash
+    assert requests.get(f"{server.base_url}/health").status_code == 200
@@ -0,0 +1,118 @@
+import io
+
+import requests
+
+import api_client
+import local_server
+from log_tailer import LogTailer, parse_log_line
+
+
+def line(ms, message, request_id=None):
+    tag = f" [request_id={request_id}]" if request_id else ""
+    return f"2026-01-01 10:00:00,{ms:03d} - api_logger - INFO - {message}{tag}"
+
+
+class BufferWithoutOffsets:
+    """Stands in for the real GET /logs, which always returns everything."""
+
+    def __init__(self):
+        self.lines = []
+
+    def get(self, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO("".join(l + "\n" for l in self.lines).encode())
+        return response
+
+
+def tailer_without_offsets(monkeypatch):
+    server = BufferWithoutOffsets()
+    monkeypatch.setattr(api_client, "get", server.get)
+    return server, LogTailer("http://server")
+
+
+def test_fallback_returns_only_lines_after_the_last_seen_one(monkeypatch):
+    server, tailer = tailer_without_offsets(monkeypatch)
+    server.lines = [line(1, "old")]
+    tailer.seek_to_end()
+    assert tailer.incremental is False
+    server.lines += [line(2, "first"), line(3, "second")]
+    assert tailer.fetch() == [line(2, "first"), line(3, "second")]
+    assert tailer.fetch() == []
+    server.lines.append(line(4, "third"))
+    assert tailer.fetch() == [line(4, "third")]
+
+
+def test_fallback_survives_rotation(monkeypatch):
+    server, tailer = tailer_without_offsets(monkeypatch)
+    server.lines = [line(i, f"line {i}") for i in range(5)]
+    tailer.seek_to_end()
+    # The buffer drops its oldest lines while new ones arrive: a line count
+    # would now skip new lines, the anchor does not
+    server.lines = server.lines[3:] + [line(5, "new a"), line(6, "new b")]
+    assert tailer.fetch() == [line(5, "new a"), line(6, "new b")]
+
+
+def test_fallback_after_clear_takes_every_line(monkeypatch):
+    server, tailer = tailer_without_offsets(monkeypatch)
+    server.lines = [line(1, "before clear")]
+    tailer.seek_to_end()
+    server.lines = [line(2, "Log cleared."), line(3, "after")]
+    assert tailer.fetch() == [line(2, "Log cleared."), line(3, "after")]
+    assert tailer.lines_fetched == 2
+
+
+def test_offsets_against_local_server():
+    base_url = local_server.start_in_background()
+    tailer = LogTailer(base_url)
+    tailer.seek_to_end()
+    assert tailer.incremental is True
+    response = api_client.get(f"{base_url}/health")
+    request_id = response.request.headers["X-Request-Id"]
+    lines = tailer.poll()
+    assert [parse_log_line(line)["logger"] for line in lines] == ["api_logger"]
+    assert tailer.lines_for(request_id)[0]["server_ms"] is not None
+    assert tailer.fetch() == []
+
+
+def test_parse_log_line():
+    entry = parse_log_line(line(7, "GET /health -> 200 in 1.25ms", "abc"))
+    assert entry["request_id"] == "abc"
+    assert entry["server_ms"] == 1.25
+    assert parse_log_line("not a log line") is None
+
+
+def test_poll_returns_unparsed_lines_as_written(monkeypatch):
+    server, tailer = tailer_without_offsets(monkeypatch)
+    tailer.seek_to_end()
+    traceback = ["Traceback (most recent call last):", '  File "app.py"',
+                 "KeyError: 'x'"]
+    server.lines = [line(1, "GET /x -> 500 in 2.00ms", "r1"), *traceback]
+    assert tailer.poll() == server.lines
+    assert len(tailer.lines_for("r1")) == 1
+
+
+def test_untagged_server_falls_back_to_the_request_time_window(monkeypatch):
+    server, tailer = tailer_without_offsets(monkeypatch)
+    tailer.seek_to_end()
+    server.lines = [
+        "2026-01-01 10:00:01,000 - app - INFO - before",
+        "2026-01-01 10:00:05,000 - app - ERROR - during",
+        "2026-01-01 10:00:09,000 - app - INFO - after",
+    ]
+    tailer.poll()
+    assert tailer.tagged is False
+    start = parse_log_line(server.lines[1])["time"] - 0.5
+    lines, by_id = tailer.lines_for_request("r1", start, start + 1)
+    assert by_id is False
+    assert [entry["message"] for entry in lines] == ["during"]
+
+
+def test_tagged_server_matches_by_request_id(monkeypatch):
+    server, tailer = tailer_without_offsets(monkeypatch)
+    tailer.seek_to_end()
+    server.lines = [line(1, "mine", "r1"), line(2, "other", "r2")]
+    tailer.poll()
+    lines, by_id = tailer.lines_for_request("r1", 0, 0)
+    assert by_id is True
+    assert [entry["message"] for entry in lines] == ["mine"]
@@ -0,0 +1,58 @@
+import pytest
+
+from metrics import LatencyHistogram, endpoint_template
+
+
+def filled(values_ms):
+    histogram = LatencyHistogram()
+    for value in values_ms:
+        histogram.record(value / 1000)
+    return histogram
+
+
+def test_empty_histogram_percentile_is_zero():
+    assert LatencyHistogram().percentile(99) == 0.0
+
+
+def test_percentiles_keep_two_significant_digits():
+    histogram = filled(range(1, 1001))  # 1..1000 ms
+    for pct, expected_ms in ((50, 500), (90, 900), (99, 990), (100, 1000)):
+        assert histogram.percentile(pct) * 1000 == pytest.approx(expected_ms, rel=0.01)
+
+
+def test_percentile_never_exceeds_max():
+    histogram = filled([3.7])
+    assert histogram.percentile(100) == pytest.approx(0.0037)
+
+
+def test_merge_matches_recording_everything_in_one():
+    left, right = filled(range(1, 500)), filled(range(500, 1001))
+    left.merge(right)
+    combined = filled(range(1, 1001))
+    assert left.total == combined.total
+    assert left.counts == combined.counts
+    assert (left.min_us, left.max_us, left.sum_us) == (
+        combined.min_us, combined.max_us, combined.sum_us
+    )
+    assert left.percentile(95) == combined.percentile(95)
+
+
+def test_merge_into_empty_histogram():
+    histogram = LatencyHistogram()
+    histogram.merge(filled([5, 7]))
+    assert histogram.min_us == 5000
+    assert histogram.percentile(100) == pytest.approx(0.007, rel=0.01)
+
+
+def test_dict_round_trip():
+    histogram = filled([1, 20, 300])
+    restored = LatencyHistogram.from_dict(histogram.to_dict())
+    assert restored.counts == histogram.counts
+    assert restored.percentile(50) == histogram.percentile(50)
+
+
+def test_endpoint_template_replaces_ids():
+    assert endpoint_template(
+        "http://host/api/v1/streams/abc/drops?limit=10"
+    ) == "/streams/{stream_id}/drops"
+    assert endpoint_template("http://host/health") == "/health"
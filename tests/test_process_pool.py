@@ -0,0 +1,25 @@
+import pytest
+
+import process_pool
+
+
+def test_parent_only_flags_are_refused_with_processes(monkeypatch):
+    monkeypatch.setattr(process_pool.sys, "argv", ["x", "--users", "5", "--record"])
+    with pytest.raises(SystemExit) as exit_info:
+        process_pool.check_worker_flags(2)
+    assert exit_info.value.code == 2
+
+
+def test_parent_only_flags_are_fine_in_one_process(monkeypatch):
+    monkeypatch.setattr(process_pool.sys, "argv", ["x", "--users", "5", "--record"])
+    process_pool.check_worker_flags(1)
+
+
+def test_local_server_sharing_is_announced(monkeypatch, capsys):
+    monkeypatch.setattr(process_pool.sys, "argv", ["x", "--local"])
+    process_pool.check_worker_flags(4)
+    assert "share the one --local stand-in" in capsys.readouterr().out
+
+
+def test_split_evenly():
+    assert process_pool.split_evenly(10, 3) == [4, 3, 3]
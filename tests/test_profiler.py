@@ -0,0 +1,28 @@
+import threading
+import time
+
+import profiler
+
+
+def test_report_stats_stay_fixed_while_threads_still_run(monkeypatch):
+    monkeypatch.setattr(profiler, "CALIBRATION_CALLS", 100)
+    harness = profiler.HarnessProfiler(trace_memory=False)
+    harness.start()
+    stop = threading.Event()
+
+    def busy():
+        while not stop.is_set():
+            sum(range(10))
+
+    thread = threading.Thread(target=busy)
+    thread.start()
+    try:
+        time.sleep(0.05)
+        harness.stop()
+        calls = harness.stats().total_calls
+        time.sleep(0.05)  # The thread's own profiler is still running
+        assert harness.stats().total_calls == calls
+        assert len(harness.profiles) == 2
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,28 @@
+import api_client
+import bench_regression
+
+
+def baseline(server, commit_hash, recorded_at):
+    return {"server": server, "commit_hash": commit_hash,
+            "recorded_at": recorded_at}
+
+
+def test_baselines_are_kept_per_server(tmp_path, monkeypatch):
+    monkeypatch.setattr(bench_regression, "BASELINE_DIR", str(tmp_path))
+    bench_regression.save_baseline(baseline("http://a", "abc", "2026-01-01"))
+    bench_regression.save_baseline(baseline("http://b", "abc", "2026-01-02"))
+    bench_regression.save_baseline(baseline("http://b", "def", "2026-01-03"))
+
+    assert bench_regression.load_baseline("http://a")["recorded_at"] == "2026-01-01"
+    assert bench_regression.load_baseline("http://b")["commit_hash"] == "def"
+    assert bench_regression.load_baseline("http://b", "abc")["recorded_at"] == "2026-01-02"
+    assert bench_regression.load_baseline("http://a", "def") is None
+    assert bench_regression.load_baseline("http://c") is None
+
+
+def test_suite_hook_is_removed_after_its_run(monkeypatch):
+    suite = bench_regression.RegressionSuite()
+    monkeypatch.setattr(suite, "run_scenarios", lambda: None)
+    suite.run()
+    suite.run()
+    assert suite.record_request not in api_client._request_hooks
@@ -0,0 +1,69 @@
+import bench_river
+from bench_heartbeat import seed_reading_streams
+from bench_river import RiverContention
+
+
+def record(stream_id, second):
+    return {"stream_id": stream_id, "updated_at": f"2026-01-01T00:00:{second:02d}Z"}
+
+
+def check(records, expected="s1", allowed=("s1",)):
+    contention = RiverContention("pool", [], users=1, readers=1, writers=1)
+    return contention.check_read("u", records, expected, set(allowed))
+
+
+def test_consistent_read_passes():
+    assert check([record("s1", 9), record("s2", 5), record("s3", 5)]) == []
+
+
+def test_read_before_any_write_checks_only_order_and_cap():
+    assert check([record("s2", 9)], expected=None, allowed={None}) == []
+
+
+def test_missing_just_touched_stream_is_reported():
+    assert check([record("s2", 9)]) == ["u: just-touched stream s1 missing"]
+
+
+def test_stale_newest_record_is_reported():
+    assert check([record("s2", 9), record("s1", 5)]) == [
+        "u: newest record is s2, expected s1",
+    ]
+
+
+def test_write_overlapping_the_read_may_be_newest():
+    assert check([record("s2", 9), record("s1", 5)], allowed={"s1", "s2"}) == []
+
+
+def test_order_and_cap_are_checked():
+    records = [record("s1", 1), record("s2", 2)]
+    assert check(records) == ["u: records are not ordered newest updated_at first"]
+    records = [record("s1", 59)] + [
+        record(f"s{i}", 0) for i in range(2, bench_river.RIVER_LIMIT + 2)
+    ]
+    assert check(records) == [f"u: 31 records exceeds cap {bench_river.RIVER_LIMIT}"]
+
+
+def test_river_stays_consistent_under_concurrent_writes(server):
+    pool_id, streams = seed_reading_streams(4, 2)
+    contention = RiverContention(pool_id, streams, users=3, readers=2, writers=3)
+    assert bench_river.run_river_benchmark(contention, 0.3)
+    loaded = contention.run_phase("Again", 0.3, True)
+    assert loaded["reads"] and loaded["writes"]
+    assert loaded["read_errors"] == loaded["write_errors"] == 0
+    assert loaded["violations"] == []
+
+
+def test_stale_river_is_caught(server, monkeypatch):
+    pool_id, streams = seed_reading_streams(4, 2)
+    contention = RiverContention(pool_id, streams, users=2, readers=2, writers=2)
+    # A river that never changes misses every later write
+    first_read = {}
+
+    def frozen_river(user_id):
+        if user_id not in first_read:
+            first_read[user_id] = get_river(user_id)
+        return first_read[user_id]
+
+    get_river = bench_river.get_river
+    monkeypatch.setattr(bench_river, "get_river", frozen_river)
+    assert not bench_river.run_river_benchmark(contention, 0.3)
@@ -0,0 +1,51 @@
+import random
+
+import scenario_runner
+from load_driver import Workload
+
+STREAMS = [(f"s{i}", [(f"d{i}.{j}", f"p{i}.{j}") for j in range(4)])
+           for i in range(3)]
+
+
+def user(reading_depth):
+    population = scenario_runner.Population({
+        "name": "readers", "users": 1, "mix": {"update_progress": 1},
+        "reading_depth": reading_depth,
+    }, 10.0)
+    return scenario_runner.VirtualUser(
+        "u", population, Workload("pool", STREAMS, []), None, random.Random(1)
+    )
+
+
+def test_depth_zero_opens_streams_without_progress():
+    reader = user(0.0)
+    streams = set()
+    for _ in range(20):
+        assert not reader.wants_progress()
+        streams.add(reader.stream_id)
+    assert len(streams) > 1  # Moves on after each look
+    assert reader.population.recorded_names == ["update_progress", "open_stream"]
+
+
+def test_reads_to_the_target_depth_then_moves_on():
+    reader = user(0.5)
+    first = reader.stream_id
+    read = []
+    for _ in range(2):
+        assert reader.wants_progress()
+        read.append(reader.next_drop())
+    assert read == STREAMS[int(first[1:])][1][:2]
+    assert reader.finished
+    assert reader.wants_progress()
+    assert reader.position == 0
+
+
+def test_mixed_depths_keep_zero_draws():
+    reader = user({"distribution": "uniform", "min": 0.0, "max": 0.2})
+    looks = 0
+    for _ in range(200):
+        if reader.wants_progress():
+            reader.next_drop()
+        else:
+            looks += 1
+    assert looks > 50  # round(depth * 4) is 0 for depths below 0.125
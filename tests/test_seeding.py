@@ -0,0 +1,116 @@
+import pytest
+import requests
+
+import test_10_FE_prep as fe_prep
+from checkpoint import CheckpointJournal
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status}", response=response)
+
+
+def failing(*errors, result="new-id"):
+    calls = []
+
+    def create(*args, **kwargs):
+        calls.append(args)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return create, calls
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = CheckpointJournal(str(tmp_path / "seed.jsonl"))
+    yield journal
+    journal.close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(fe_prep, "seed_backoff", lambda failures: None)
+
+
+def test_refused_create_is_retried(journal):
+    create, calls = failing(http_error(503), requests.exceptions.ConnectTimeout())
+    assert fe_prep.retry_create(
+        create, journal=journal, intent="pool:0", marker="m"
+    ) == "new-id"
+    assert len(calls) == 3
+    assert journal.state["intents"] == {"pool:0": "m"}
+
+
+def test_ambiguous_create_is_not_retried(journal):
+    create, calls = failing(requests.exceptions.ReadTimeout("timed out"))
+    with pytest.raises(fe_prep.UnknownCreateOutcome, match="marker m"):
+        fe_prep.retry_create(create, journal=journal, intent="pool:0", marker="m")
+    assert len(calls) == 1
+    assert journal.state["intents"] == {"pool:0": "m"}
+
+
+def test_server_error_create_is_not_retried(journal):
+    create, calls = failing(http_error(500))
+    with pytest.raises(fe_prep.UnknownCreateOutcome):
+        fe_prep.retry_create(create, journal=journal, intent="pool:0", marker="m")
+    assert len(calls) == 1
+
+
+def test_rejected_create_clears_its_intent(journal):
+    create, _ = failing(http_error(422))
+    with pytest.raises(requests.exceptions.HTTPError):
+        fe_prep.retry_create(create, journal=journal, intent="pool:0", marker="m")
+    assert journal.state["intents"] == {"pool:0": None}
+    create, calls = failing()
+    assert fe_prep.retry_create(
+        create, journal=journal, intent="pool:0", marker="m"
+    ) == "new-id"
+
+
+def test_unresolved_intent_stops_a_resumed_run(journal, monkeypatch):
+    journal.merge("intents", {"stream:0.1": "m"})
+    create, calls = failing()
+    with pytest.raises(fe_prep.UnknownCreateOutcome, match="--recreate-unknown"):
+        fe_prep.retry_create(create, journal=journal, intent="stream:0.1", marker="m")
+    assert calls == []
+
+    monkeypatch.setattr("sys.argv", ["test_10_FE_prep.py", "--recreate-unknown"])
+    assert fe_prep.retry_create(
+        create, journal=journal, intent="stream:0.1", marker="m"
+    ) == "new-id"
+
+
+def test_tuned_batch_size_only_applies_to_the_server_it_was_measured_on(
+        tmp_path, monkeypatch):
+    path = tmp_path / "batch_size.json"
+    path.write_text('{"best_batch_size": 250, "base_url": "http://measured"}')
+    monkeypatch.setattr(fe_prep, "BATCH_SIZE_FILE", str(path))
+    monkeypatch.setattr(fe_prep, "_tuned_batch_sizes", {})
+    monkeypatch.setattr(fe_prep.environment, "BASE_URL", "http://measured")
+    assert fe_prep.tuned_batch_size() == 250
+    monkeypatch.setattr(fe_prep.environment, "BASE_URL", "http://other")
+    assert fe_prep.tuned_batch_size() == fe_prep.DEFAULT_SEED_BATCH_SIZE
+
+
+def test_placeholder_content_without_content_flags(monkeypatch):
+    monkeypatch.setattr(fe_prep.sys, "argv", ["test_10_FE_prep.py", "--pools", "1"])
+    assert fe_prep.content_from_argv() is None
+
+
+def test_content_flags_select_a_generator(monkeypatch):
+    monkeypatch.setattr(fe_prep.sys, "argv", [
+        "test_10_FE_prep.py", "--content-seed", "7", "--content-mix", "note=3",
+    ])
+    content = fe_prep.content_from_argv()
+    assert content.seed == 7
+    assert content.profile_spec() == "note=3"
+
+
+@pytest.mark.parametrize("mix", ["tweet=5", "note=abc", "note=0"])
+def test_malformed_content_mix_is_a_usage_error(monkeypatch, mix):
+    monkeypatch.setattr(fe_prep.sys, "argv", ["test_10_FE_prep.py", "--content-mix", mix])
+    with pytest.raises(SystemExit) as exit_info:
+        fe_prep.content_from_argv()
+    assert exit_info.value.code == 2
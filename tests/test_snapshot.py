@@ -0,0 +1,98 @@
+import gzip
+import json
+
+import pytest
+
+import api_client
+import environment
+import snapshot
+import test_10_FE_prep as fe_prep
+
+
+def get_json(path, **kwargs):
+    response = api_client.get(f"{environment.API_V1_URL}{path}", **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+def all_drops(stream_id):
+    page = get_json(f"/streams/{stream_id}/drops", params={"limit": 10_000})
+    return page["drops"]
+
+
+def river(user_id):
+    return get_json("/user/river", headers={"X-User-Id": user_id})["records"]
+
+
+def test_export_then_restore_recreates_the_pool(server, tmp_path):
+    pool_id = fe_prep.create_pool("Snapshot", "Round trip", verbose=False)
+    sizes = [0, 7, 1200]
+    stream_ids = []
+    for i, size in enumerate(sizes):
+        stream_id = fe_prep.create_stream(
+            pool_id, f"Stream {i}", "desc", category="Cat", verbose=False
+        )
+        if size:
+            fe_prep.add_drops_to_stream(
+                stream_id, fe_prep.synthetic_drops(f"S{i}", 0, size),
+                verbose=False, chunk_size=500,
+            )
+        stream_ids.append(stream_id)
+    # Older progress first: the river lists the newest stream first
+    for user_id, stream_index, position in (
+        ("reader_a", 2, 1000), ("reader_a", 1, 3), ("reader_b", 2, 0),
+    ):
+        drop = all_drops(stream_ids[stream_index])[position]
+        fe_prep.update_user_progress(
+            pool_id, stream_ids[stream_index], drop["drop_id"],
+            drop["placement_id"], user_id=user_id,
+        )
+
+    path = str(tmp_path / "pool.snapshot.gz")
+    snapshot.export_snapshot(path, pool_id, stream_ids, ["reader_a", "reader_b"],
+                             workers=2, page_limit=100)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert json.loads(f.readline())["format"] == snapshot.SNAPSHOT_FORMAT
+
+    new_pool_id, new_stream_ids = snapshot.restore_snapshot(
+        path, workers=3, batch_size=250
+    )
+    assert new_pool_id != pool_id
+    assert get_json(f"/pools/{new_pool_id}")["content"]["title"] == "Snapshot"
+    for old, new, size in zip(stream_ids, new_stream_ids, sizes):
+        stream = get_json(f"/streams/{new}")
+        assert stream["pool_id"] == new_pool_id
+        assert stream["content"] == get_json(f"/streams/{old}")["content"]
+        assert [d["content"] for d in all_drops(new)] == [
+            d["content"] for d in all_drops(old)
+        ]
+        assert len(all_drops(new)) == size
+
+    # Reading positions and river order survive the round trip. The river
+    # is per user, so the restored records sit next to the originals.
+    restored_a = [
+        (new_stream_ids.index(r["stream_id"]), r["last_read_drop_id"])
+        for r in river("reader_a") if r["stream_id"] in new_stream_ids
+    ]
+    assert [index for index, _ in restored_a] == [1, 2]
+    positions = {
+        index: [d["drop_id"] for d in all_drops(new_stream_ids[index])].index(drop_id)
+        for index, drop_id in restored_a
+    }
+    assert positions == {1: 3, 2: 1000}
+
+
+def test_restore_rejects_a_truncated_snapshot(server, tmp_path):
+    pool_id = fe_prep.create_pool("Snapshot", "Truncated", verbose=False)
+    stream_id = fe_prep.create_stream(pool_id, "S", "d", verbose=False)
+    fe_prep.add_drops_to_stream(
+        stream_id, fe_prep.synthetic_drops("S", 0, 10), verbose=False
+    )
+    path = str(tmp_path / "pool.snapshot.gz")
+    snapshot.export_snapshot(path, pool_id, [stream_id])
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        lines = f.readlines()
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.writelines(lines[:-1])  # Drop the end record
+    with pytest.raises(ValueError, match="truncated"):
+        snapshot.restore_snapshot(path, workers=2)
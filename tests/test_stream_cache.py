@@ -0,0 +1,83 @@
+import pytest
+import requests
+
+import environment
+import streaming
+import test_10_FE_prep as fe_prep
+from stream_cache import StreamCache
+
+
+def new_stream(drops=0):
+    pool_id = fe_prep.create_pool(verbose=False)
+    stream_id = fe_prep.create_stream(pool_id, "S", "d", verbose=False)
+    if drops:
+        fe_prep.add_drops_to_stream(
+            stream_id, fe_prep.synthetic_drops("S", 0, drops), verbose=False
+        )
+    return stream_id
+
+
+def append(stream_id, start, end):
+    drop_ids, placement_ids = fe_prep.add_drops_to_stream(
+        stream_id, fe_prep.synthetic_drops("S", start, end), verbose=False
+    )
+    return list(zip(drop_ids, placement_ids))
+
+
+def test_loads_every_page_in_order(server):
+    stream_id = new_stream(25)
+    cache = StreamCache(environment.API_V1_URL, page_limit=10)
+    index = cache.get_stream(stream_id)
+    assert len(index) == 25
+    assert cache.pages_fetched == 3
+    drop_id, placement_id = index.records()[17]
+    assert cache.placement_for_drop(stream_id, drop_id) == placement_id
+    assert cache.drop_for_placement(stream_id, placement_id) == drop_id
+    assert cache.hits == 2 and cache.misses == 0
+
+
+def test_drops_appended_to_an_empty_stream_are_found(server):
+    stream_id = new_stream()
+    cache = StreamCache(environment.API_V1_URL, page_limit=10)
+    assert len(cache.get_stream(stream_id)) == 0
+    added = append(stream_id, 0, 3)
+    drop_id, placement_id = added[1]
+    assert cache.placement_for_drop(stream_id, drop_id) == placement_id
+    assert cache.cached_drops == 3
+
+
+def test_refresh_fetches_only_appended_drops(server):
+    stream_id = new_stream(20)
+    cache = StreamCache(environment.API_V1_URL, page_limit=10)
+    cache.get_stream(stream_id)
+    pages = cache.pages_fetched
+    added = append(stream_id, 20, 22)
+    assert cache.placement_for_drop(stream_id, added[-1][0]) == added[-1][1]
+    assert cache.pages_fetched == pages + 1
+    assert cache.cached_drops == 22
+
+
+def test_failed_first_load_is_not_cached(server, monkeypatch):
+    stream_id = new_stream(5)
+    cache = StreamCache(environment.API_V1_URL)
+    real_get_page = streaming.get_page
+
+    def failing(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("down")
+
+    monkeypatch.setattr(streaming, "get_page", failing)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        cache.get_stream(stream_id)
+    assert stream_id not in cache.streams
+    monkeypatch.setattr(streaming, "get_page", real_get_page)
+    assert len(cache.get_stream(stream_id)) == 5
+    assert cache.cached_drops == 5
+
+
+def test_least_recently_used_streams_are_evicted(server):
+    first, second = new_stream(6), new_stream(6)
+    cache = StreamCache(environment.API_V1_URL, max_drops=10)
+    cache.get_stream(first)
+    cache.get_stream(second)
+    assert list(cache.streams) == [second]
+    assert cache.cached_drops == 6
@@ -0,0 +1,143 @@
+import json
+import random
+
+import pytest
+
+import api_client
+import environment
+import streaming
+import test_10_FE_prep as fe_prep
+from streaming import JsonItemStream
+
+TRICKY_DROPS = [
+    {"title": 'Quote " inside', "text": "ends with a backslash \\"},
+    {"title": "Backslash then quote \\\"", "text": "\\\\\\\""},
+    {"title": "Braces } ] { [ and , : in text", "text": "\"{\"drops\": []}\""},
+    {"title": "Unicode é — 漢字 😀", "text": "\u0000\t\n"},
+    {"title": "Nested", "tags": [{"k": [1, 2, {"deep": "]"}]}], "n": None},
+]
+PAGE = {
+    "total_count": 5,
+    "drops": TRICKY_DROPS,
+    "has_more": False,
+    "note": {"drops": ["not", "this", "one"]},
+}
+
+
+def parse(body, splits):
+    """Feeds body in pieces cut at the given offsets."""
+    parser = JsonItemStream("drops")
+    items = []
+    start = 0
+    for end in sorted(splits) + [len(body)]:
+        items.extend(parser.feed(body[start:end]))
+        start = end
+    parser.close()
+    return items, parser
+
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+def test_every_single_split_point(separators):
+    body = json.dumps(PAGE, separators=separators, ensure_ascii=False).encode()
+    for cut in range(len(body) + 1):
+        items, parser = parse(body, [cut])
+        assert items == TRICKY_DROPS, f"cut at {cut}"
+        assert parser.fields == {
+            "total_count": 5, "has_more": False, "note": PAGE["note"],
+        }
+
+
+def test_random_chunking_and_one_byte_chunks():
+    body = json.dumps(PAGE, indent=2).encode()
+    rng = random.Random(7)
+    for _ in range(200):
+        cuts = rng.sample(range(1, len(body)), rng.randint(1, 40))
+        assert parse(body, cuts)[0] == TRICKY_DROPS
+    assert parse(body, range(1, len(body)))[0] == TRICKY_DROPS
+
+
+def test_items_are_returned_as_soon_as_complete():
+    body = json.dumps({"drops": [{"a": 1}, {"b": 2}], "has_more": True}).encode()
+    parser = JsonItemStream("drops")
+    middle = body.rindex(b"{")  # Start of the second item
+    assert parser.feed(body[:middle]) == [{"a": 1}]
+    assert parser.feed(body[middle:]) == [{"b": 2}]
+    assert parser.fields == {"has_more": True}
+
+
+def test_buffer_stays_bounded_by_one_item():
+    drops = [{"text": "x" * 100} for _ in range(1000)]
+    body = json.dumps({"drops": drops}).encode()
+    items, parser = parse(body, range(256, len(body), 256))
+    assert len(items) == 1000
+    assert parser.peak_buffer < 512
+
+
+def test_empty_array_and_missing_field():
+    assert parse(b'{"drops": [], "has_more": false}', [5])[0] == []
+    items, parser = parse(b'{"other": [1, 2]}', [3])
+    assert items == [] and parser.fields == {"other": [1, 2]}
+
+
+def test_truncated_body_raises():
+    parser = JsonItemStream("drops")
+    parser.feed(b'{"drops": [{"a": 1}, {"b"')
+    with pytest.raises(ValueError, match="ended early"):
+        parser.close()
+
+
+def test_non_object_body_raises():
+    with pytest.raises(ValueError):
+        JsonItemStream("drops").feed(b"[1, 2]")
+
+
+def test_streamed_page_hooks_see_the_whole_body(server):
+    pool_id = fe_prep.create_pool(verbose=False)
+    stream_id = fe_prep.create_stream(pool_id, "S", "d", verbose=False)
+    fe_prep.add_drops_to_stream(
+        stream_id, fe_prep.synthetic_drops("S", 0, 250), verbose=False
+    )
+    calls = []
+
+    def hook(method, url, response, elapsed, streamed_bytes=None):
+        calls.append(streamed_bytes)
+
+    api_client.add_request_hook(hook)
+    try:
+        pages = []
+        drops = list(streaming.iter_stream_drops(
+            environment.API_V1_URL, stream_id, limit=100,
+            on_page=lambda fields, count: pages.append(len(calls)),
+        ))
+    finally:
+        api_client.remove_request_hook(hook)
+    assert len(drops) == 250
+    assert [d["content"]["title"] for d in drops[:2]] == ["Drop 1", "Drop 2"]
+    assert pages == [1, 2, 3]  # Each page's hook ran once it was read
+    assert all(size and size > 1000 for size in calls)
+
+
+def test_abandoned_page_finishes_its_request_on_close(server):
+    pool_id = fe_prep.create_pool(verbose=False)
+    stream_id = fe_prep.create_stream(pool_id, "S", "d", verbose=False)
+    fe_prep.add_drops_to_stream(
+        stream_id, fe_prep.synthetic_drops("S", 0, 50), verbose=False
+    )
+    calls = []
+
+    def hook(method, url, response, elapsed, streamed_bytes=None):
+        calls.append(streamed_bytes)
+
+    url = f"{environment.API_V1_URL}/streams/{stream_id}/drops"
+    api_client.add_request_hook(hook)
+    try:
+        with streaming.get_page(url, params={"limit": 50}) as page:
+            drops = iter(page)
+            assert next(drops)["content"]["title"] == "Drop 1"
+            assert calls == []  # Still in flight while the page is open
+        assert len(calls) == 1 and calls[0] > 0
+        streaming.get_page(url, params={"limit": 50}).close()  # Never iterated
+        page.close()  # Closing twice is harmless
+    finally:
+        api_client.remove_request_hook(hook)
+    assert len(calls) == 2
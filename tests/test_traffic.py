@@ -0,0 +1,40 @@
+import pytest
+
+import api_client
+import traffic
+
+
+class Response:
+    status_code = 200
+
+    def json(self):
+        return {}
+
+
+def entry(path="/health", t=0.0):
+    return {"t": t, "method": "GET", "path": path, "template": path,
+            "status": 200}
+
+
+def test_unexpected_send_error_is_recorded(monkeypatch, capsys):
+    def request(method, url, **kwargs):
+        if url.endswith("/bad"):
+            raise TypeError("not JSON serializable")
+        return Response()
+
+    monkeypatch.setattr(api_client, "request", request)
+    replayer = traffic.TrafficReplayer(
+        [entry("/health"), entry("/bad")], "http://server", speed=None
+    )
+    assert replayer.run() is False
+    errors = {r["template"]: r["error"] for r in replayer.results}
+    assert errors == {"/health": None, "/bad": "TypeError: not JSON serializable"}
+    assert "Requests that got no response: 1" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("speed", ["abc", "0", "-2", "inf"])
+def test_invalid_speed_is_a_usage_error(monkeypatch, speed):
+    monkeypatch.setattr(traffic.sys, "argv", ["traffic.py", "--speed", speed])
+    with pytest.raises(SystemExit) as exit_info:
+        traffic.main()
+    assert exit_info.value.code == 2
@@ -0,0 +1,86 @@
+import json
+import threading
+import time
+
+import pytest
+
+import test_01_endpoints as endpoints
+from checkpoint import CheckpointJournal
+
+
+@pytest.fixture
+def journal_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "state.jsonl")
+    monkeypatch.setattr(endpoints, "STATE_FILE", path)
+    monkeypatch.setattr(endpoints, "_journal", None)
+    yield path
+    if endpoints._journal is not None:
+        endpoints._journal.close()
+
+
+def fake_validation(monkeypatch, bad=(), delay=0.0):
+    """Replaces validate_entity; returns the calls and the peak concurrency."""
+    calls = []
+    peak = [0]
+    running = [0]
+    lock = threading.Lock()
+
+    def validate_entity(kind, entity_id):
+        with lock:
+            calls.append(entity_id)
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(delay)
+        with lock:
+            running[0] -= 1
+        return ValueError("mismatch") if entity_id in bad else None
+
+    monkeypatch.setattr(endpoints, "validate_entity", validate_entity)
+    return calls, peak
+
+
+def entities(count):
+    return [("pool", "p")] + [("drop", f"d{i}") for i in range(count)]
+
+
+def test_successes_are_journaled_and_failures_returned(journal_path, monkeypatch):
+    calls, _ = fake_validation(monkeypatch, bad={"d3"})
+    state = endpoints.load_state()
+    failures = endpoints.validate_entities(state, entities(10), workers=4)
+    assert [(kind, entity_id) for kind, entity_id, _ in failures] == [("drop", "d3")]
+    assert sorted(calls) == sorted(["p"] + [f"d{i}" for i in range(10)])
+    validated = CheckpointJournal(journal_path).state["validated"]
+    assert len(validated) == 10 and "drop:d3" not in validated
+    assert validated["pool:p"] is True
+
+
+def test_resumed_pass_only_checks_what_is_left(journal_path, monkeypatch):
+    fake_validation(monkeypatch, bad={"d3", "d7"})
+    endpoints.validate_entities(endpoints.load_state(), entities(10), workers=4)
+    endpoints._journal.close()
+    monkeypatch.setattr(endpoints, "_journal", None)
+
+    calls, _ = fake_validation(monkeypatch)
+    state = endpoints.load_state()  # Replayed from the journal
+    assert endpoints.validate_entities(state, entities(10), workers=4) == []
+    assert sorted(calls) == ["d3", "d7"]
+    assert len(state["validated"]) == 11
+
+
+def test_progress_is_saved_in_batches(journal_path, monkeypatch):
+    monkeypatch.setattr(endpoints, "VALIDATION_SAVE_EVERY", 5)
+    fake_validation(monkeypatch)
+    endpoints.validate_entities(endpoints.load_state(), entities(19), workers=2)
+    with open(journal_path, encoding="utf-8") as f:
+        merges = [json.loads(line)["data"] for line in f if '"merge"' in line]
+    assert len(merges) >= 3
+    assert all(len(batch) >= 5 for batch in merges[:-1])
+    assert sum(len(batch) for batch in merges) == 20
+
+
+def test_concurrency_is_bounded_by_workers(journal_path, monkeypatch):
+    _, peak = fake_validation(monkeypatch, delay=0.01)
+    started = time.perf_counter()
+    endpoints.validate_entities(endpoints.load_state(), entities(39), workers=8)
+    assert peak[0] == 8
+    assert time.perf_counter() - started < 0.3  # Serially it takes 0.4s
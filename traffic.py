@@ -0,0 +1,325 @@
+import atexit
+import json
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+import api_client
+import compression
+import environment
+from cli import get_flag_value
+from metrics import endpoint_template
+
+# --- Configuration ---
+DEFAULT_TRAFFIC_FILE = "recorded_requests.jsonl"
+DEFAULT_REPLAY_WORKERS = 32
+# Keys whose values are server-generated IDs that must be remapped on replay
+ID_KEYS = {
+    "pool_id", "stream_id", "drop_id", "placement_id",
+    "next_placement_id", "prev_placement_id",
+    "first_drop_placement_id", "last_drop_placement_id",
+    "last_read_drop_id", "last_read_placement_id",
+}
+# Headers that are transport details, not part of the recorded call
+SKIPPED_HEADERS = {
+    "accept", "accept-encoding", "connection", "content-encoding",
+    "content-length", "user-agent", "x-request-id",
+}
+
+
+def extract_ids(payload):
+    """Returns [(key, value), ...] for every ID field, in document order."""
+    found = []
+    if isinstance(payload, dict):
+        for key, value in payload.items():
+            if key in ID_KEYS and isinstance(value, str):
+                found.append((key, value))
+            else:
+                found.extend(extract_ids(value))
+    elif isinstance(payload, list):
+        for item in payload:
+            found.extend(extract_ids(item))
+    return found
+
+
+def decode_body(body, encoding=None):
+    if body is None:
+        return None
+    if encoding:  # Recorded as sent before compression; replay re-encodes
+        body = compression.decompress(body, encoding)
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", errors="replace")
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body
+
+
+class TrafficRecorder:
+    """Writes every api_client call as one JSONL line.
+
+    Each line holds the relative send time, method, concrete path, endpoint
+    template, query params, call-specific headers, JSON body, response
+    status and the IDs found in the response, which the replayer uses to
+    map recorded IDs onto the ones its own server hands out.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "w", encoding="utf-8")
+        self.started = None
+        self.recorded = 0
+        self.skipped = 0
+
+    def record_request(self, method, url, response, elapsed, streamed_bytes=None):
+        """api_client request hook."""
+        sent_at = time.perf_counter() - elapsed
+        if response is None:
+            with self.lock:
+                self.skipped += 1  # No prepared request to capture
+            return
+        prepared = response.request
+        parts = urlsplit(prepared.url)
+        response_ids = []
+        # Streamed bodies are left to their reader; they are pages, which
+        # create no IDs the replayer needs
+        if streamed_bytes is None and response.content:
+            try:
+                response_ids = extract_ids(response.json())
+            except ValueError:
+                pass
+        entry = {
+            "method": method.upper(),
+            "path": parts.path,
+            "template": endpoint_template(prepared.url),
+            "params": dict(parse_qsl(parts.query)),
+            "headers": {
+                k: v for k, v in prepared.headers.items()
+                if k.lower() not in SKIPPED_HEADERS
+                and not (k.lower() == "content-type" and prepared.body is None)
+            },
+            "body": decode_body(
+                prepared.body, prepared.headers.get("Content-Encoding")
+            ),
+            "status": response.status_code,
+            "response_ids": response_ids,
+        }
+        with self.lock:
+            if self.started is None:
+                self.started = sent_at
+            entry = {"t": round(sent_at - self.started, 6), **entry}
+            self.file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self.recorded += 1
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+        print(f"\nRecorded {self.recorded} requests to {self.path}"
+              + (f" ({self.skipped} failed before a response)" if self.skipped else ""))
+
+
+def configure_from_argv():
+    """Starts recording all harness traffic when --record [PATH] is given."""
+    if "--record" not in sys.argv:
+        return None
+    index = sys.argv.index("--record")
+    path = DEFAULT_TRAFFIC_FILE
+    if index + 1 < len(sys.argv) and not sys.argv[index + 1].startswith("--"):
+        path = sys.argv[index + 1]
+    recorder = TrafficRecorder(path)
+    api_client.add_request_hook(recorder.record_request)
+    atexit.register(recorder.close)
+    return recorder
+
+
+class TrafficReplayer:
+    """Re-issues recorded traffic at a chosen speed, remapping created IDs.
+
+    Calls are scheduled at their recorded offsets divided by `speed` (or
+    back to back when speed is None). A call that references an ID created
+    by an earlier call waits until that call's replayed response has
+    supplied the new ID, so dependencies hold even at max speed.
+    """
+
+    def __init__(self, entries, base_url, speed=1.0,
+                 workers=DEFAULT_REPLAY_WORKERS, remap_users=True):
+        self.entries = entries
+        self.base_url = base_url
+        self.speed = speed
+        self.workers = workers
+        self.remap_users = remap_users
+        self.lock = threading.Lock()
+        self.id_map = {}
+        self.user_map = {}
+        self.ready = {}  # recorded ID -> Event set once it is mapped
+        self.results = []
+        # Recorded ID -> index of the entry whose response first returned it
+        self.producers = {}
+        for i, entry in enumerate(entries):
+            for _, value in entry.get("response_ids", []):
+                self.producers.setdefault(value, i)
+
+    def event_for(self, recorded_id):
+        with self.lock:
+            return self.ready.setdefault(recorded_id, threading.Event())
+
+    def map_user(self, user_id):
+        if not self.remap_users:
+            return user_id
+        with self.lock:
+            if user_id not in self.user_map:
+                self.user_map[user_id] = f"user_{uuid.uuid4()}"
+            return self.user_map[user_id]
+
+    def remap(self, value, index):
+        """Rewrites recorded IDs inside value, waiting on their producers."""
+        if isinstance(value, str):
+            producer = self.producers.get(value)
+            if producer is not None and producer < index:
+                # Earlier entries are submitted first, so this cannot deadlock
+                self.event_for(value).wait()
+                with self.lock:
+                    return self.id_map.get(value, value)
+            return value
+        if isinstance(value, dict):
+            return {
+                k: self.map_user(v) if k == "creator_id" and isinstance(v, str)
+                else self.remap(v, index)
+                for k, v in value.items()
+            }
+        if isinstance(value, list):
+            return [self.remap(v, index) for v in value]
+        return value
+
+    def learn_ids(self, entry, index, response):
+        """Maps IDs first returned by this entry onto the replayed response."""
+        try:
+            replayed_ids = extract_ids(response.json()) if response is not None else []
+        except ValueError:
+            replayed_ids = []
+        with self.lock:
+            for (key, recorded), (new_key, new) in zip(
+                entry.get("response_ids", []), replayed_ids
+            ):
+                if key == new_key and self.producers.get(recorded) == index:
+                    self.id_map.setdefault(recorded, new)
+        for _, recorded in entry.get("response_ids", []):
+            if self.producers.get(recorded) == index:
+                self.event_for(recorded).set()  # Unblock waiters even on failure
+
+    def path_ids(self, path, index):
+        segments = path.split("/")
+        return "/".join(self.remap(segment, index) for segment in segments)
+
+    def send(self, entry, index, scheduled_at):
+        response = None
+        error = None
+        try:
+            headers = dict(entry.get("headers", {}))
+            if "X-User-Id" in headers:
+                headers["X-User-Id"] = self.map_user(headers["X-User-Id"])
+            kwargs = {
+                "params": self.remap(entry.get("params") or {}, index),
+                "headers": headers,
+            }
+            if entry.get("body") is not None:
+                kwargs["json"] = self.remap(entry["body"], index)
+            url = self.base_url + self.path_ids(entry["path"], index)
+            response = api_client.request(entry["method"], url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+        except Exception as e:  # A bad entry must not vanish from the results
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            self.learn_ids(entry, index, response)
+        lag = time.perf_counter() - scheduled_at
+        status = response.status_code if response is not None else None
+        with self.lock:
+            self.results.append({
+                "index": index,
+                "template": entry.get("template"),
+                "status": status,
+                "recorded_status": entry.get("status"),
+                "error": error,
+                "lag": lag,
+            })
+
+    def run(self):
+        speed_label = "max speed" if self.speed is None else f"{self.speed:g}x"
+        print(f"--- Replaying {len(self.entries)} requests at {speed_label} "
+              f"against {self.base_url} ---")
+        started = time.perf_counter()
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for index, entry in enumerate(self.entries):
+                scheduled_at = time.perf_counter()
+                if self.speed is not None:
+                    scheduled_at = started + entry["t"] / self.speed
+                    delay = scheduled_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                futures.append(
+                    executor.submit(self.send, entry, index, scheduled_at)
+                )
+        for future in futures:
+            future.result()  # Re-raises anything send() did not record
+        elapsed = time.perf_counter() - started
+        return self.summary(elapsed)
+
+    def summary(self, elapsed):
+        errors = [r for r in self.results if r["error"]]
+        mismatched = [
+            r for r in self.results
+            if not r["error"] and r["status"] != r["recorded_status"]
+        ]
+        print(f"Replayed {len(self.results)} requests in {elapsed:.2f}s "
+              f"({len(self.results) / elapsed if elapsed else 0:.1f} req/s)")
+        print(f"Requests that got no response: {len(errors)}")
+        print(f"Status differs from recording: {len(mismatched)}")
+        for result in mismatched[:10]:
+            print(f"  #{result['index']} {result['template']}: "
+                  f"{result['recorded_status']} -> {result['status']}")
+        return not errors and not mismatched
+
+
+def load_traffic(path):
+    """Reads a recorded traffic file, ordered by send time."""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    return sorted(entries, key=lambda entry: entry["t"])
+
+
+def main():
+    import test_10_FE_prep as fe_prep
+
+    path = get_flag_value("--replay", DEFAULT_TRAFFIC_FILE)
+    speed_flag = get_flag_value("--speed", "1")
+    try:
+        speed = None if speed_flag == "max" else float(speed_flag)
+    except ValueError:
+        speed = 0.0
+    if speed is not None and not 0 < speed < float("inf"):
+        print(f"Invalid value for --speed: {speed_flag} "
+              f"(expected a positive number or max)")
+        sys.exit(2)
+    fe_prep.configure_from_argv()
+    workers = get_flag_value("--workers", DEFAULT_REPLAY_WORKERS, int)
+    api_client.configure(pool_size=workers)
+    replayer = TrafficReplayer(
+        load_traffic(path),
+        environment.BASE_URL,
+        speed=speed,
+        workers=workers,
+        remap_users="--keep-users" not in sys.argv,
+    )
+    sys.exit(0 if replayer.run() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import atexit
+import sys
+import threading
+import time
+
+import api_client
+import compression
+from cli import get_flag_value
+from metrics import endpoint_template
+
+# --- Configuration ---
+COMPRESS_MODES = ("gzip", "br", "none")
+
+
+class EndpointWire:
+    """Byte counters for one method + endpoint template."""
+
+    def __init__(self):
+        self.requests = 0
+        self.upload_raw = 0
+        self.upload_wire = 0
+        self.compressed_uploads = 0
+        self.rejected_uploads = 0
+        self.compress_seconds = 0.0
+        self.download_raw = 0
+        self.download_wire = 0
+        self.encoded_downloads = 0
+
+
+def ratio(raw, wire):
+    return f"{wire / raw * 100:.0f}%" if raw else "-"
+
+
+class WireAccounting:
+    """Per-endpoint raw vs. on-the-wire bytes and the time spent compressing.
+
+    With an encoding, request bodies of at least min_bytes are compressed
+    before they go out (Content-Encoding). Responses are counted as read
+    from the socket and as decoded; streamed responses once their reader
+    has finished with them.
+    """
+
+    def __init__(self, encoding=None, accept_encoding=None,
+                 min_bytes=compression.MIN_COMPRESS_BYTES):
+        self.encoding = encoding
+        self.accept_encoding = accept_encoding
+        self.min_bytes = min_bytes
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.uploads = threading.local()  # send hook -> request hook, per thread
+
+    def stats_for(self, method, url):
+        key = f"{method.upper()} {endpoint_template(url)}"
+        if key not in self.endpoints:
+            self.endpoints[key] = EndpointWire()
+        return self.endpoints[key]
+
+    def encode_request(self, prepared):
+        """api_client send hook: compresses the body if it is worth it."""
+        body = prepared.body
+        if isinstance(body, str):
+            body = body.encode()
+        raw = len(body) if body else 0
+        upload = {"raw": raw, "wire": raw, "seconds": 0.0, "encoded": False}
+        if (self.encoding and raw >= self.min_bytes
+                and "Content-Encoding" not in prepared.headers):
+            started = time.perf_counter()
+            encoded = compression.compress(body, self.encoding)
+            upload["seconds"] = time.perf_counter() - started
+            prepared.body = encoded
+            prepared.headers["Content-Encoding"] = self.encoding
+            prepared.headers["Content-Length"] = str(len(encoded))
+            upload.update(wire=len(encoded), encoded=True)
+        self.uploads.last = upload
+
+    def record_request(self, method, url, response, elapsed, streamed_bytes=None):
+        """api_client request hook."""
+        upload = None
+        if streamed_bytes is None:  # Streamed GETs finish later and send no body
+            upload = getattr(self.uploads, "last", None)
+            self.uploads.last = None
+        with self.lock:
+            stats = self.stats_for(method, url)
+            stats.requests += 1
+            if upload:
+                stats.upload_raw += upload["raw"]
+                stats.upload_wire += upload["wire"]
+                stats.compress_seconds += upload["seconds"]
+                if upload["encoded"]:
+                    stats.compressed_uploads += 1
+                    if response is not None and response.status_code == 415:
+                        stats.rejected_uploads += 1
+        if response is not None:
+            self.record_response(
+                response,
+                streamed_bytes if streamed_bytes is not None
+                else len(response.content or b""),
+            )
+
+    def record_response(self, response, decoded_bytes):
+        encoding = response.headers.get("Content-Encoding", "identity")
+        with self.lock:
+            stats = self.stats_for(response.request.method, response.url)
+            stats.download_raw += decoded_bytes
+            stats.download_wire += response.raw.tell()  # Bytes off the socket
+            if encoding.lower() != "identity":
+                stats.encoded_downloads += 1
+
+    def report(self):
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+        print(f"\n--- Wire bytes (uploads: {self.encoding or 'identity'}, "
+              f"Accept-Encoding: {self.accept_encoding or 'client default'}) ---")
+        print(f"{'endpoint':<38}{'count':>7}{'up KiB':>9}{'wire':>6}"
+              f"{'comp ms':>9}{'down KiB':>10}{'wire':>6}")
+        totals = EndpointWire()
+        for key, stats in endpoints:
+            print(f"{key:<38}{stats.requests:>7}"
+                  f"{stats.upload_raw / 1024:>9.0f}"
+                  f"{ratio(stats.upload_raw, stats.upload_wire):>6}"
+                  f"{stats.compress_seconds * 1000:>9.1f}"
+                  f"{stats.download_raw / 1024:>10.0f}"
+                  f"{ratio(stats.download_raw, stats.download_wire):>6}")
+            for name, value in vars(stats).items():
+                setattr(totals, name, getattr(totals, name) + value)
+        print(f"{'total':<38}{totals.requests:>7}"
+              f"{totals.upload_raw / 1024:>9.0f}"
+              f"{ratio(totals.upload_raw, totals.upload_wire):>6}"
+              f"{totals.compress_seconds * 1000:>9.1f}"
+              f"{totals.download_raw / 1024:>10.0f}"
+              f"{ratio(totals.download_raw, totals.download_wire):>6}")
+        if totals.compressed_uploads:
+            print(f"{totals.compressed_uploads} uploads compressed, "
+                  f"{(totals.upload_raw - totals.upload_wire) / 1024:.0f} KiB "
+                  f"saved for {totals.compress_seconds * 1000:.1f}ms of CPU "
+                  f"({totals.compress_seconds / totals.compressed_uploads * 1000:.2f}"
+                  f"ms each)")
+        if totals.rejected_uploads:
+            print(f"!!! {totals.rejected_uploads} compressed uploads rejected "
+                  f"with 415: the server does not accept {self.encoding} "
+                  f"bodies. !!!")
+        if self.encoding and totals.download_raw and not totals.encoded_downloads:
+            print(f"The server sent no {self.encoding} responses; it ignores "
+                  f"Accept-Encoding (start local_server.py with --compress).")
+        print("Compare latency by running with --report and --compress none, "
+              "then with --compress gzip, and python metrics.py --compare.")
+
+
+_accounting = None
+
+
+def configure_from_argv():
+    """Enables --compress gzip|br|none and --wire-stats.
+
+    --compress compresses request bodies of at least --compress-min bytes
+    and asks for responses in the same encoding; none turns compression
+    off both ways, as the baseline to compare against. Either flag prints
+    per-endpoint raw and on-the-wire bytes at exit.
+    """
+    global _accounting
+    mode = get_flag_value("--compress")
+    if mode is None and "--wire-stats" not in sys.argv:
+        return None
+    if mode is not None and mode not in COMPRESS_MODES:
+        print(f"Invalid value for --compress: {mode} "
+              f"(expected {', '.join(COMPRESS_MODES)})")
+        sys.exit(2)
+    encoding = accept_encoding = None
+    if mode == "none":
+        accept_encoding = "identity"
+    elif mode:
+        try:
+            compression.check_codec(mode)
+        except ValueError as e:
+            print(f"--compress {mode}: {e}")
+            sys.exit(2)
+        encoding = accept_encoding = mode
+    if accept_encoding:
+        api_client.configure(headers={"Accept-Encoding": accept_encoding})
+    _accounting = WireAccounting(
+        encoding, accept_encoding,
+        get_flag_value("--compress-min", compression.MIN_COMPRESS_BYTES, int),
+    )
+    api_client.add_send_hook(_accounting.encode_request)
+    api_client.add_request_hook(_accounting.record_request)
+    atexit.register(_accounting.report)
+    return _accounting
+
+
+def local_server_compression():
+    """Whether a --local stand-in server should compress its responses."""
+    return get_flag_value("--compress", "none") != "none"